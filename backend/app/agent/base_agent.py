@@ -2,11 +2,18 @@
 Base Agent class for all multi-agent orchestration patterns.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, List
+from typing import Any, AsyncIterator, Dict, Optional, List
 import google.generativeai as genai
 import asyncio
 import time
 
+from backend.app.utils.metrics import metrics
+from backend.app.utils.rate_limit import RateLimiter
+from backend.core.config import settings
+
+# Shared by every agent in the process so bulk jobs cannot exceed the Gemini quota
+llm_rate_limiter = RateLimiter(settings.LLM_MAX_REQUESTS_PER_MINUTE)
+
 
 class BaseAgent(ABC):
     """Abstract base class for all agents."""
@@ -23,30 +30,35 @@ class BaseAgent(ABC):
         """Process input data and return output."""
         pass
     
+    def _build_request(self, messages: List[Dict[str, str]], temperature: float, response_format: str):
+        """Translate role-tagged messages into Gemini chat contents and config."""
+        system_prompt = ""
+        chat_messages = []
+        for msg in messages:
+            if msg["role"] == "system":
+                system_prompt += msg["content"] + "\n"
+            elif msg["role"] == "user":
+                # Prepend system prompt to the first user message
+                content = system_prompt + msg["content"] if system_prompt else msg["content"]
+                chat_messages.append({'role': 'user', 'parts': [content]})
+                system_prompt = "" # Clear after use
+            elif msg["role"] == "assistant":
+                 chat_messages.append({'role': 'model', 'parts': [msg["content"]]})
+
+        generation_config = genai.types.GenerationConfig(temperature=temperature)
+        if response_format == "json":
+            # Enable JSON mode if requested
+            generation_config.response_mime_type = "application/json"
+        return chat_messages, generation_config
+
     async def _make_api_call(self, messages: List[Dict[str, str]], temperature: float = 0.7, response_format: str = "text") -> str:
         """Make an API call to Google Gemini and track metrics."""
+        await self._acquire_rate_limit()
         start_time = time.time()
         
         try:
             model = genai.GenerativeModel(self.model)
-           
-            system_prompt = ""
-            chat_messages = []
-            for msg in messages:
-                if msg["role"] == "system":
-                    system_prompt += msg["content"] + "\n"
-                elif msg["role"] == "user":
-                    # Prepend system prompt to the first user message
-                    content = system_prompt + msg["content"] if system_prompt else msg["content"]
-                    chat_messages.append({'role': 'user', 'parts': [content]})
-                    system_prompt = "" # Clear after use
-                elif msg["role"] == "assistant":
-                     chat_messages.append({'role': 'model', 'parts': [msg["content"]]})
-
-            generation_config = genai.types.GenerationConfig(temperature=temperature)
-            if response_format == "json":
-                # Enable JSON mode if requested
-                generation_config.response_mime_type = "application/json"
+            chat_messages, generation_config = self._build_request(messages, temperature, response_format)
 
             response = await model.generate_content_async(
                 chat_messages,
@@ -54,13 +66,75 @@ class BaseAgent(ABC):
             )
             
             self.execution_time = time.time() - start_time
+            self._record_usage(response)
             
             return response.text
             
         except Exception as e:
             self.execution_time = time.time() - start_time
             raise Exception(f"API call failed for {self.name}: {str(e)}")
-    
+
+    async def _stream_api_call(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> AsyncIterator[str]:
+        """Stream a Gemini response as text chunks, tracking time to first token."""
+        await self._acquire_rate_limit()
+        start_time = time.time()
+        first_token_at = None
+
+        try:
+            model = genai.GenerativeModel(self.model)
+            chat_messages, generation_config = self._build_request(messages, temperature, "text")
+
+            response = await model.generate_content_async(
+                chat_messages,
+                generation_config=generation_config,
+                stream=True
+            )
+            async for chunk in response:
+                text = self._chunk_text(chunk)
+                if not text:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.time()
+                    metrics.observe("llm.ttft_seconds", first_token_at - start_time)
+                    metrics.observe(f"llm.{self.name}.ttft_seconds", first_token_at - start_time)
+                yield text
+
+            self.execution_time = time.time() - start_time
+            metrics.observe("llm.stream_seconds", self.execution_time)
+            self._record_usage(response)
+
+        except Exception as e:
+            self.execution_time = time.time() - start_time
+            raise Exception(f"API call failed for {self.name}: {str(e)}")
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """
+        Text of one streamed chunk. chunk.text raises ValueError when a
+        chunk has no parts (the final usage-only chunk, or a finish reason
+        like SAFETY), so the parts are read directly instead.
+        """
+        candidates = getattr(chunk, "candidates", None) or []
+        if not candidates:
+            return ""
+        content = getattr(candidates[0], "content", None)
+        parts = getattr(content, "parts", None) or []
+        return "".join(getattr(part, "text", "") or "" for part in parts)
+
+    async def _acquire_rate_limit(self):
+        waited = await llm_rate_limiter.wait()
+        if waited:
+            metrics.observe("llm.rate_limit_wait_seconds", waited)
+
+    def _record_usage(self, response):
+        """Accumulate token counts reported by Gemini for this agent."""
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return
+        self.token_usage["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+        self.token_usage["completion_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+        self.token_usage["total_tokens"] += getattr(usage, "total_token_count", 0) or 0
+
     def get_metrics(self) -> Dict:
         """Get execution metrics for this agent."""
         return {
@@ -80,13 +154,18 @@ class SimpleAgent(BaseAgent):
     
     async def process(self, input_data: Any, context: Optional[Dict] = None) -> Any:
         """Process input using the system prompt."""
+        result = await self._make_api_call(self._messages(input_data, context))
+        return result
+
+    def _messages(self, input_data: Any, context: Optional[Dict] = None) -> List[Dict[str, str]]:
         messages = [
             {"role": "system", "content": self.system_prompt},
             {"role": "user", "content": str(input_data)}
         ]
-        
         if context:
             messages.insert(1, {"role": "system", "content": f"Context: {context}"})
-        
-        result = await self._make_api_call(messages)
-        return result
+        return messages
+
+    def stream(self, input_data: Any, context: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Like process(), but yields the response text as it is generated."""
+        return self._stream_api_call(self._messages(input_data, context))
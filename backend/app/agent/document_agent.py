@@ -3,14 +3,8 @@
 from backend.app.agent.base_agent import SimpleAgent
 from backend.core.config import settings
 
-DOCUMENT_ANALYZER_PROMPT = """
-You are a document analysis expert.
-
-Given the full text of a document, you must:
-1. Identify what type of document it is (invoice, agreement, offer letter, ID proof, purchase order, etc.).
-2. Generate a clear title summarizing the document (e.g., "Vendor Agreement with XYZ Pvt Ltd").
-3. Extract all important structured fields (variables) with this schema:
-
+# Field schema and output rules shared by both analysis prompts
+FIELDS_SCHEMA_PROMPT = """
 {
   "fields": [
     {
@@ -35,6 +29,24 @@ Given the full text of a document, you must:
 Return ONLY valid JSON (no Markdown, no explanation). Include fields even if values are missing, if they’re relevant for this document type.
 """
 
+DOCUMENT_ANALYZER_PROMPT = """
+You are a document analysis expert.
+
+Given the full text of a document, you must:
+1. Identify what type of document it is (invoice, agreement, offer letter, ID proof, purchase order, etc.).
+2. Generate a clear title summarizing the document (e.g., "Vendor Agreement with XYZ Pvt Ltd").
+3. Extract all important structured fields (variables) with this schema:
+""" + FIELDS_SCHEMA_PROMPT
+
+# Used when the local classifier already named the type: no classification step
+TYPED_DOCUMENT_ANALYZER_PROMPT = """
+You are a document analysis expert.
+
+Given the full text of a document whose type is already known, you must:
+1. Generate a clear title summarizing the document (e.g., "Vendor Agreement with XYZ Pvt Ltd").
+2. Extract all important structured fields (variables) for that document type with this schema:
+""" + FIELDS_SCHEMA_PROMPT
+
 document_agent = SimpleAgent(
     name="DocumentAgent",
     role="Extracts structured information and variables from uploaded documents.",
@@ -43,19 +55,41 @@ document_agent = SimpleAgent(
     model="gemini-2.5-flash",
 )
 
+typed_document_agent = SimpleAgent(
+    name="TypedDocumentAgent",
+    role="Extracts a title and structured fields from documents whose type is already known.",
+    api_key=settings.GEMINI_API_KEY,
+    system_prompt=TYPED_DOCUMENT_ANALYZER_PROMPT,
+    model="gemini-2.5-flash",
+)
+
 
-async def analyze_document_text(text: str) -> dict:
+async def analyze_document_text(text: str, document_type: str = None) -> dict:
     """
     Given full document text, returns structured analysis:
     { title, document_type, fields[] }
+    A known document_type (e.g. from the local classifier) is kept in the
+    result, and the model is only asked for the title and fields.
     """
-    prompt = f"""
+    if document_type:
+        agent = typed_document_agent
+        prompt = f"""
+Document type: {document_type}
+
+Extract the title and all key structured information from the following document text.
+
+Document Text:
+{text}
+"""
+    else:
+        agent = document_agent
+        prompt = f"""
 Analyze the following document text and extract all key structured information.
 
 Document Text:
 {text}
 """
-    result = await document_agent.process(prompt)
+    result = await agent.process(prompt)
 
     import json, re
 
@@ -66,8 +100,50 @@ Document Text:
 
         return {
             "title": parsed.get("title", "Untitled Document"),
-            "document_type": parsed.get("document_type", "unknown"),
+            "document_type": document_type or parsed.get("document_type", "unknown"),
             "fields": parsed.get("fields", []),
         }
     except Exception as e:
         return {"error": f"Failed to parse: {e}", "raw_output": result}
+
+
+DELTA_EXTRACTOR_PROMPT = """
+You are a document analysis expert. A document was found to be a near-copy of one already analysed.
+You are given ONLY the passages that differ from the analysed copy, and the names of the fields whose
+previous values no longer appear in the document.
+
+Extract the current value of each listed field from the passages.
+Return ONLY a valid JSON object mapping field name to value (no Markdown, no explanation).
+Omit fields whose value is not present in the passages.
+"""
+
+delta_extractor_agent = SimpleAgent(
+    name="DeltaExtractorAgent",
+    role="Re-extracts changed field values from the differing passages of a near-duplicate document.",
+    api_key=settings.GEMINI_API_KEY,
+    system_prompt=DELTA_EXTRACTOR_PROMPT,
+    model="gemini-2.5-flash",
+)
+
+
+async def extract_changed_fields(changed_text: str, fields: list) -> dict:
+    """
+    Given the passages that differ from an analysed near-duplicate and the
+    fields to refresh ([{name, label}]), returns {name: value}.
+    """
+    import json, re
+
+    prompt = f"""
+Fields to extract:
+{json.dumps(fields, indent=2)}
+
+Changed passages:
+{changed_text}
+"""
+    result = await delta_extractor_agent.process(prompt)
+    try:
+        match = re.search(r"\{.*\}", result, re.DOTALL)
+        parsed = json.loads(match.group(0) if match else result)
+        return parsed if isinstance(parsed, dict) else {}
+    except Exception:
+        return {}
@@ -1,5 +1,12 @@
 from .base_agent import BaseAgent
 from backend.core.config import settings
+from typing import Dict, List
+import json
+import asyncio
+import logging
+
+# Variables per JSON-mode request; keeps each response small and reliable.
+QUESTION_BATCH_SIZE = 25
 
 QUESTION_GENERATOR_PROMPT_TEMPLATE = """
 You are an expert at creating user-friendly questions. Your task is to transform a variable's technical details into a polite, clear, and unambiguous question for an end-user.
@@ -22,6 +29,24 @@ You are an expert at creating user-friendly questions. Your task is to transform
 **Your Turn:**
 """
 
+BATCH_QUESTION_GENERATOR_PROMPT_TEMPLATE = """
+You are an expert at creating user-friendly questions. For EACH template variable below, transform its technical details into a polite, clear, and unambiguous question for an end-user.
+
+**Instructions:**
+1.  Generate one natural-language question per variable, based on its label and description.
+2.  Questions should be polite and easy to understand for someone who is not a technical user.
+3.  If a description provides context or specific format requirements (like "ISO 8601" for a date or "as printed on schedule"), incorporate that as a helpful hint.
+4.  Do NOT include a variable's `key` in its question.
+5.  Respond ONLY with a JSON object mapping each variable `key` to its question string.
+
+**Example:**
+- **Input:** [{{"key": "policy_number", "label": "Policy number", "description": "Insurance policy reference as printed on schedule."}}]
+- **Your Output:** {{"policy_number": "What is the insurance policy number, exactly as it appears on the policy schedule?"}}
+
+**Variables:**
+{variables_json}
+"""
+
 class QuestionGeneratorAgent(BaseAgent):
     """An agent that generates a human-friendly question from variable metadata."""
     async def process(self, input_data: dict, context=None) -> str:
@@ -30,4 +55,41 @@ class QuestionGeneratorAgent(BaseAgent):
         question_text = await self._make_api_call(messages, temperature=0.2)
         return question_text.strip().replace('"', '') # Clean up potential quotes
 
+    async def process_batch(self, variables: List[dict]) -> Dict[str, str]:
+        """
+        Generate questions for many variables with one JSON-mode call per
+        chunk of QUESTION_BATCH_SIZE. Returns a key -> question map; keys the
+        model omitted (or chunks that failed) are simply absent.
+        """
+        chunks = [
+            [
+                {"key": v["key"], "label": v.get("label", ""), "description": v.get("description", "")}
+                for v in variables[start:start + QUESTION_BATCH_SIZE]
+            ]
+            for start in range(0, len(variables), QUESTION_BATCH_SIZE)
+        ]
+        questions: Dict[str, str] = {}
+        for chunk_questions in await asyncio.gather(*[self._generate_chunk(c) for c in chunks]):
+            questions.update(chunk_questions)
+        return questions
+
+    async def _generate_chunk(self, chunk: List[dict]) -> Dict[str, str]:
+        prompt = BATCH_QUESTION_GENERATOR_PROMPT_TEMPLATE.format(variables_json=json.dumps(chunk, indent=2))
+        messages = [{"role": "user", "content": prompt}]
+        try:
+            raw_response = await self._make_api_call(messages, temperature=0.2, response_format="json")
+            parsed = json.loads(raw_response)
+        except Exception as e:
+            logging.warning(f"Batched question generation failed for {len(chunk)} variables: {e}")
+            return {}
+
+        if not isinstance(parsed, dict):
+            return {}
+        requested = {v["key"] for v in chunk}
+        return {
+            key: question.strip()
+            for key, question in parsed.items()
+            if key in requested and isinstance(question, str) and question.strip()
+        }
+
 question_generator_agent = QuestionGeneratorAgent(name="QuestionGeneratorAgent", role="Generates human-friendly questions for template variables.", api_key=settings.GEMINI_API_KEY, model="gemini-2.5-flash")
\ No newline at end of file
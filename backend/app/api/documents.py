@@ -4,16 +4,28 @@ from fastapi import (
     File,
     HTTPException,
     BackgroundTasks,
-    Depends
+    Depends,
+    Query,
+    Request,
+    Response
 )
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 import os
+import asyncio
 import logging
+from urllib.parse import quote
 
+from backend.app.models.models import CompleteUploadRequest, ReprocessRequest, UploadSessionRequest
 from backend.app.services.document_service import DocumentService
+from backend.app.services.file_storage import ClientError, file_storage
+from backend.app.services.upload_session_service import upload_sessions
 from backend.app.utils.dependencies import get_org_id
+from backend.app.utils.sse import sse_response
+from backend.app.utils.file_serving import ContentFileResponse, etag_matches, is_not_modified, not_modified_response
+from backend.core.config import settings
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 document_service = DocumentService()
@@ -42,6 +54,64 @@ async def upload_document(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# -------------------------
+# BATCH UPLOAD (ORG SAFE)
+# -------------------------
+@router.post("/upload/batch", status_code=202)
+async def upload_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    org_id: str = Depends(get_org_id)
+):
+    """Upload many files, or ZIP archives of them, as one batch."""
+    return await document_service.upload_batch(files, background_tasks, org_id)
+
+
+@router.get("/batches/{batch_id}")
+async def get_batch_status(batch_id: str, org_id: str = Depends(get_org_id)):
+    return await document_service.get_batch_status(batch_id, org_id)
+
+
+# -------------------------
+# RESUMABLE UPLOADS (ORG SAFE)
+# -------------------------
+@router.post("/uploads", status_code=201)
+async def create_upload_session(request: UploadSessionRequest, org_id: str = Depends(get_org_id)):
+    """
+    Start a resumable upload. PUT each chunk to /uploads/{id}/chunks/{n}
+    (chunk n starts at n * chunk_size), GET /uploads/{id} to see which
+    ranges are still missing, then POST /uploads/{id}/complete.
+    """
+    return await upload_sessions.create(org_id, request.filename, request.size, request.sha256)
+
+
+@router.get("/uploads/{session_id}")
+async def get_upload_session(session_id: str, org_id: str = Depends(get_org_id)):
+    return await upload_sessions.status(session_id, org_id)
+
+
+@router.put("/uploads/{session_id}/chunks/{index}")
+async def put_upload_chunk(session_id: str, index: int, request: Request, org_id: str = Depends(get_org_id)):
+    return await upload_sessions.write_chunk(session_id, org_id, index, request.stream())
+
+
+@router.post("/uploads/{session_id}/complete")
+async def complete_upload_session(
+    session_id: str,
+    background_tasks: BackgroundTasks,
+    request: Optional[CompleteUploadRequest] = None,
+    org_id: str = Depends(get_org_id)
+):
+    sha256 = request.sha256 if request else None
+    return await document_service.complete_upload_session(session_id, sha256, background_tasks, org_id)
+
+
+@router.delete("/uploads/{session_id}")
+async def abort_upload_session(session_id: str, org_id: str = Depends(get_org_id)):
+    await upload_sessions.abort(session_id, org_id)
+    return {"success": True}
+
+
 # -------------------------
 # GET ALL DOCUMENTS (ORG SAFE)
 # -------------------------
@@ -50,6 +120,50 @@ async def get_all_documents(org_id: str = Depends(get_org_id)):
     return await document_service.get_all_documents(org_id)
 
 
+# -------------------------
+# FULL-TEXT SEARCH (ORG SAFE)
+# -------------------------
+@router.get("/search")
+async def search_documents(
+    q: str,
+    document_type: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    org_id: str = Depends(get_org_id)
+):
+    return await document_service.search_documents(
+        org_id,
+        q,
+        document_type=document_type,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+        limit=limit,
+        cursor=cursor,
+    )
+
+
+# -------------------------
+# BULK REPROCESS (ORG SAFE)
+# -------------------------
+@router.post("/reprocess", status_code=202)
+async def reprocess_documents(request: ReprocessRequest, org_id: str = Depends(get_org_id)):
+    """
+    Re-run the pipeline for the selected documents. Stages whose stored
+    result still matches their input, prompt version and model are reused;
+    `force_stages` re-runs the named stages regardless.
+    """
+    return await document_service.reprocess_documents(request, org_id)
+
+
+@router.get("/reprocess/{job_id}")
+async def get_reprocess_job(job_id: str, org_id: str = Depends(get_org_id)):
+    return document_service.get_reprocess_job(job_id, org_id)
+
+
 # -------------------------
 # GET FIELDS (ORG SAFE)
 # -------------------------
@@ -75,25 +189,121 @@ async def update_document_fields(
 # -------------------------
 # GET ORIGINAL FILE (ORG SAFE)
 # -------------------------
-@router.get("/{document_id}/file")
-async def get_document_file(document_id: str, org_id: str = Depends(get_org_id)):
-    file_path = await document_service.get_document_file_path(document_id, org_id)
-
-    if not file_path or not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Document file not found")
-
-    ext = os.path.splitext(file_path)[1].lower()
-    media_map = {
-        ".pdf": "application/pdf",
-        ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        ".txt": "text/plain",
-        ".png": "image/png",
-        ".jpg": "image/jpeg",
-        ".jpeg": "image/jpeg",
+MEDIA_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".txt": "text/plain",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+# Files never change under a document id (content addressed); still revalidated hourly
+FILE_CACHE_CONTROL = "private, max-age=3600"
+
+
+def _content_disposition(disposition: str, filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+async def _remote_file_response(request: Request, content_hash: str, headers: Dict[str, str], media_type: str):
+    """Proxy an S3 object, passing a single Range through (S3 has no multi-range)."""
+    http_range = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if http_range and ("," in http_range or (if_range and if_range != headers["ETag"])):
+        http_range = None
+    try:
+        obj = await asyncio.to_thread(file_storage.open_stream, content_hash, http_range)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "InvalidRange":
+            return Response(status_code=416)
+        raise
+
+    headers = {**headers, "Accept-Ranges": "bytes", "Content-Length": str(obj["ContentLength"])}
+    status_code = 200
+    if obj.get("ContentRange"):
+        headers["Content-Range"] = obj["ContentRange"]
+        status_code = 206
+    body = b"" if request.method == "HEAD" else obj["Body"].iter_chunks(1024 * 1024)
+    return StreamingResponse(body, status_code=status_code, media_type=media_type, headers=headers)
+
+
+@router.api_route("/{document_id}/file", methods=["GET", "HEAD"])
+async def get_document_file(
+    document_id: str,
+    request: Request,
+    disposition: str = Query("attachment", pattern="^(attachment|inline)$"),
+    org_id: str = Depends(get_org_id)
+):
+    """
+    Serve the original upload. Supports Range (single and multi-part 206),
+    a strong ETag from the content hash, If-None-Match / If-Modified-Since
+    (304) and If-Range. Use disposition=inline for in-browser viewers.
+    """
+    filename, file_path, content_hash = await document_service.get_document_file(document_id, org_id)
+    media_type = MEDIA_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+
+    if content_hash is None:
+        # Legacy path-addressed file: Starlette's own validators
+        return FileResponse(file_path, media_type=media_type, filename=filename, content_disposition_type=disposition)
+
+    etag = f'"{content_hash}"'
+    last_modified = (await asyncio.to_thread(os.stat, file_path)).st_mtime if file_path else None
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified, FILE_CACHE_CONTROL)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": FILE_CACHE_CONTROL,
+        "Content-Disposition": _content_disposition(disposition, filename),
     }
-    media_type = media_map.get(ext, "application/octet-stream")
+    if file_path is None:
+        return await _remote_file_response(request, content_hash, headers, media_type)
 
-    return FileResponse(file_path, media_type=media_type, filename=os.path.basename(file_path))
+    if settings.FILE_ACCEL_REDIRECT_PREFIX:
+        # Let the fronting nginx serve the blob with sendfile (ranges included)
+        relative = os.path.relpath(file_path, settings.STORAGE_LOCAL_ROOT).replace(os.sep, "/")
+        return Response(
+            media_type=media_type,
+            headers={**headers, "X-Accel-Redirect": settings.FILE_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative},
+        )
+
+    return ContentFileResponse(
+        file_path,
+        etag,
+        headers={"Cache-Control": FILE_CACHE_CONTROL},
+        media_type=media_type,
+        filename=filename,
+        content_disposition_type=disposition,
+    )
+
+
+# -------------------------
+# PAGE THUMBNAIL (ORG SAFE)
+# -------------------------
+# Previews are keyed by content hash, page and width, so they never change
+PREVIEW_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+@router.get("/{document_id}/thumbnail")
+async def get_document_thumbnail(
+    document_id: str,
+    request: Request,
+    page: int = Query(0, ge=0),
+    width: Optional[int] = Query(None, ge=1),
+    org_id: str = Depends(get_org_id)
+):
+    """JPEG thumbnail of one page; width snaps to the nearest configured size."""
+    path, etag = await document_service.get_document_preview(document_id, org_id, page, width)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL})
+    return FileResponse(
+        path,
+        media_type="image/jpeg",
+        headers={"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL},
+    )
 
 
 # -------------------------
@@ -124,6 +334,28 @@ async def query_document(
     return await document_service.query_document(document_id, question, org_id)
 
 
+# -------------------------
+# ASK AI, STREAMED AS SSE (ORG SAFE)
+# -------------------------
+@router.post("/{document_id}/query/stream")
+async def stream_query_document(
+    document_id: str,
+    question: Dict[str, str],
+    org_id: str = Depends(get_org_id)
+):
+    events = await document_service.stream_query_document(document_id, question, org_id)
+    return sse_response(events)
+
+
+# -------------------------
+# ON-DEMAND SUMMARY, STREAMED AS SSE (ORG SAFE)
+# -------------------------
+@router.get("/{document_id}/summary/stream")
+async def stream_document_summary(document_id: str, org_id: str = Depends(get_org_id)):
+    events = await document_service.stream_document_summary(document_id, org_id)
+    return sse_response(events)
+
+
 # -------------------------
 # DELETE DOCUMENT (ORG SAFE)
 # -------------------------
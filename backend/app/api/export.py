@@ -1,13 +1,39 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse
-import tempfile, json, os
-from backend.app.services.export_service import create_docx_from_markdown, fill_docx_template
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+import json, os
+import asyncio
+from backend.app.services.export_service import (
+    export_filled_document,
+    iter_filled_documents_zip,
+)
+from backend.app.services.docx_skeleton_cache import docx_skeleton_cache
+from backend.app.utils.placeholders import unfilled_header
+from backend.app.services.export_artifacts import export_artifacts
+from backend.app.services.template_export_service import (
+    export_cache_key,
+    render_template_export,
+    run_single_export_job,
+    run_batch_export_job,
+)
+from backend.app.services.export_jobs import (
+    ExportJob,
+    export_job_queue,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BATCH,
+)
+from backend.app.services.template_service import BATCH_FILL_MAX_ROWS
+from backend.app.models.models import ExportJobRequest
+from backend.app.services.template_service import parse_variable_sets, render_and_persist_drafts
+from backend.app.utils.dependencies import get_org_id
+from backend.app.utils.file_serving import etag_matches
 from backend.db.database import db as prisma
 
 router = APIRouter(tags=["Export"])
 
+
 @router.post("/")
 async def export_document(
+    request: Request,
     variables: str = Form(...),
     export_type: str = Form(...),
     template_id: str = Form(...),
@@ -33,68 +59,78 @@ async def export_document(
     if export_type not in ["docx", "pdf"]:
         raise HTTPException(status_code=400, detail="export_type must be 'docx' or 'pdf'")
 
-    # ✅ Get template content
-    template = None
-    
+    # ✅ Export from an uploaded DOCX template
     if file is not None:
-        # Use uploaded file
         contents = await file.read()
-        temp_in = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-        temp_in.write(contents)
-        temp_in.close()
-        template_path = temp_in.name
-        print(f"📁 Using uploaded file: {template_path}")
-        
-    elif template_id:
-        # Fetch from Prisma database
-        try:
-            template = await prisma.template.find_unique(
-                where={"id": template_id}
-            )
-        except Exception as e:
-            print(f"❌ Database error: {e}")
-            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-        
-        if not template:
-            print(f"❌ Template not found in database: {template_id}")
-            raise HTTPException(status_code=404, detail=f"Template not found: {template_id}")
-        
-        print(f"📋 Found template: {template.title}")
-        
-        # Create a temporary DOCX from the markdown content
+        uploaded_path = export_artifacts.new_path(".docx")
+        with open(uploaded_path, "wb") as f:
+            f.write(contents)
+        print(f"📁 Using uploaded file: {uploaded_path}")
+
         try:
-            # Access the bodyMd field (Prisma uses camelCase)
-            template_path = create_docx_from_markdown(
-                template.bodyMd,  # Prisma field name is camelCase
-                template.title
+            unfilled = set()
+            degraded = set()
+            output_path = await export_filled_document(
+                uploaded_path, variables_dict, export_type, unfilled=unfilled, degraded=degraded
             )
-            print(f"📁 Created temp DOCX: {template_path}")
+            print(f"✅ Document generated: {output_path}")
         except Exception as e:
-            print(f"❌ Error creating DOCX from markdown: {e}")
+            print(f"❌ Error filling template: {e}")
             import traceback
             traceback.print_exc()
-            raise HTTPException(status_code=500, detail=f"Error creating template: {str(e)}")
-    else:
+            raise HTTPException(status_code=500, detail=f"Error generating document: {str(e)}")
+        finally:
+            export_artifacts.release(uploaded_path)
+
+        # ✅ Uploaded templates are not cached - stream from scratch and delete once sent
+        return _artifact_response(output_path, None, export_type, unfilled, degraded, scratch=True)
+
+    if not template_id:
         raise HTTPException(status_code=400, detail="Either file or template_id is required")
 
-    # ✅ Fill template with variables
+    # ✅ Fetch template from Prisma database
+    try:
+        template = await prisma.template.find_unique(
+            where={"id": template_id}
+        )
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    if not template:
+        print(f"❌ Template not found in database: {template_id}")
+        raise HTTPException(status_code=404, detail=f"Template not found: {template_id}")
+    
+    print(f"📋 Found template: {template.title}")
+
+    # ✅ Revalidation for this template version + variables
+    etag = f'"{export_cache_key(template, variables_dict, export_type)}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # ✅ Fill template with variables (served from the export cache when possible)
     try:
-        output_path = fill_docx_template(template_path, variables_dict, export_type)
-        print(f"✅ Document generated: {output_path}")
+        output_path, unfilled, cached, degraded = await render_template_export(template, variables_dict, export_type)
+        print(f"✅ Document ready: {output_path}")
     except Exception as e:
         print(f"❌ Error filling template: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error generating document: {str(e)}")
 
-    # ✅ Clean up temporary template if we created one
-    if file is None and template_id:
-        try:
-            os.unlink(template_path)
-            print(f"🗑️ Cleaned up temp template: {template_path}")
-        except:
-            pass
+    if cached:
+        return _artifact_response(output_path, template, export_type, unfilled, degraded, etag=etag)
+    return _artifact_response(output_path, template, export_type, unfilled, degraded, scratch=True)
 
+
+def _degraded_headers(degraded) -> dict:
+    # A lower fidelity fallback rendered the file; clients may warn or retry
+    return {"X-Export-Degraded": ",".join(sorted(degraded))} if degraded else {}
+
+
+def _artifact_response(
+    output_path: str, template, export_type: str, unfilled, degraded=(), etag: str = None, scratch: bool = False
+):
     # ✅ Determine media type and filename
     media_type = (
         "application/vnd.openxmlformats-officedocument.wordprocessingml.document" 
@@ -109,13 +145,145 @@ async def export_document(
         filename = f"document.{export_type}"
     
     print(f"📤 Sending file: {filename}")
+
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "X-Unfilled-Placeholders": unfilled_header(sorted(unfilled)),
+        **_degraded_headers(degraded),
+    }
+    if etag:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "private, no-cache"
+
+    if scratch:
+        return export_artifacts.streaming_response(output_path, media_type, headers)
     
     # ✅ Return the file
     return FileResponse(
         output_path,
         media_type=media_type,
         filename=filename,
+        headers=headers,
+    )
+
+
+@router.post("/batch")
+async def export_batch(
+    template_id: str = Form(...),
+    export_type: str = Form(...),
+    variable_sets: str = Form(None),
+    user_query: str = Form(""),
+    file: UploadFile = File(None),
+    org_id: str = Depends(get_org_id)
+):
+    """
+    Mail-merge export: renders one document per variable set (given as a JSON
+    list or an uploaded CSV/JSONL file), stores each draft as an Instance and
+    streams back a ZIP of the filled DOCX/PDF files as they are produced.
+    """
+    if export_type not in ["docx", "pdf"]:
+        raise HTTPException(status_code=400, detail="export_type must be 'docx' or 'pdf'")
+
+    if file is not None:
+        rows = parse_variable_sets(file.filename, await file.read())
+    elif variable_sets:
+        try:
+            rows = json.loads(variable_sets)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON in variable_sets: {e}")
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise HTTPException(status_code=400, detail="variable_sets must be a JSON list of objects")
+    else:
+        raise HTTPException(status_code=400, detail="Either variable_sets or file is required")
+
+    template = await prisma.template.find_unique(
+        where={"id": template_id, "orgId": org_id}
+    )
+    if not template:
+        raise HTTPException(status_code=404, detail=f"Template not found: {template_id}")
+
+    await render_and_persist_drafts(template, rows, org_id, user_query)
+
+    try:
+        template_source = await asyncio.to_thread(docx_skeleton_cache.get, template)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating template: {str(e)}")
+
+    name_prefix = template.title.replace(' ', '_').replace('/', '_')
+    return StreamingResponse(
+        iter_filled_documents_zip(template_source, rows, export_type, name_prefix),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={name_prefix}_batch.zip"
+        }
+    )
+
+
+# ---------------------------------------------------------
+# ASYNC EXPORT JOBS (ORG SAFE)
+# ---------------------------------------------------------
+@router.post("/jobs", status_code=202)
+async def create_export_job(
+    request: ExportJobRequest,
+    org_id: str = Depends(get_org_id)
+):
+    """
+    Queue an export and return a job id immediately. Single exports run at
+    interactive priority; mail-merge batches (variable_sets) run behind them.
+    """
+    if request.export_type not in ["docx", "pdf"]:
+        raise HTTPException(status_code=400, detail="export_type must be 'docx' or 'pdf'")
+    if request.variables is None and not request.variable_sets:
+        raise HTTPException(status_code=400, detail="Either variables or variable_sets is required")
+    if request.variable_sets and len(request.variable_sets) > BATCH_FILL_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {BATCH_FILL_MAX_ROWS} variable sets.")
+
+    template = await prisma.template.find_unique(
+        where={"id": request.template_id, "orgId": org_id}
+    )
+    if not template:
+        raise HTTPException(status_code=404, detail=f"Template not found: {request.template_id}")
+
+    if request.variable_sets:
+        rows = request.variable_sets
+        job = ExportJob(org_id, "batch", PRIORITY_BATCH, total=len(rows))
+        runner = lambda j: run_batch_export_job(
+            j, template, rows, request.export_type, org_id, request.user_query
+        )
+    else:
+        variables_dict = request.variables
+        job = ExportJob(org_id, "single", PRIORITY_INTERACTIVE, total=1)
+        runner = lambda j: run_single_export_job(j, template, variables_dict, request.export_type)
+
+    await export_job_queue.submit(job, runner)
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}")
+async def get_export_job(job_id: str, org_id: str = Depends(get_org_id)):
+    job = await export_job_queue.get(job_id, org_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(job_id: str, org_id: str = Depends(get_org_id)):
+    job = await export_job_queue.get(job_id, org_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+    if not job.artifact_path or not os.path.exists(job.artifact_path):
+        raise HTTPException(status_code=410, detail="Export artifact has expired")
+
+    return FileResponse(
+        job.artifact_path,
+        media_type=job.media_type,
+        filename=job.filename,
         headers={
-            "Content-Disposition": f"attachment; filename={filename}"
+            "Content-Disposition": f"attachment; filename={job.filename}",
+            "X-Unfilled-Placeholders": unfilled_header(job.unfilled),
+            **_degraded_headers(job.degraded),
         }
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from typing import Dict, List
+
+from backend.app.services.tagging_service import get_org_dictionary, replace_org_dictionary
+from backend.app.utils.dependencies import get_org_id
+
+router = APIRouter(prefix="/tag-dictionary", tags=["tags"])
+
+
+# ---------------------------------------------------------
+# GET ORG TAG DICTIONARY (ORG SAFE)
+# ---------------------------------------------------------
+@router.get("/")
+async def get_tag_dictionary(org_id: str = Depends(get_org_id)):
+    return {"success": True, "data": await get_org_dictionary(org_id)}
+
+
+# ---------------------------------------------------------
+# REPLACE ORG TAG DICTIONARY (ORG SAFE)
+# ---------------------------------------------------------
+@router.put("/")
+async def replace_tag_dictionary(
+    dictionary: Dict[str, List[str]],
+    org_id: str = Depends(get_org_id)
+):
+    return {"success": True, "data": await replace_org_dictionary(org_id, dictionary)}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
 from typing import List
 
 from backend.app.services.template_service import (
@@ -7,10 +7,11 @@ from backend.app.services.template_service import (
     create_template_from_upload,
     save_template,
     fill_template,
+    batch_fill_template,
     get_template_by_id
 )
 from backend.app.utils.schemas import TemplateOut, TemplateIn
-from backend.app.models.models import FillTemplateRequest, DraftRequest
+from backend.app.models.models import FillTemplateRequest, DraftRequest, BatchFillRequest
 from backend.app.utils.dependencies import get_org_id
 
 router = APIRouter(tags=["templates"])
@@ -33,9 +34,10 @@ async def create_template_from_upload_endpoint(
 @router.post("/save-template/")
 async def save_template_endpoint(
     template_data: TemplateIn,
+    background_tasks: BackgroundTasks,
     org_id: str = Depends(get_org_id)
 ):
-    return await save_template(template_data, org_id)
+    return await save_template(template_data, org_id, background_tasks)
 
 
 # ---------------------------------------------------------
@@ -65,9 +67,10 @@ async def get_template_by_id_endpoint(
 @router.post("/find-templates")
 async def find_templates_endpoint(
     request: DraftRequest,
+    background_tasks: BackgroundTasks,
     org_id: str = Depends(get_org_id)
 ):
-    return await find_templates(request, org_id)
+    return await find_templates(request, org_id, background_tasks)
 
 
 # ---------------------------------------------------------
@@ -79,3 +82,14 @@ async def fill_template_endpoint(
     org_id: str = Depends(get_org_id)
 ):
     return await fill_template(request, org_id)
+
+
+# ---------------------------------------------------------
+# BATCH FILL TEMPLATE / MAIL MERGE (ORG SAFE)
+# ---------------------------------------------------------
+@router.post("/batch-fill-template")
+async def batch_fill_template_endpoint(
+    request: BatchFillRequest,
+    org_id: str = Depends(get_org_id)
+):
+    return await batch_fill_template(request, org_id)
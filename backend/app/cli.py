@@ -0,0 +1,421 @@
+"""
+Maintenance commands. Run from the repository root:
+
+    python -m backend.app.cli <command> [options]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from datetime import datetime
+
+from backend.db.database import db, connect_db, disconnect_db
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------
+# TRAIN DOCUMENT CLASSIFIER
+# ---------------------------
+async def train_classifier(args):
+    from backend.app.services.document_classifier import LocalTextClassifier
+    from backend.app.services.document_payload_service import load_payloads
+
+    # fullText may be NULL in the row when it is held compressed
+    documents = await db.document.find_many(
+        where={"status": "completed", "documentType": {"not": None}},
+    )
+    await load_payloads(documents, ("fullText",))
+    samples = [
+        (doc.fullText, doc.documentType.strip())
+        for doc in documents
+        if doc.fullText and doc.documentType and doc.documentType.strip().lower() not in ("unknown", "other", "")
+    ]
+
+    # Rare labels cannot be learned reliably; they stay with the LLM
+    counts = Counter(label for _, label in samples)
+    samples = [(text, label) for text, label in samples if counts[label] >= args.min_per_class]
+    labels = sorted({label for _, label in samples})
+    if len(labels) < 2:
+        print(f"Need at least two labels with >= {args.min_per_class} documents; found {len(labels)}.")
+        return 1
+
+    rng = random.Random(args.seed)
+    rng.shuffle(samples)
+    holdout = int(len(samples) * args.holdout)
+    test, train = samples[:holdout], samples[holdout:]
+    print(f"Training on {len(train)} documents, evaluating on {len(test)} ({len(labels)} labels)")
+
+    model = LocalTextClassifier.train(
+        [text for text, _ in train],
+        [label for _, label in train],
+        epochs=args.epochs,
+        seed=args.seed,
+    )
+    model.report = {
+        "labels": {label: counts[label] for label in labels},
+        "train_samples": len(train),
+        "holdout": model.evaluate(
+            [text for text, _ in test], [label for _, label in test], settings.DOC_CLASSIFIER_MIN_CONFIDENCE
+        ) if test else None,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    model.save(args.output)
+    print(json.dumps(model.report, indent=2))
+    print(f"Saved classifier to {args.output}")
+    return 0
+
+
+# ---------------------------
+# BULK REPROCESS / BACKFILL
+# ---------------------------
+class ReprocessCheckpoint:
+    """
+    Append-only JSON-lines log: a header with the selection, then one line
+    per finished document. Re-running with the same selection skips the
+    documents already completed; failures are retried.
+    """
+
+    def __init__(self, path: str, selection: dict, restart: bool):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path) and not restart:
+            with open(path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("selection") != selection:
+                    raise SystemExit(f"{path} was written for a different selection; pass --restart to discard it")
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from an interrupted run
+                    if entry.get("ok"):
+                        self.done.add(entry["id"])
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")
+            self._file.write(json.dumps({"selection": selection}) + "\n")
+            self._file.flush()
+
+    def record(self, doc_id: str, outcome):
+        self._file.write(json.dumps({"id": doc_id, "ok": outcome is not None, "stages": outcome}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected an ISO date, got {value!r}")
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+async def reprocess(args):
+    from backend.app.services.document_pipeline import STAGES, process_documents, select_document_ids
+
+    force = [stage for stage in (args.force or "").split(",") if stage]
+    unknown = set(force) - set(STAGES)
+    if unknown:
+        print(f"Unknown stages: {', '.join(sorted(unknown))} (expected {', '.join(STAGES)})")
+        return 1
+
+    document_ids = await select_document_ids(
+        org_id=args.org,
+        document_type=args.type,
+        status=args.status,
+        created_from=args.since,
+        created_to=args.until,
+        limit=args.limit,
+    )
+    selection = {
+        "org": args.org,
+        "type": args.type,
+        "status": args.status,
+        "since": args.since.isoformat() if args.since else None,
+        "until": args.until.isoformat() if args.until else None,
+        "limit": args.limit,
+        "force": force,
+    }
+    checkpoint = ReprocessCheckpoint(args.checkpoint, selection, args.restart)
+    pending = [doc_id for doc_id in document_ids if doc_id not in checkpoint.done]
+    print(
+        f"Selected {len(document_ids)} documents, {len(document_ids) - len(pending)} already done; "
+        f"reprocessing {len(pending)} with concurrency {args.concurrency}"
+    )
+
+    started = time.monotonic()
+    last_report = started
+    counts = Counter()
+
+    def on_result(doc_id: str, outcome):
+        nonlocal last_report
+        checkpoint.record(doc_id, outcome)
+        counts["failed" if outcome is None else "completed"] += 1
+        for stage, result in (outcome or {}).items():
+            counts[f"{stage}.{result}"] += 1
+
+        finished = counts["completed"] + counts["failed"]
+        now = time.monotonic()
+        if now - last_report >= args.report_every or finished == len(pending):
+            last_report = now
+            rate = finished / max(now - started, 1e-9)
+            eta = (len(pending) - finished) / rate if rate else 0
+            print(
+                f"{finished}/{len(pending)} done ({counts['failed']} failed) · "
+                f"{rate * 60:.1f} docs/min · ETA {_format_duration(eta)}"
+            )
+
+    try:
+        await process_documents(pending, force, args.concurrency, args.max_per_minute, on_result)
+    finally:
+        checkpoint.close()
+
+    stages = {key: value for key, value in sorted(counts.items()) if "." in key}
+    print(json.dumps({
+        "completed": counts["completed"],
+        "failed": counts["failed"],
+        "stages": stages,
+        "elapsed": _format_duration(time.monotonic() - started),
+    }, indent=2))
+    return 1 if counts["failed"] else 0
+
+
+# ---------------------------
+# TEMPLATE QUESTIONS
+# ---------------------------
+async def backfill_questions(args):
+    """Generate missing or stale questions for every template variable."""
+    from backend.app.services.template_question_service import backfill_template_questions
+
+    updated = await backfill_template_questions()
+    print(f"{updated} template variables updated")
+    return 0
+
+
+# ---------------------------
+# MIGRATE FILES INTO STORAGE
+# ---------------------------
+async def migrate_files(args):
+    """Move path-addressed uploads into content-addressed file storage."""
+    import shutil
+    from backend.app.services.file_storage import file_storage
+    from backend.app.services.blob_reference_service import store_blob
+
+    rows = await db.document.find_many(where={"contentHash": None, "filePath": {"not": None}})
+    by_path = {}
+    for doc in rows:
+        by_path.setdefault(doc.filePath, []).append(doc)
+    print(f"{len(rows)} documents reference {len(by_path)} files outside storage")
+
+    migrated = missing = deduplicated = 0
+    for path, docs in sorted(by_path.items()):
+        if not os.path.exists(path):
+            missing += 1
+            continue
+        # Copy rather than move: the original is only removed once the rows point elsewhere
+        scratch = file_storage.scratch_path()
+        await asyncio.to_thread(shutil.copyfile, path, scratch)
+        async with store_blob(scratch) as stored:
+            deduplicated += stored.deduplicated
+            for doc in docs:
+                await db.document.update(
+                    where={"id": doc.id},
+                    data={
+                        "filePath": stored.uri,
+                        "contentHash": stored.content_hash,
+                        "fileName": doc.fileName or os.path.basename(path),
+                    },
+                )
+        if args.delete_originals:
+            os.remove(path)
+        migrated += 1
+
+    print(f"Migrated {migrated} files ({deduplicated} already stored); {missing} missing on disk")
+    return 0
+
+
+# ---------------------------
+# COMPRESS LARGE PAYLOADS
+# ---------------------------
+TABLE_SIZE_SQL = """
+SELECT c.relname AS name,
+       pg_relation_size(c.oid) AS heap,
+       coalesce(pg_total_relation_size(nullif(c.reltoastrelid, 0)), 0) AS toast,
+       pg_total_relation_size(c.oid) AS total
+FROM pg_class c
+WHERE c.relname IN ('documents', 'document_payloads') AND c.relkind = 'r'
+ORDER BY c.relname
+"""
+
+UNCOMPRESSED_IDS_SQL = """
+SELECT d."id" AS id FROM "documents" d
+WHERE d."id" > $1 AND (octet_length(d."fullText") >= $2 OR octet_length(d."insights") >= $2)
+ORDER BY d."id"
+LIMIT $3
+"""
+
+
+async def _payload_report(sample_size: int) -> dict:
+    """Table/TOAST sizes plus the latency of full-row reads and of loading payloads on demand."""
+    from backend.app.services.document_payload_service import load_payloads
+
+    sizes = {row["name"]: {k: int(row[k]) for k in ("heap", "toast", "total")} for row in await db.query_raw(TABLE_SIZE_SQL)}
+    rows = await db.query_raw('SELECT "id" FROM "documents" ORDER BY "created_at" DESC LIMIT $1', sample_size)
+    sample = [row["id"] for row in rows]
+
+    started = time.perf_counter()
+    docs = await db.document.find_many(where={"id": {"in": sample}})
+    row_read = time.perf_counter() - started
+    started = time.perf_counter()
+    await load_payloads(docs)
+    payload_read = time.perf_counter() - started
+
+    return {
+        "tables": sizes,
+        "sample_documents": len(sample),
+        "row_read_ms": round(row_read * 1000, 2),
+        "payload_read_ms": round(payload_read * 1000, 2),
+    }
+
+
+def _compact_json(value):
+    try:
+        return json.dumps(json.loads(value), ensure_ascii=False)
+    except (TypeError, ValueError):
+        return value
+
+
+async def compress_payloads(args):
+    """Move large inline fullText / insights into compressed document_payloads rows."""
+    from backend.app.services.document_payload_service import update_document
+
+    if not settings.PAYLOAD_COMPRESSION_ENABLED:
+        print("PAYLOAD_COMPRESSION_ENABLED is false; nothing to do")
+        return 1
+
+    before = await _payload_report(args.sample)
+    print("Before:", json.dumps(before, indent=2))
+
+    min_bytes = settings.PAYLOAD_COMPRESSION_MIN_BYTES
+    after_id, moved, started = "", 0, time.monotonic()
+    while args.limit is None or moved < args.limit:
+        batch = args.batch_size if args.limit is None else min(args.batch_size, args.limit - moved)
+        rows = await db.query_raw(UNCOMPRESSED_IDS_SQL, after_id, min_bytes, batch)
+        if not rows:
+            break
+        after_id = rows[-1]["id"]
+        docs = await db.document.find_many(where={"id": {"in": [row["id"] for row in rows]}})
+        for doc in docs:
+            data = {}
+            if doc.fullText is not None:
+                data["fullText"] = doc.fullText
+            if doc.insights is not None:
+                # Older rows were written with indent=2
+                data["insights"] = _compact_json(doc.insights)
+            await update_document(doc.id, data)
+        moved += len(docs)
+        print(f"{moved} documents compressed · {moved / max(time.monotonic() - started, 1e-9) * 60:.0f} docs/min")
+
+    totals = await db.query_raw(
+        'SELECT "field", count(*)::int AS rows, coalesce(sum("raw_size"), 0)::bigint AS raw, '
+        'coalesce(sum("stored_size"), 0)::bigint AS stored FROM "document_payloads" GROUP BY "field" ORDER BY "field"'
+    )
+    after = await _payload_report(args.sample)
+    print("After:", json.dumps(after, indent=2))
+    print("Payloads:", json.dumps({
+        row["field"]: {
+            "rows": row["rows"],
+            "raw_bytes": int(row["raw"]),
+            "stored_bytes": int(row["stored"]),
+            "ratio": round(int(row["raw"]) / max(int(row["stored"]), 1), 2),
+        }
+        for row in totals
+    }, indent=2))
+    # Freed TOAST chunks are reused by new rows but only returned to the OS by a rewrite
+    print('Run VACUUM FULL "documents" (or pg_repack) to shrink the table files on disk.')
+    return 0
+
+
+# ---------------------------
+# ENTRY POINT
+# ---------------------------
+COMMANDS = {
+    "train-classifier": train_classifier,
+    "reprocess": reprocess,
+    "migrate-files": migrate_files,
+    "compress-payloads": compress_payloads,
+    "backfill-questions": backfill_questions,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m backend.app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train-classifier", help="Train the local document-type classifier from labelled documents")
+    train.add_argument("--output", default=settings.DOC_CLASSIFIER_PATH)
+    train.add_argument("--holdout", type=float, default=0.2, help="Fraction of documents held out for the report")
+    train.add_argument("--min-per-class", type=int, default=5)
+    train.add_argument("--epochs", type=int, default=8)
+    train.add_argument("--seed", type=int, default=13)
+
+    rerun = sub.add_parser("reprocess", help="Re-run the processing pipeline over existing documents")
+    rerun.add_argument("--org", help="Only documents of this org id")
+    rerun.add_argument("--type", help="Only documents of this document type")
+    rerun.add_argument("--status", help="Only documents with this status (e.g. failed)")
+    rerun.add_argument("--since", type=_parse_date, help="Created at or after this ISO date")
+    rerun.add_argument("--until", type=_parse_date, help="Created before this ISO date")
+    rerun.add_argument("--limit", type=int)
+    rerun.add_argument("--force", help="Comma-separated stages to re-run even if unchanged (extract,analyze,tags,chunks)")
+    rerun.add_argument("--concurrency", type=int, default=settings.REPROCESS_CONCURRENCY)
+    rerun.add_argument("--max-per-minute", type=float, default=settings.REPROCESS_MAX_PER_MINUTE,
+                       help="Cap on documents started per minute")
+    rerun.add_argument("--checkpoint", default="artifacts/reprocess_checkpoint.jsonl")
+    rerun.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    rerun.add_argument("--report-every", type=float, default=10.0, help="Seconds between progress lines")
+
+    files = sub.add_parser("migrate-files", help="Move uploads stored by filename into content-addressed storage")
+    files.add_argument("--delete-originals", action="store_true", help="Remove each original file once migrated")
+
+    payloads = sub.add_parser("compress-payloads", help="Move large fullText/insights into compressed payload rows")
+    payloads.add_argument("--batch-size", type=int, default=100)
+    payloads.add_argument("--limit", type=int)
+    payloads.add_argument("--sample", type=int, default=200, help="Documents read when measuring read latency")
+
+    sub.add_parser("backfill-questions", help="Generate missing or stale questions for template variables")
+
+    return parser
+
+
+async def _run(args) -> int:
+    await connect_db()
+    try:
+        return await COMMANDS[args.command](args) or 0
+    finally:
+        await disconnect_db()
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
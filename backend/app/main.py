@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import logging
 import sys
 import os
+import asyncio
+from contextlib import asynccontextmanager
 
 from backend.db.database import db
 from backend.db.database import lifespan
@@ -10,12 +12,47 @@ from backend.app.api.documents import router as documents_router
 from backend.app.api.templates import router as templates_router    
 from backend.app.api.export import router as export_router
 from backend.app.api.document_variables import router as document_variables_router
+from backend.app.api.tags import router as tags_router
+from backend.app.services.pdf_conversion_pool import libreoffice_pool
+from backend.app.services.export_jobs import export_job_queue
+from backend.app.services.document_pipeline import reprocess_jobs
+from backend.app.services.preview_service import preview_service
+from backend.app.services.export_artifacts import export_artifacts
+from backend.app.utils.metrics import metrics
+from backend.app.services.template_question_service import backfill_template_questions
+from backend.core.config import settings
+
+
+# With lifespan= set, FastAPI ignores @app.on_event handlers, so every
+# background service is started and stopped here.
+@asynccontextmanager
+async def app_lifespan(app):
+    """Database connection (db lifespan) plus the app's background services."""
+    async with lifespan(app):
+        export_artifacts.start()
+        backfill = None
+        if settings.QUESTION_BACKFILL_ON_STARTUP:
+            # LLM calls go through the process-wide rate limiter in BaseAgent
+            backfill = asyncio.create_task(backfill_template_questions())
+        try:
+            yield
+        finally:
+            if backfill is not None:
+                backfill.cancel()
+            # Jobs first: they hold LibreOffice workers
+            await export_job_queue.stop()
+            await reprocess_jobs.stop()
+            await libreoffice_pool.stop()
+            preview_service.stop()
+            await export_artifacts.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Intelligent Document Analysis Agent",
     description="API for AI-powered legal document review and insight generation.",
     version="0.2.0",
-    lifespan=lifespan
+    lifespan=app_lifespan
 )
 
 # Configure CORS
@@ -36,32 +73,10 @@ app.include_router(documents_router, tags=["documents"])
 app.include_router(templates_router, tags=["templates"])
 app.include_router(export_router, prefix="/export", tags=["export"])
 app.include_router(document_variables_router, tags=["Document Variables"])
+app.include_router(tags_router, tags=["tags"])
 # app.include_router(export_router, prefix="/api")
 
 
-@app.on_event("startup")
-async def startup():
-    """Connect to database on startup."""
-    try:
-        logging.info("Attempting to connect to the database...")
-        await db.connect()
-        logging.info("Database connection successful.")
-    except Exception as e:
-        logging.error("--- DATABASE CONNECTION FAILED ---")
-        logging.error("Could not connect to the database. Please check:")
-        logging.error("1. Your `DATABASE_URL` in the .env file is correct.")
-        logging.error("2. The database server is running and accessible.")
-        logging.error("3. Network/firewall is not blocking port 5432.")
-        logging.error(f"Error: {e}")
-        sys.exit(1)
-
-
-@app.on_event("shutdown")
-async def shutdown():
-    """Disconnect from database on shutdown."""
-    await db.disconnect()
-
-
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -79,4 +94,10 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "database": "connected"}
\ No newline at end of file
+    return {"status": "healthy", "database": "connected"}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Process-local counters, timings and resource usage."""
+    return metrics.snapshot()
@@ -13,6 +13,37 @@ class FillTemplateRequest(BaseModel):
     template_id: str
     variables: Dict[str, str]
 
+class BatchFillRequest(BaseModel):
+    template_id: str
+    variable_sets: List[Dict[str, str]]
+    user_query: str = ""
+
+class ExportJobRequest(BaseModel):
+    template_id: str
+    export_type: str
+    variables: Optional[Dict[str, str]] = None
+    variable_sets: Optional[List[Dict[str, str]]] = None
+    user_query: str = ""
+
+class ReprocessRequest(BaseModel):
+    document_ids: Optional[List[str]] = None
+    document_type: Optional[str] = None
+    status: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    force_stages: List[str] = []
+    limit: int = 500
+    concurrency: Optional[int] = None
+    max_per_minute: Optional[float] = None
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: int
+    sha256: Optional[str] = None
+
+class CompleteUploadRequest(BaseModel):
+    sha256: Optional[str] = None
+
 class PrefillRequest(BaseModel):
     template_id: str
     query: str
@@ -0,0 +1,52 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import AsyncIterator, Optional
+
+from backend.db.database import db
+from backend.app.services.file_storage import StoredBlob, file_sha256, file_storage
+from backend.core.config import settings
+
+# pg_advisory_xact_lock returns void, which query_raw cannot deserialize
+BLOB_LOCK_SQL = "SELECT 1 AS locked FROM pg_advisory_xact_lock(hashtext($1))"
+
+
+@asynccontextmanager
+async def blob_lock(*content_hashes: str) -> AsyncIterator[None]:
+    """
+    Serialise storing-and-referencing a blob against releasing it, across
+    every worker. put_file skips the write when a blob already exists, so
+    without this a concurrent delete could remove that blob between the
+    dedup check and the new Document row. Locks are transaction scoped and
+    taken in hash order, so several can be held without deadlocking.
+    """
+    async with db.tx(timeout=timedelta(seconds=settings.BLOB_LOCK_TIMEOUT_SECONDS)) as tx:
+        for content_hash in sorted(set(content_hashes)):
+            await tx.query_raw(BLOB_LOCK_SQL, content_hash)
+        yield
+
+
+@asynccontextmanager
+async def store_blob(path: str, content_hash: Optional[str] = None) -> AsyncIterator[StoredBlob]:
+    """
+    file_storage.put_file() under the blob lock. Create the rows that
+    reference the blob inside the block so they commit before the lock is
+    released. The staged file is removed if storing fails.
+    """
+    try:
+        content_hash = content_hash or await asyncio.to_thread(file_sha256, path)
+        async with blob_lock(content_hash):
+            yield await file_storage.put_file(path, content_hash)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def release_blob(content_hash: str) -> bool:
+    """Delete a stored blob once no document (in any org) references it; True when deleted."""
+    async with blob_lock(content_hash):
+        if await db.document.count(where={"contentHash": content_hash}) > 0:
+            return False
+        await file_storage.delete(content_hash)
+        return True
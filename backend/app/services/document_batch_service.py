@@ -0,0 +1,188 @@
+import os
+import uuid
+import asyncio
+import hashlib
+import logging
+import zipfile
+from typing import BinaryIO, Dict, List, NamedTuple, Tuple
+
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+
+from backend.db.database import db
+from backend.app.utils.metrics import metrics
+from backend.app.utils.uploads import ALLOWED_EXTENSIONS
+from backend.app.services.file_storage import file_storage
+from backend.app.services.blob_reference_service import blob_lock
+from backend.app.services.document_pipeline import process_documents
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_BYTES = 1024 * 1024
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class StagedFile(NamedTuple):
+    id: str
+    filename: str
+    path: str
+    sha256: str
+
+
+class BatchLimitError(Exception):
+    pass
+
+
+class _Stager:
+    """
+    Copies uploads (and members of uploaded ZIPs) to the storage scratch
+    area in fixed size buffers, hashing them on the way and enforcing the
+    batch file-count and byte limits as it goes.
+    """
+
+    def __init__(self, max_files: int, max_bytes: int):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.bytes_written = 0
+        self.staged: List[StagedFile] = []
+        self.skipped: List[Dict[str, str]] = []
+
+    def add(self, source: BinaryIO, filename: str):
+        name = os.path.basename(filename or "")
+        ext = os.path.splitext(name)[1].lower()
+        if ext == ".zip":
+            return self._add_zip(source, name)
+        if ext not in ALLOWED_EXTENSIONS:
+            self.skipped.append({"filename": name, "reason": "Unsupported file format"})
+            return
+        if len(self.staged) >= self.max_files:
+            raise BatchLimitError(f"Batch exceeds {self.max_files} files")
+
+        path = file_storage.scratch_path()
+        # Registered before writing so a limit hit mid-file is cleaned up too
+        self.staged.append(StagedFile(uuid.uuid4().hex, name, path, ""))
+        digest = hashlib.sha256()
+        with open(path, "wb") as out:
+            while chunk := source.read(COPY_BUFFER_BYTES):
+                self.bytes_written += len(chunk)
+                if self.bytes_written > self.max_bytes:
+                    raise BatchLimitError(f"Batch exceeds {self.max_bytes} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+        self.staged[-1] = self.staged[-1]._replace(sha256=digest.hexdigest())
+
+    def _add_zip(self, source: BinaryIO, archive_name: str):
+        # Starlette has already spooled the upload to a temporary file, so the
+        # archive is read member by member without loading it into memory.
+        try:
+            archive = zipfile.ZipFile(source)
+        except zipfile.BadZipFile:
+            self.skipped.append({"filename": archive_name, "reason": "Not a valid ZIP archive"})
+            return
+        with archive:
+            for member in archive.infolist():
+                name = os.path.basename(member.filename)
+                if member.is_dir() or not name or name.startswith(".") or "__MACOSX" in member.filename:
+                    continue
+                if os.path.splitext(name)[1].lower() == ".zip":
+                    self.skipped.append({"filename": name, "reason": "Nested archives are not unpacked"})
+                    continue
+                with archive.open(member) as entry:
+                    self.add(entry, name)
+
+    def discard(self):
+        for staged in self.staged:
+            try:
+                os.remove(staged.path)
+            except OSError:
+                pass
+
+
+def _stage_uploads(files: List[UploadFile]) -> Tuple[List[StagedFile], List[Dict[str, str]]]:
+    stager = _Stager(settings.UPLOAD_BATCH_MAX_FILES, settings.UPLOAD_BATCH_MAX_BYTES)
+    try:
+        for upload in files:
+            stager.add(upload.file, upload.filename)
+    except BaseException:
+        stager.discard()
+        raise
+    return stager.staged, stager.skipped
+
+
+async def upload_batch(files: List[UploadFile], background_tasks: BackgroundTasks, org_id: str) -> Dict:
+    """
+    Store many files (or ZIP archives of them) as one batch: files are
+    stored (deduplicated by content), inserted with a single create_many
+    using ids generated here, and processed in the background with
+    bounded concurrency.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    try:
+        staged, skipped = await asyncio.to_thread(_stage_uploads, files)
+    except BatchLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if not staged:
+        raise HTTPException(status_code=400, detail={"message": "No supported files in upload", "skipped": skipped})
+
+    # Rows are only written once every blob is stored; a blob left behind by
+    # a failed insert is unreferenced and identical uploads will reuse it.
+    # The blob locks keep a concurrent delete from releasing a deduplicated
+    # blob before the rows referencing it are committed.
+    batch_id = uuid.uuid4().hex
+    try:
+        async with blob_lock(*(f.sha256 for f in staged)):
+            blobs = [await file_storage.put_file(f.path, f.sha256) for f in staged]
+            await db.document.create_many(data=[
+                {
+                    "id": f.id,
+                    "status": "uploaded",
+                    "filePath": blob.uri,
+                    "fileName": f.filename,
+                    "contentHash": blob.content_hash,
+                    "orgId": org_id,
+                    "batchId": batch_id,
+                }
+                for f, blob in zip(staged, blobs)
+            ])
+    except BaseException:
+        for f in staged:
+            if os.path.exists(f.path):
+                os.remove(f.path)
+        raise
+
+    metrics.increment("upload_batches")
+    metrics.increment("upload_batch_files", len(staged))
+
+    background_tasks.add_task(
+        process_documents, [f.id for f in staged], concurrency=settings.UPLOAD_PROCESS_CONCURRENCY
+    )
+
+    return {
+        "batch_id": batch_id,
+        "documents": [{"document_id": f.id, "filename": f.filename} for f in staged],
+        "skipped": skipped,
+    }
+
+
+async def get_batch_status(batch_id: str, org_id: str) -> Dict:
+    """Aggregate status counts for a batch from one GROUP BY on (batch_id, status)."""
+    rows = await db.document.group_by(
+        ["status"],
+        where={"batchId": batch_id, "orgId": org_id},
+        count=True,
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    counts = {row["status"]: row["_count"]["_all"] for row in rows}
+    total = sum(counts.values())
+    finished = sum(counts.get(status, 0) for status in TERMINAL_STATUSES)
+    return {
+        "batch_id": batch_id,
+        "total": total,
+        "counts": counts,
+        "progress": round(finished / total, 4),
+        "done": finished == total,
+    }
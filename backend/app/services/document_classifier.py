@@ -0,0 +1,245 @@
+import gzip
+import json
+import math
+import time
+import zlib
+import random
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from backend.app.utils.metrics import metrics
+from backend.app.utils.text_retrieval import tokenize
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = "prelexa.hashing-logreg"
+ARTIFACT_VERSION = 1
+
+
+class LocalTextClassifier:
+    """
+    Multinomial logistic regression over hashed unigram + bigram features.
+    Only the head of each document is featurised, which is where titles,
+    parties and recitals live and keeps prediction to a few milliseconds.
+    """
+
+    def __init__(self, labels: Sequence[str], n_features: int = 1 << 18, max_chars: int = 3000):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.max_chars = max_chars
+        # feature index -> per-class weights; rows for unseen features are absent
+        self.weights: Dict[int, List[float]] = {}
+        self.bias: List[float] = [0.0] * len(self.labels)
+        self.report: Dict = {}
+
+    # ---------------------------
+    # FEATURES
+    # ---------------------------
+    def featurize(self, text: str) -> Dict[int, float]:
+        tokens = tokenize(text[:self.max_chars])
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        counts = Counter(zlib.crc32(g.encode()) % self.n_features for g in grams)
+        # Sublinear tf, L2 normalised
+        features = {idx: 1.0 + math.log(count) for idx, count in counts.items()}
+        norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+        return {idx: v / norm for idx, v in features.items()}
+
+    # ---------------------------
+    # INFERENCE
+    # ---------------------------
+    def _logits(self, features: Dict[int, float]) -> List[float]:
+        logits = list(self.bias)
+        n_classes = len(logits)
+        for idx, v in features.items():
+            row = self.weights.get(idx)
+            if row is not None:
+                for c in range(n_classes):
+                    logits[c] += row[c] * v
+        return logits
+
+    @staticmethod
+    def _softmax(logits: List[float]) -> List[float]:
+        top = max(logits)
+        exps = [math.exp(l - top) for l in logits]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        probs = self._softmax(self._logits(self.featurize(text)))
+        return dict(zip(self.labels, probs))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        probs = self._softmax(self._logits(self.featurize(text)))
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.labels[best], probs[best]
+
+    # ---------------------------
+    # TRAINING
+    # ---------------------------
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        epochs: int = 6,
+        learning_rate: float = 4.0,
+        seed: int = 13,
+        prune_below: float = 1e-3,
+        **kwargs,
+    ) -> "LocalTextClassifier":
+        """Fit with SGD on the softmax cross-entropy loss (inputs are L2 normalised)."""
+        model = cls(sorted(set(labels)), **kwargs)
+        index = {label: c for c, label in enumerate(model.labels)}
+        n_classes = len(model.labels)
+        samples = [(model.featurize(text), index[label]) for text, label in zip(texts, labels)]
+
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            rate = learning_rate / (1 + 0.5 * epoch)
+            for features, target in samples:
+                probs = cls._softmax(model._logits(features))
+                probs[target] -= 1.0
+                if max(abs(g) for g in probs) < 1e-3:
+                    continue  # already confidently right
+                step = [rate * g for g in probs]
+                for idx, v in features.items():
+                    row = model.weights.get(idx)
+                    if row is None:
+                        row = model.weights[idx] = [0.0] * n_classes
+                    for c in range(n_classes):
+                        row[c] -= step[c] * v
+                for c in range(n_classes):
+                    model.bias[c] -= step[c]
+
+        # Drop rows that barely move any logit to keep the artifact small
+        model.weights = {
+            idx: row for idx, row in model.weights.items()
+            if max(abs(w) for w in row) >= prune_below
+        }
+        return model
+
+    def evaluate(self, texts: Sequence[str], labels: Sequence[str], min_confidence: float) -> Dict:
+        """Accuracy overall and on the confident subset, plus per-document latency."""
+        latencies = []
+        correct = confident = confident_correct = 0
+        for text, label in zip(texts, labels):
+            started = time.perf_counter()
+            predicted, confidence = self.predict(text)
+            latencies.append(time.perf_counter() - started)
+            correct += predicted == label
+            if confidence >= min_confidence:
+                confident += 1
+                confident_correct += predicted == label
+
+        latencies.sort()
+        total = len(labels) or 1
+
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6, 1) if latencies else 0.0
+
+        return {
+            "samples": len(labels),
+            "accuracy": round(correct / total, 4),
+            "min_confidence": min_confidence,
+            "coverage": round(confident / total, 4),
+            "confident_accuracy": round(confident_correct / confident, 4) if confident else None,
+            "latency_us_p50": percentile(0.5),
+            "latency_us_p99": percentile(0.99),
+        }
+
+    # ---------------------------
+    # ARTIFACT
+    # ---------------------------
+    def save(self, path: str):
+        artifact = {
+            "format": ARTIFACT_FORMAT,
+            "version": ARTIFACT_VERSION,
+            "trained_at": datetime.now(timezone.utc).isoformat(),
+            "n_features": self.n_features,
+            "max_chars": self.max_chars,
+            "labels": self.labels,
+            "bias": self.bias,
+            "weights": {str(idx): [round(w, 5) for w in row] for idx, row in self.weights.items()},
+            "report": self.report,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(artifact, f)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalTextClassifier":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            artifact = json.load(f)
+        if artifact.get("format") != ARTIFACT_FORMAT or artifact.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported classifier artifact: {artifact.get('format')} v{artifact.get('version')}")
+
+        model = cls(artifact["labels"], n_features=artifact["n_features"], max_chars=artifact["max_chars"])
+        model.bias = artifact["bias"]
+        model.weights = {int(idx): row for idx, row in artifact["weights"].items()}
+        model.report = artifact.get("report", {})
+        return model
+
+
+# ---------------------------
+# SHARED INSTANCE
+# ---------------------------
+_classifier: Optional[LocalTextClassifier] = None
+_load_attempted = False
+
+
+def get_document_classifier() -> Optional[LocalTextClassifier]:
+    """Load the trained artifact once; None when no model has been trained yet."""
+    global _classifier, _load_attempted
+    if not _load_attempted:
+        _load_attempted = True
+        try:
+            _classifier = LocalTextClassifier.load(settings.DOC_CLASSIFIER_PATH)
+            logger.info(f"Loaded document classifier with {len(_classifier.labels)} labels")
+        except FileNotFoundError:
+            logger.info("No local document classifier artifact; all documents go to the LLM")
+        except Exception as e:
+            logger.error(f"Failed to load document classifier: {e}")
+    return _classifier
+
+
+# Domains the routing classifier_agent chooses between
+DOCUMENT_DOMAINS = ("Banking", "Legal", "Other")
+
+
+def document_domain(label: str) -> Optional[str]:
+    """
+    The routing domain for a local type label: the label itself when the
+    model was trained on domains, else the DOC_CLASSIFIER_DOMAINS mapping.
+    None when the label does not map to a domain.
+    """
+    key = label.strip().lower()
+    for domain in DOCUMENT_DOMAINS:
+        if key == domain.lower():
+            return domain
+    domain = settings.DOC_CLASSIFIER_DOMAINS.get(key)
+    return domain if domain in DOCUMENT_DOMAINS else None
+
+
+def classify_document_type(text: str) -> Optional[Tuple[str, float]]:
+    """
+    Local document type. Returns (label, confidence) when the model is
+    confident enough for its label to be used as is, otherwise None and the
+    LLM names the type. The analysis call still runs either way for the
+    title and fields; a local label only drops its classification step.
+    """
+    model = get_document_classifier()
+    if model is None:
+        return None
+
+    started = time.perf_counter()
+    label, confidence = model.predict(text)
+    metrics.observe("classifier.local_seconds", time.perf_counter() - started)
+
+    if confidence >= settings.DOC_CLASSIFIER_MIN_CONFIDENCE:
+        metrics.increment("classifier.local_labels")
+        return label, confidence
+    metrics.increment("classifier.llm_labels")
+    return None
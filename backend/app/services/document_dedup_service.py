@@ -0,0 +1,162 @@
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from backend.db.database import db
+from backend.app.agent.document_agent import extract_changed_fields
+from backend.app.utils.metrics import metrics
+from backend.app.services.document_payload_service import load_payload
+from backend.app.utils.minhash import (
+    decode_signature,
+    encode_signature,
+    estimate_similarity,
+    lsh_buckets,
+    minhash_signature,
+)
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def compute_signature(text: str) -> List[int]:
+    return minhash_signature(text, settings.MINHASH_SLOTS, settings.MINHASH_SHINGLE_SIZE)
+
+
+# ---------------------------
+# LSH INDEX
+# ---------------------------
+async def index_signature(doc_id: str, org_id: str, signature: List[int]):
+    """Store the signature and its LSH band buckets for an analysed document."""
+    await db.document.update(where={"id": doc_id}, data={"minhash": encode_signature(signature)})
+    await db.documentlshband.delete_many(where={"documentId": doc_id})
+    await db.documentlshband.create_many(data=[
+        {"orgId": org_id, "documentId": doc_id, "band": band, "bucket": bucket}
+        for band, bucket in enumerate(lsh_buckets(signature, settings.MINHASH_BANDS))
+    ])
+
+
+async def find_near_duplicate(doc_id: str, org_id: str, signature: List[int]) -> Optional[Tuple[object, float]]:
+    """
+    Return (document, estimated similarity) for the most similar analysed
+    document in the org at or above the configured threshold.
+    """
+    buckets = lsh_buckets(signature, settings.MINHASH_BANDS)
+    hits = await db.documentlshband.find_many(
+        where={
+            "orgId": org_id,
+            "documentId": {"not": doc_id},
+            "OR": [{"band": band, "bucket": bucket} for band, bucket in enumerate(buckets)],
+        },
+    )
+    candidate_ids = list({hit.documentId for hit in hits})
+    if not candidate_ids:
+        return None
+
+    candidates = await db.document.find_many(
+        where={"id": {"in": candidate_ids}, "orgId": org_id, "status": "completed"},
+    )
+    best = None
+    for candidate in candidates:
+        similarity = estimate_similarity(signature, decode_signature(candidate.minhash))
+        if similarity >= settings.DEDUP_SIMILARITY_THRESHOLD and (best is None or similarity > best[1]):
+            best = (candidate, similarity)
+    return best
+
+
+# ---------------------------
+# ANALYSIS REUSE
+# ---------------------------
+def changed_passages(text: str, source_text: str) -> str:
+    """Lines of the new document that do not appear in the analysed copy."""
+    source_lines = {line.strip() for line in (source_text or "").splitlines() if line.strip()}
+    return "\n".join(
+        line.strip() for line in text.splitlines()
+        if line.strip() and line.strip() not in source_lines
+    )
+
+
+# Shorter values ("No", "5", "USD") match almost any text and are always re-extracted
+MIN_REUSED_VALUE_CHARS = 4
+
+
+def _occurrences(value: str, text: str) -> int:
+    """Whole-token occurrences of value in text (not substrings of longer words/numbers)."""
+    return len(re.findall(rf"(?<!\w){re.escape(value)}(?!\w)", text or ""))
+
+
+def value_still_present(value: str, text: str, source_text: str) -> bool:
+    """
+    Whether a field value from the analysed copy can be kept for the new
+    text: long enough to be meaningful, present as a whole token, and
+    occurring as often as in the source, so a value that moved to a
+    different role (e.g. an old date kept in a history line) is refreshed.
+    """
+    value = value.strip()
+    if len(value) < MIN_REUSED_VALUE_CHARS:
+        return False
+    count = _occurrences(value, text)
+    return count > 0 and count == _occurrences(value, source_text)
+
+
+async def reuse_analysis(text: str, source, similarity: float) -> Dict:
+    """
+    Build an analysis for a near-duplicate from its source document: the
+    type and field schema are reused, field values still present in the
+    new text (see value_still_present) are kept, and only the rest are
+    re-extracted from the differing passages with a small LLM call
+    (skipped when nothing changed). Values that are merely ambiguous keep
+    their old value when the delta call does not return a new one;
+    values that vanished from the text are cleared.
+    """
+    insights = json.loads(await load_payload(source, "insights") or "{}")
+    source_fields = await db.documentvariable.find_many(where={"documentId": source.id})
+    source_text = await load_payload(source, "fullText") or ""
+
+    fields = []
+    stale = []
+    missing = set()
+    for var in source_fields:
+        field = {
+            "name": var.name,
+            "value": var.value or "",
+            "confidence": var.confidence,
+            "editable": var.editable,
+        }
+        if var.value and not value_still_present(var.value, text, source_text):
+            stale.append(field)
+            if _occurrences(var.value.strip(), text) == 0:
+                missing.add(var.name)
+        fields.append(field)
+
+    metrics.increment("dedup.matches")
+
+    delta = changed_passages(text, source_text) if stale else None
+    if delta:
+        metrics.increment("dedup.delta_llm_calls")
+    else:
+        metrics.increment("dedup.llm_calls_saved")
+
+    if stale:
+        refreshed = {}
+        if delta:
+            refreshed = await extract_changed_fields(delta, [{"name": f["name"]} for f in stale])
+        for field in stale:
+            value = refreshed.get(field["name"])
+            if value not in (None, ""):
+                field["value"] = str(value)
+                field["confidence"] = None
+            elif field["name"] in missing:
+                field["value"] = ""
+                field["confidence"] = None
+
+    return {
+        "title": insights.get("title", "Untitled Document"),
+        "document_type": source.documentType or insights.get("document_type", "unknown"),
+        "fields": fields,
+        "reused_from": {
+            "document_id": source.id,
+            "similarity": round(similarity, 4),
+            "refreshed_fields": [f["name"] for f in stale],
+        },
+    }
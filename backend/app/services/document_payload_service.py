@@ -0,0 +1,147 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from prisma.fields import Base64
+
+from backend.db.database import db
+from backend.app.utils.compression import available_codec, compress, decompress, decompress_prefix
+from backend.app.utils.metrics import metrics
+from backend.core.config import settings
+
+# Large Document columns that can live compressed in document_payloads
+PAYLOAD_FIELDS = ("fullText", "insights")
+# Decompressing more than this is moved off the event loop
+THREAD_THRESHOLD_BYTES = 256 * 1024
+
+
+def _should_compress(value: Optional[str]) -> bool:
+    if not settings.PAYLOAD_COMPRESSION_ENABLED or value is None:
+        return False
+    # UTF-8 is never shorter than the character count; only encode when that cannot decide
+    if len(value) >= settings.PAYLOAD_COMPRESSION_MIN_BYTES:
+        return True
+    return len(value.encode("utf-8")) >= settings.PAYLOAD_COMPRESSION_MIN_BYTES
+
+
+def encode_payload(value: str) -> Dict:
+    """Compressed row data for one payload (without documentId / field)."""
+    raw = value.encode("utf-8")
+    codec = available_codec(settings.PAYLOAD_COMPRESSION_CODEC)
+    data = compress(raw, codec)
+    return {
+        "codec": codec,
+        "data": Base64.encode(data),
+        "rawSize": len(raw),
+        "storedSize": len(data),
+    }
+
+
+def decode_payload(row) -> str:
+    return decompress(row.data.decode(), row.codec).decode("utf-8")
+
+
+async def _encode(value: str) -> Dict:
+    if len(value) > THREAD_THRESHOLD_BYTES:
+        return await asyncio.to_thread(encode_payload, value)
+    return encode_payload(value)
+
+
+async def update_document(doc_id: str, data: Dict):
+    """
+    db.document.update() for data that may include fullText / insights.
+    Values at or above PAYLOAD_COMPRESSION_MIN_BYTES are written
+    compressed to document_payloads and the column is cleared; smaller
+    ones stay inline and any older payload row is dropped. The inline
+    column wins when both exist, so the order of writes here never
+    exposes a half-written value.
+    """
+    data = dict(data)
+    inline: List[str] = []
+    for field in PAYLOAD_FIELDS:
+        if field not in data:
+            continue
+        value = data[field]
+        if not _should_compress(value):
+            inline.append(field)
+            continue
+
+        payload = await _encode(value)
+        await db.documentpayload.upsert(
+            where={"documentId_field": {"documentId": doc_id, "field": field}},
+            data={
+                "create": {"documentId": doc_id, "field": field, **payload},
+                "update": payload,
+            },
+        )
+        data[field] = None
+        metrics.increment("payloads.written")
+        metrics.increment("payloads.raw_bytes", payload["rawSize"])
+        metrics.increment("payloads.stored_bytes", payload["storedSize"])
+
+    doc = await db.document.update(where={"id": doc_id}, data=data)
+    if inline:
+        await db.documentpayload.delete_many(where={"documentId": doc_id, "field": {"in": inline}})
+    return doc
+
+
+async def load_payloads(docs: Sequence, fields: Iterable[str] = PAYLOAD_FIELDS) -> Sequence:
+    """
+    Fill compressed fields back into Document models in place (one query
+    for all of them). Only fields whose column is empty are looked up.
+    """
+    fields = [f for f in fields if f in PAYLOAD_FIELDS]
+    wanted = {doc.id for doc in docs if any(getattr(doc, f) is None for f in fields)}
+    if not wanted:
+        return docs
+
+    rows = await db.documentpayload.find_many(
+        where={"documentId": {"in": list(wanted)}, "field": {"in": fields}}
+    )
+    if not rows:
+        return docs
+
+    by_doc: Dict[str, Dict[str, object]] = {}
+    for row in rows:
+        by_doc.setdefault(row.documentId, {})[row.field] = row
+
+    def decode_all() -> Dict[str, Dict[str, str]]:
+        return {
+            doc_id: {field: decode_payload(row) for field, row in payloads.items()}
+            for doc_id, payloads in by_doc.items()
+        }
+
+    stored = sum(row.storedSize for row in rows)
+    decoded = await asyncio.to_thread(decode_all) if stored > THREAD_THRESHOLD_BYTES else decode_all()
+
+    for doc in docs:
+        for field, value in decoded.get(doc.id, {}).items():
+            if getattr(doc, field) is None:
+                setattr(doc, field, value)
+
+    metrics.increment("payloads.read", len(rows))
+    metrics.increment("payloads.read_bytes", stored)
+    return docs
+
+
+async def load_payload(doc, field: str) -> Optional[str]:
+    """A single (possibly compressed) field of one document."""
+    await load_payloads([doc], (field,))
+    return getattr(doc, field)
+
+
+async def load_prefixes(doc_ids: List[str], field: str, max_chars: int) -> Dict[str, str]:
+    """
+    The first `max_chars` of a compressed field for several documents,
+    inflating only that much of each payload (for search snippets).
+    """
+    rows = await db.documentpayload.find_many(where={"documentId": {"in": doc_ids}, "field": field})
+
+    def decode_all() -> Dict[str, str]:
+        # UTF-8 is at most 4 bytes per character; a split trailing character is dropped
+        return {
+            row.documentId: decompress_prefix(row.data.decode(), row.codec, max_chars * 4)
+            .decode("utf-8", errors="ignore")[:max_chars]
+            for row in rows
+        }
+
+    return await asyncio.to_thread(decode_all) if rows else {}
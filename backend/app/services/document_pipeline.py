@@ -0,0 +1,444 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from backend.db.database import db
+from backend.app.agent.document_agent import (
+    DOCUMENT_ANALYZER_PROMPT,
+    TYPED_DOCUMENT_ANALYZER_PROMPT,
+    analyze_document_text,
+    document_agent,
+)
+from backend.app.utils.document_text_extract import extract_text_from_file
+from backend.app.utils.metrics import metrics
+from backend.app.utils.rate_limit import RateLimiter
+from backend.app.services.document_variable_service import DocumentVariableService
+from backend.app.services.document_classifier import classify_document_type
+from backend.app.services.tagging_service import tagger_registry
+from backend.app.services.document_dedup_service import (
+    compute_signature,
+    find_near_duplicate,
+    index_signature,
+    reuse_analysis,
+)
+from backend.app.services.file_storage import file_sha256, file_storage
+from backend.app.services.preview_service import preview_service
+from backend.app.services.document_payload_service import load_payload, update_document
+from backend.app.services.document_search_service import refresh_search_vector, utc_timestamp
+from backend.app.services.document_qa_service import index_document_chunks
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when text extraction changes in a way that should re-extract old files
+EXTRACT_VERSION = "1"
+
+STAGES = ("extract", "analyze", "tags", "chunks")
+
+
+def _hash(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class StageKey:
+    """What a stage result depends on: its input, the prompt/code version and the model."""
+
+    __slots__ = ("input_hash", "version", "model")
+
+    def __init__(self, input_hash: str, version: str, model: str = ""):
+        self.input_hash = input_hash
+        self.version = version
+        self.model = model
+
+
+# ---------------------------
+# STAGE RESULT STORE
+# ---------------------------
+async def load_stage_results(doc_id: str) -> Dict[str, object]:
+    rows = await db.documentstageresult.find_many(where={"documentId": doc_id})
+    return {row.stage: row for row in rows}
+
+
+def _is_current(row, key: StageKey) -> bool:
+    return (
+        row is not None
+        and row.inputHash == key.input_hash
+        and row.version == key.version
+        and row.model == key.model
+    )
+
+
+async def save_stage_result(doc_id: str, stage: str, key: StageKey, output):
+    data = {
+        "inputHash": key.input_hash,
+        "version": key.version,
+        "model": key.model,
+        "output": json.dumps(output),
+    }
+    await db.documentstageresult.upsert(
+        where={"documentId_stage": {"documentId": doc_id, "stage": stage}},
+        data={
+            "create": {"documentId": doc_id, "stage": stage, **data},
+            "update": data,
+        },
+    )
+
+
+# ---------------------------
+# PIPELINE
+# ---------------------------
+class DocumentPipeline:
+    """
+    Upload processing split into stages whose results are stored with the
+    key they were computed from. A stage only runs again when its input,
+    version (prompt/code fingerprint) or model changed, or when forced;
+    downstream stages see the new input hash and follow automatically.
+    """
+
+    def analyze_key(self, text_hash: str) -> StageKey:
+        version = _hash(DOCUMENT_ANALYZER_PROMPT, TYPED_DOCUMENT_ANALYZER_PROMPT)[:16]
+        return StageKey(text_hash, version, document_agent.model)
+
+    def tags_key(self, text_hash: str, tagger) -> StageKey:
+        return StageKey(text_hash, tagger.fingerprint, "aho-corasick")
+
+    def chunks_key(self, text_hash: str) -> StageKey:
+        return StageKey(text_hash, f"{settings.QA_CHUNK_CHARS}:{settings.QA_CHUNK_OVERLAP}")
+
+    async def process(self, doc_id: str, file_path: Optional[str] = None, force: Iterable[str] = ()) -> Optional[Dict[str, str]]:
+        """
+        Run (or re-run) the pipeline for one document. Returns
+        {stage: "ran" | "reused"}, or None when the document failed.
+        """
+        force = set(force)
+        outcome: Dict[str, str] = {}
+        try:
+            doc = await db.document.update(where={"id": doc_id}, data={"status": "processing"})
+            file_path = file_path or doc.filePath
+            stored = await load_stage_results(doc_id)
+
+            # --- extract ---
+            text = await self._extract(doc, file_path, stored, force, outcome)
+            if not text or not text.strip():
+                await db.document.update(where={"id": doc_id}, data={"status": "failed"})
+                return None
+
+            # --- analyze ---
+            signature = None
+            duplicate = None
+            analysis = None
+            text_hash = _hash(text)
+            key = self.analyze_key(text_hash)
+            if "analyze" not in force and _is_current(stored.get("analyze"), key):
+                analysis = json.loads(stored["analyze"].output)
+                outcome["analyze"] = "reused"
+            else:
+                signature, duplicate = await self._find_near_duplicate(doc_id, doc.orgId, text)
+                if duplicate:
+                    source, similarity = duplicate
+                    logger.info(f"[{doc_id}] Near-duplicate of {source.id} ({similarity:.2f}); reusing its analysis")
+                    analysis = await reuse_analysis(text, source, similarity)
+                else:
+                    local_type = await asyncio.to_thread(classify_document_type, text)
+                    analysis = await analyze_document_text(text, local_type[0] if local_type else None)
+
+                if "error" in analysis:
+                    await db.document.update(where={"id": doc_id}, data={"status": "failed"})
+                    return None
+                await save_stage_result(doc_id, "analyze", key, analysis)
+                outcome["analyze"] = "ran"
+
+            # --- tags ---
+            tagger = await tagger_registry.get(doc.orgId)
+            key = self.tags_key(text_hash, tagger)
+            if "tags" not in force and _is_current(stored.get("tags"), key):
+                tag_report = json.loads(stored["tags"].output)
+                outcome["tags"] = "reused"
+            else:
+                tag_report = await asyncio.to_thread(tagger.tag, text)
+                await save_stage_result(doc_id, "tags", key, tag_report)
+                outcome["tags"] = "ran"
+            analysis["insight_tags"] = tag_report["tags"]
+            analysis["tag_matches"] = tag_report["matches"]
+
+            update = {
+                "status": "completed",
+                "fullText": text,
+                "documentType": analysis.get("document_type", "Unknown"),
+                "metadata": json.dumps({"title": analysis.get("title", "Untitled")}),
+                "insights": json.dumps(analysis),
+            }
+            if outcome["analyze"] == "ran":
+                update["duplicateOfId"] = duplicate[0].id if duplicate else None
+            await update_document(doc_id, update)
+
+            # --- chunks ---
+            key = self.chunks_key(text_hash)
+            if "chunks" not in force and _is_current(stored.get("chunks"), key):
+                outcome["chunks"] = "reused"
+            else:
+                try:
+                    chunks = await index_document_chunks(doc_id, text)
+                    await save_stage_result(doc_id, "chunks", key, {"count": len(chunks)})
+                    outcome["chunks"] = "ran"
+                except Exception as e:
+                    # Q&A re-indexes lazily on first question
+                    logger.warning(f"[{doc_id}] Chunk indexing failed: {e}")
+
+            # Fields are only replaced when the analysis itself changed, so
+            # edits made to an unchanged analysis survive reprocessing.
+            if outcome["analyze"] == "ran":
+                await db.documentvariable.delete_many(where={"documentId": doc_id})
+                fields = analysis.get("fields", [])
+                if fields:
+                    await DocumentVariableService.bulk_create_variables(
+                        doc_id,
+                        [
+                            {
+                                "name": f["name"],
+                                "value": str(f.get("value", "")),
+                                "confidence": f.get("confidence", 1.0),
+                                "editable": f.get("editable", True),
+                            }
+                            for f in fields
+                        ],
+                    )
+
+            await self._refresh_search_vector(doc_id, text)
+
+            if signature:
+                try:
+                    await index_signature(doc_id, doc.orgId, signature)
+                except Exception as e:
+                    logger.warning(f"[{doc_id}] MinHash indexing failed: {e}")
+
+            if doc.contentHash and settings.PREVIEW_ON_PROCESS:
+                await preview_service.warm(doc.contentHash, os.path.splitext(doc.fileName or "")[1])
+
+            for stage, result in outcome.items():
+                metrics.increment(f"pipeline.stage_{result}.{stage}")
+            return outcome
+
+        except Exception as e:
+            logger.error(f"[{doc_id}] Processing failed: {e}", exc_info=True)
+            await db.document.update(where={"id": doc_id}, data={"status": "failed"})
+            return None
+
+    async def _extract(self, doc, file_path: Optional[str], stored: Dict, force: Set[str], outcome: Dict) -> str:
+        await load_payload(doc, "fullText")
+        if doc.contentHash:
+            # Content-addressed blobs: the hash is the extraction input, no re-read needed
+            key = StageKey(doc.contentHash, EXTRACT_VERSION)
+            if "extract" not in force and doc.fullText and _is_current(stored.get("extract"), key):
+                outcome["extract"] = "reused"
+                return doc.fullText
+            extension = os.path.splitext(doc.fileName or "")[1]
+            async with file_storage.local_copy(doc.contentHash) as path:
+                text = await extract_text_from_file(path, extension)
+        else:
+            # Legacy rows that still point at a file by path
+            if not file_path or (doc.fullText and not os.path.exists(file_path)):
+                outcome["extract"] = "reused"
+                return doc.fullText or ""
+            key = StageKey(await asyncio.to_thread(file_sha256, file_path), EXTRACT_VERSION)
+            if "extract" not in force and doc.fullText and _is_current(stored.get("extract"), key):
+                outcome["extract"] = "reused"
+                return doc.fullText
+            text = await extract_text_from_file(file_path)
+
+        await save_stage_result(doc.id, "extract", key, {"chars": len(text or "")})
+        outcome["extract"] = "ran"
+        return text
+
+    async def _find_near_duplicate(self, doc_id: str, org_id: str, text: str):
+        """Return (signature, (source doc, similarity) or None); never fails processing."""
+        if not settings.DEDUP_ENABLED:
+            return None, None
+        try:
+            signature = await asyncio.to_thread(compute_signature, text)
+            metrics.increment("dedup.checks")
+            return signature, await find_near_duplicate(doc_id, org_id, signature)
+        except Exception as e:
+            logger.warning(f"[{doc_id}] Near-duplicate lookup failed: {e}")
+            return None, None
+
+    async def _refresh_search_vector(self, doc_id: str, text: str):
+        try:
+            await refresh_search_vector(doc_id, text)
+        except Exception as e:
+            logger.warning(f"[{doc_id}] Search index refresh failed: {e}")
+
+
+document_pipeline = DocumentPipeline()
+
+
+# ---------------------------
+# BULK REPROCESSING
+# ---------------------------
+async def select_document_ids(
+    org_id: Optional[str] = None,
+    document_ids: Optional[List[str]] = None,
+    document_type: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """
+    Ids of documents to reprocess, oldest first. Only ids are read so a
+    selection over the whole table does not pull every fullText. Documents
+    currently processing are left alone.
+    """
+    params: List = []
+    filters: List[str] = ['d."status" <> \'processing\'']
+
+    def param(value) -> str:
+        params.append(value)
+        return f"${len(params)}"
+
+    if org_id:
+        filters.append(f'd."orgId" = {param(org_id)}')
+    if document_ids:
+        filters.append(f'd."id" IN ({", ".join(param(doc_id) for doc_id in document_ids)})')
+    if document_type:
+        filters.append(f'd."document_type" = {param(document_type)}')
+    if status:
+        filters.append(f'd."status" = {param(status)}')
+    if created_from:
+        filters.append(f'd."created_at" >= {param(utc_timestamp(created_from))}::timestamp')
+    if created_to:
+        filters.append(f'd."created_at" < {param(utc_timestamp(created_to))}::timestamp')
+    limit_sql = f" LIMIT {param(limit)}" if limit else ""
+
+    sql = f'SELECT d."id" AS id FROM "documents" d WHERE {" AND ".join(filters)} ORDER BY d."created_at", d."id"{limit_sql}'
+    rows = await db.query_raw(sql, *params)
+    return [row["id"] for row in rows]
+
+
+class ReprocessJob:
+    """Progress of one bulk reprocess, as reported by GET /documents/reprocess/{id}."""
+
+    def __init__(self, org_id: str, document_ids: List[str], force: List[str], concurrency: int, max_per_minute: Optional[float]):
+        self.id = uuid.uuid4().hex
+        self.org_id = org_id
+        self.document_ids = document_ids
+        self.force = force
+        self.concurrency = concurrency
+        self.max_per_minute = max_per_minute
+        self.status = "queued"
+        self.completed = 0
+        self.failed = 0
+        self.stage_counts: Dict[str, Dict[str, int]] = {}
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def record(self, outcome: Dict[str, str]):
+        for stage, result in outcome.items():
+            counts = self.stage_counts.setdefault(stage, {})
+            counts[result] = counts.get(result, 0) + 1
+
+    def to_dict(self) -> Dict:
+        elapsed = (self.finished_at or time.time()) - self.created_at
+        done = self.completed + self.failed
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "force": self.force,
+            "progress": {"completed": self.completed, "failed": self.failed, "total": len(self.document_ids)},
+            "stages": self.stage_counts,
+            "throughput_per_minute": round(done / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        }
+
+
+async def process_documents(
+    document_ids: List[str],
+    force: Iterable[str] = (),
+    concurrency: int = 4,
+    max_per_minute: Optional[float] = None,
+    on_result=None,
+):
+    """
+    Run documents through the pipeline with `concurrency` workers and at
+    most `max_per_minute` starts. on_result(doc_id, outcome | None) is
+    called after each document (None when it failed).
+    """
+    limiter = RateLimiter(max_per_minute)
+    force = list(force)
+    # Workers share one iterator, so a million-document backfill holds
+    # `concurrency` tasks rather than one per document.
+    queue = iter(document_ids)
+
+    async def worker():
+        for doc_id in queue:
+            await limiter.wait()
+            outcome = await document_pipeline.process(doc_id, force=force)
+            if on_result:
+                on_result(doc_id, outcome)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(document_ids))))))
+
+
+class ReprocessJobRegistry:
+    """In-process registry of bulk reprocess jobs, kept for `retention_seconds` after finishing."""
+
+    def __init__(self, retention_seconds: int):
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, ReprocessJob] = {}
+
+    def submit(self, job: ReprocessJob) -> ReprocessJob:
+        self._expire()
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str, org_id: str) -> Optional[ReprocessJob]:
+        self._expire()
+        job = self._jobs.get(job_id)
+        if not job or job.org_id != org_id:
+            return None
+        return job
+
+    async def _run(self, job: ReprocessJob):
+        job.status = "running"
+
+        def on_result(doc_id: str, outcome: Optional[Dict[str, str]]):
+            if outcome is None:
+                job.failed += 1
+            else:
+                job.completed += 1
+                job.record(outcome)
+
+        try:
+            await process_documents(job.document_ids, job.force, job.concurrency, job.max_per_minute, on_result)
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Reprocess job {job.id} failed: {e}", exc_info=True)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def _expire(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+    async def stop(self):
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+reprocess_jobs = ReprocessJobRegistry(retention_seconds=settings.REPROCESS_JOB_RETENTION_SECONDS)
@@ -0,0 +1,138 @@
+import time
+import logging
+from typing import AsyncIterator, Dict, List, Tuple
+
+from cachetools import LRUCache
+
+from backend.db.database import db
+from backend.app.agent.law import qa_agent, summarizer_agent
+from backend.app.utils.metrics import metrics
+from backend.app.utils.sse import sse_event
+from backend.app.utils.text_retrieval import BM25Index, TextChunk, chunk_text
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_INSERT_BATCH = 500
+
+QA_INSTRUCTIONS = (
+    "The context contains numbered excerpts from the document. Answer using only those excerpts "
+    "and cite the excerpts you relied on by number, e.g. [2]."
+)
+
+# Ranked chunk indexes keyed by (document id, updatedAt)
+_indexes = LRUCache(maxsize=128)
+
+
+# ---------------------------
+# INDEXING
+# ---------------------------
+async def index_document_chunks(doc_id: str, text: str) -> List[TextChunk]:
+    """(Re)build the chunk table for a document from its full text."""
+    chunks = chunk_text(text, settings.QA_CHUNK_CHARS, settings.QA_CHUNK_OVERLAP)
+    await db.documentchunk.delete_many(where={"documentId": doc_id})
+    rows = [
+        {
+            "documentId": doc_id,
+            "position": chunk.position,
+            "startOffset": chunk.start,
+            "endOffset": chunk.end,
+            "text": chunk.text,
+        }
+        for chunk in chunks
+    ]
+    for start in range(0, len(rows), CHUNK_INSERT_BATCH):
+        await db.documentchunk.create_many(data=rows[start:start + CHUNK_INSERT_BATCH])
+    return chunks
+
+
+async def _load_index(doc) -> Tuple[List[TextChunk], BM25Index]:
+    cache_key = (doc.id, doc.updatedAt)
+    cached = _indexes.get(cache_key)
+    if cached:
+        return cached
+
+    records = await db.documentchunk.find_many(
+        where={"documentId": doc.id},
+        order={"position": "asc"},
+    )
+    if records:
+        chunks = [TextChunk(r.position, r.startOffset, r.endOffset, r.text) for r in records]
+    else:
+        # Documents processed before chunking existed are indexed on first use
+        chunks = await index_document_chunks(doc.id, doc.fullText or "")
+
+    entry = (chunks, BM25Index([chunk.text for chunk in chunks]))
+    _indexes[cache_key] = entry
+    return entry
+
+
+# ---------------------------
+# QUESTION ANSWERING
+# ---------------------------
+async def _retrieve(doc, question: str, top_k: int = None) -> Tuple[str, List[Dict]]:
+    """Rank the document's chunks and build the numbered context + citations."""
+    top_k = top_k or settings.QA_TOP_K
+
+    started = time.perf_counter()
+    chunks, index = await _load_index(doc)
+    ranked = index.top_k(question, top_k)
+    if not ranked:
+        # No lexical overlap at all: fall back to the opening of the document
+        ranked = [(idx, 0.0) for idx in range(min(top_k, len(chunks)))]
+    metrics.observe("qa.retrieval_seconds", time.perf_counter() - started)
+
+    selected = [(chunks[idx], score) for idx, score in ranked]
+    context = "\n\n".join(
+        f"[{number}] {chunk.text}" for number, (chunk, _) in enumerate(selected, start=1)
+    )
+    metrics.increment("qa.requests")
+    metrics.increment("qa.context_chars", len(context))
+    metrics.increment("qa.full_text_chars", len(doc.fullText or ""))
+
+    citations = [
+        {
+            "ref": number,
+            "position": chunk.position,
+            "start": chunk.start,
+            "end": chunk.end,
+            "score": round(score, 4),
+        }
+        for number, (chunk, score) in enumerate(selected, start=1)
+    ]
+    return context, citations
+
+
+def _qa_input(question: str) -> str:
+    return f"{QA_INSTRUCTIONS}\n\nQuestion: {question}"
+
+
+async def answer_question(doc, question: str, top_k: int = None) -> Dict:
+    """
+    Answer a question from the top-k BM25 chunks of the document instead of
+    its full text. Citations carry the chunk offsets into fullText.
+    """
+    context, citations = await _retrieve(doc, question, top_k)
+
+    started = time.perf_counter()
+    answer = await qa_agent.process(_qa_input(question), context=context)
+    metrics.observe("qa.llm_seconds", time.perf_counter() - started)
+
+    return {"question": question, "answer": answer, "citations": citations}
+
+
+async def stream_answer(doc, question: str, top_k: int = None) -> AsyncIterator[str]:
+    """SSE events: citations first, then answer tokens as they arrive, then done."""
+    context, citations = await _retrieve(doc, question, top_k)
+    yield sse_event("citations", citations)
+
+    async for text in qa_agent.stream(_qa_input(question), context=context):
+        yield sse_event("token", {"text": text})
+    yield sse_event("done", {})
+
+
+async def stream_summary(doc) -> AsyncIterator[str]:
+    """SSE events for an on-demand summary of the document's full text."""
+    async for text in summarizer_agent.stream(doc.fullText):
+        yield sse_event("token", {"text": text})
+    yield sse_event("done", {})
@@ -0,0 +1,180 @@
+import json
+import base64
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from backend.db.database import db
+from backend.app.services.document_payload_service import load_prefixes
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "english"
+MAX_PAGE_SIZE = 100
+# tsvector values are capped at 1MB; very long filings are indexed up to this many characters
+INDEXED_TEXT_CHARS = 500_000
+# ts_headline re-parses the text it is given, so snippets only look at the head of the document
+SNIPPET_TEXT_CHARS = 50_000
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=12, FragmentDelimiter= … "
+
+# Title metadata and type (A) and extracted variables (B) outrank body text (C)
+REFRESH_SEARCH_VECTOR_SQL = f"""
+UPDATE "documents" d
+SET "search_vector" =
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(d."metadata", '') || ' ' || coalesce(d."document_type", '')), 'A')
+    || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce((
+        SELECT string_agg(v."name" || ' ' || coalesce(v."value", ''), ' ')
+        FROM "document_variables" v
+        WHERE v."document_id" = d."id"
+    ), '')), 'B')
+    || setweight(to_tsvector('{SEARCH_CONFIG}', left(coalesce($2::text, d."fullText", ''), {INDEXED_TEXT_CHARS})), 'C')
+WHERE d."id" = $1
+"""
+
+# Snippets for documents whose text is held compressed in document_payloads:
+# the text heads are sent back as one JSON array and highlighted in one query
+PAYLOAD_HEADLINE_SQL = f"""
+SELECT t.ord::int AS ord, ts_headline('{SEARCH_CONFIG}', t.text, websearch_to_tsquery('{SEARCH_CONFIG}', $2), '{HEADLINE_OPTIONS}') AS snippet
+FROM json_array_elements_text($1::json) WITH ORDINALITY AS t(text, ord)
+"""
+
+
+def utc_timestamp(value: datetime) -> str:
+    """
+    A datetime as a `timestamp` literal in UTC, the zone created_at is
+    stored in. Aware values are converted; naive ones are taken as UTC.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _encode_cursor(rank: float, doc_id: str) -> str:
+    raw = json.dumps({"r": rank, "id": doc_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        return {"r": float(data["r"]), "id": str(data["id"])}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _title(metadata: Optional[str]) -> Optional[str]:
+    try:
+        return json.loads(metadata or "{}").get("title")
+    except (ValueError, AttributeError):
+        return None
+
+
+async def refresh_search_vector(doc_id: str, full_text: Optional[str] = None):
+    """
+    Recompute a document's search vector from its text, title and
+    variables. Pass the text when it is held compressed (the column is NULL).
+    """
+    await db.execute_raw(REFRESH_SEARCH_VECTOR_SQL, doc_id, full_text)
+
+
+async def _payload_snippets(doc_ids: List[str], query: str) -> Dict[str, str]:
+    heads = await load_prefixes(doc_ids, "fullText", SNIPPET_TEXT_CHARS)
+    if not heads:
+        return {}
+    ids = list(heads)
+    rows = await db.query_raw(PAYLOAD_HEADLINE_SQL, json.dumps([heads[doc_id] for doc_id in ids]), query)
+    return {ids[row["ord"] - 1]: row["snippet"] for row in rows}
+
+
+async def search_documents(
+    org_id: str,
+    query: str,
+    document_type: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Dict:
+    """
+    Ranked full-text search over an org's documents. Pages are keyset
+    paginated on (rank, id), so each page picks up where the previous one
+    stopped. Every match is still ranked on each request; snippets are only
+    built for the rows on the returned page.
+    """
+    query = (query or "").strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Search query is required")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    params: List = [org_id, query]
+    filters: List[str] = []
+
+    def param(value) -> str:
+        params.append(value)
+        return f"${len(params)}"
+
+    if document_type:
+        filters.append(f'd."document_type" = {param(document_type)}')
+    if status:
+        filters.append(f'd."status" = {param(status)}')
+    if created_from:
+        filters.append(f'd."created_at" >= {param(utc_timestamp(created_from))}::timestamp')
+    if created_to:
+        filters.append(f'd."created_at" < {param(utc_timestamp(created_to))}::timestamp')
+
+    cursor_filter = ""
+    if cursor:
+        position = _decode_cursor(cursor)
+        cursor_filter = f"WHERE (rank, id) < ({param(position['r'])}::real, {param(position['id'])})"
+
+    # Fetch one extra row to know whether another page exists
+    limit_param = param(limit + 1)
+    where_extra = "".join(f" AND {f}" for f in filters)
+
+    sql = f"""
+WITH q AS (SELECT websearch_to_tsquery('{SEARCH_CONFIG}', $2) AS query),
+ranked AS (
+    SELECT d."id" AS id, ts_rank_cd(d."search_vector", q.query) AS rank
+    FROM "documents" d, q
+    WHERE d."orgId" = $1 AND d."search_vector" @@ q.query{where_extra}
+),
+page AS (
+    SELECT id, rank FROM ranked
+    {cursor_filter}
+    ORDER BY rank DESC, id DESC
+    LIMIT {limit_param}
+)
+SELECT
+    p.id, p.rank,
+    d."status", d."document_type" AS "documentType", d."metadata", d."created_at" AS "createdAt",
+    d."fullText" IS NULL AS "textInPayload",
+    ts_headline('{SEARCH_CONFIG}', left(coalesce(d."fullText", ''), {SNIPPET_TEXT_CHARS}), q.query, '{HEADLINE_OPTIONS}') AS snippet
+FROM page p
+JOIN "documents" d ON d."id" = p.id, q
+ORDER BY p.rank DESC, p.id DESC
+"""
+    rows = await db.query_raw(sql, *params)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    compressed = [row["id"] for row in rows if row.get("textInPayload")]
+    snippets = await _payload_snippets(compressed, query) if compressed else {}
+    results = [
+        {
+            "id": row["id"],
+            "title": _title(row.get("metadata")),
+            "documentType": row.get("documentType"),
+            "status": row.get("status"),
+            "createdAt": row.get("createdAt"),
+            "rank": row["rank"],
+            "snippet": snippets.get(row["id"], row.get("snippet")),
+        }
+        for row in rows
+    ]
+    next_cursor = _encode_cursor(rows[-1]["rank"], rows[-1]["id"]) if has_more and rows else None
+
+    return {"query": query, "results": results, "next_cursor": next_cursor}
@@ -1,13 +1,33 @@
 import os
+import asyncio
 import json
 import logging
+from typing import List, Optional
 from fastapi import UploadFile, BackgroundTasks, HTTPException
 
 from backend.db.database import db
-from backend.app.agent.document_agent import analyze_document_text
-from backend.app.utils.uploads import UPLOAD_DIR
-from backend.app.utils.document_text_extract import extract_text_from_file
-from backend.app.services.document_variable_service import DocumentVariableService
+from backend.app.utils.uploads import ALLOWED_EXTENSIONS
+from backend.core.config import settings
+from backend.app.models.models import ReprocessRequest
+from backend.app.services.document_pipeline import (
+    STAGES,
+    ReprocessJob,
+    document_pipeline,
+    reprocess_jobs,
+    select_document_ids,
+)
+from backend.app.services.document_batch_service import get_batch_status, upload_batch
+from backend.app.services.file_storage import file_storage
+from backend.app.services.blob_reference_service import release_blob, store_blob
+from backend.app.services.preview_service import PreviewUnavailable, preview_service
+from backend.app.services.upload_session_service import upload_sessions
+from backend.app.services.document_payload_service import load_payload, load_payloads
+from backend.app.services.document_search_service import refresh_search_vector, search_documents
+from backend.app.services.document_qa_service import (
+    answer_question,
+    stream_answer,
+    stream_summary,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -52,88 +72,126 @@ class DocumentService:
             raise HTTPException(status_code=400, detail="No file provided")
 
         ext = os.path.splitext(file.filename)[1].lower()
-        if ext not in [".pdf", ".docx", ".txt", ".png", ".jpg", ".jpeg"]:
+        if ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail="Unsupported file format")
 
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
+        path, content_hash = await file_storage.stage_stream(file.file)
+        async with store_blob(path, content_hash) as stored:
+            doc = await db.document.create(
+                data={
+                    "status": "uploaded",
+                    "filePath": stored.uri,
+                    "fileName": os.path.basename(file.filename),
+                    "contentHash": stored.content_hash,
+                    "orgId": org_id,
+                }
+            )
 
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+        background_tasks.add_task(self._process_document_background, doc.id)
 
-        doc = await db.document.create(
-            data={
-                "status": "uploaded",
-                "filePath": file_path,
-                "orgId": org_id,
-            }
-        )
+        return {"message": "Document uploaded successfully", "document_id": doc.id}
 
-        background_tasks.add_task(
-            self._process_document_background, doc.id, file_path, ext
-        )
+    # ---------------------------
+    # BATCH UPLOAD — ORG SAFE
+    # ---------------------------
+    async def upload_batch(self, files: List[UploadFile], background_tasks: BackgroundTasks, org_id: str):
+        return await upload_batch(files, background_tasks, org_id)
+
+    async def get_batch_status(self, batch_id: str, org_id: str):
+        return await get_batch_status(batch_id, org_id)
+
+    # ---------------------------
+    # RESUMABLE UPLOAD — ORG SAFE
+    # ---------------------------
+    async def complete_upload_session(
+        self, session_id: str, sha256: Optional[str], background_tasks: BackgroundTasks, org_id: str
+    ):
+        async def create_document(upload):
+            return await db.document.create(
+                data={
+                    "status": "uploaded",
+                    "filePath": upload["uri"],
+                    "fileName": upload["filename"],
+                    "contentHash": upload["content_hash"],
+                    "orgId": org_id,
+                }
+            )
 
+        doc = await upload_sessions.finalize(session_id, org_id, sha256, create_document)
+        background_tasks.add_task(self._process_document_background, doc.id)
         return {"message": "Document uploaded successfully", "document_id": doc.id}
 
     # ---------------------------
     # BACKGROUND AI PROCESS
     # ---------------------------
-    async def _process_document_background(self, doc_id: str, file_path: str, ext: str):
+    async def _process_document_background(self, doc_id: str):
+        await document_pipeline.process(doc_id)
+
+    async def _refresh_search_vector(self, doc):
         try:
-            await db.document.update(
-                where={"id": doc_id},
-                data={"status": "processing"}
-            )
+            await refresh_search_vector(doc.id, await self.load_full_text(doc))
+        except Exception as e:
+            logger.warning(f"[{doc.id}] Search index refresh failed: {e}")
 
-            text = await extract_text_from_file(file_path)
-            if not text.strip():
-                await db.document.update(
-                    where={"id": doc_id},
-                    data={"status": "failed"}
-                )
-                return
-
-            analysis = await analyze_document_text(text)
-
-            if "error" in analysis:
-                await db.document.update(
-                    where={"id": doc_id},
-                    data={"status": "failed"}
-                )
-                return
-
-            await db.document.update(
-                where={"id": doc_id},
-                data={
-                    "status": "completed",
-                    "fullText": text,
-                    "documentType": analysis.get("document_type", "Unknown"),
-                    "metadata": json.dumps({"title": analysis.get("title", "Untitled")}),
-                    "insights": json.dumps(analysis),
-                },
-            )
+    # ---------------------------
+    # COMPRESSED PAYLOADS
+    # ---------------------------
+    # Large fullText / insights values live compressed in document_payloads
+    # with the column left NULL; these fill them in on the loaded model.
+    async def load_full_text(self, doc) -> Optional[str]:
+        return await load_payload(doc, "fullText")
+
+    async def load_insights(self, doc) -> Optional[str]:
+        return await load_payload(doc, "insights")
+
+    # ---------------------------
+    # BULK REPROCESS — ORG SAFE
+    # ---------------------------
+    async def reprocess_documents(self, request: ReprocessRequest, org_id: str):
+        unknown = set(request.force_stages) - set(STAGES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown stages: {', '.join(sorted(unknown))}")
+
+        document_ids = await select_document_ids(
+            org_id,
+            document_ids=request.document_ids,
+            document_type=request.document_type,
+            status=request.status,
+            created_from=request.created_from,
+            created_to=request.created_to,
+            limit=max(1, min(request.limit, 5000)),
+        )
+        if not document_ids:
+            raise HTTPException(status_code=404, detail="No documents match the selection")
+
+        # Callers may slow a job down, never speed it past the configured caps
+        concurrency = max(1, min(request.concurrency or settings.REPROCESS_CONCURRENCY, settings.REPROCESS_MAX_CONCURRENCY))
+        max_per_minute = settings.REPROCESS_MAX_PER_MINUTE
+        if request.max_per_minute and request.max_per_minute > 0:
+            max_per_minute = min(request.max_per_minute, max_per_minute or request.max_per_minute)
+
+        job = ReprocessJob(
+            org_id,
+            document_ids,
+            request.force_stages,
+            concurrency=concurrency,
+            max_per_minute=max_per_minute,
+        )
+        return reprocess_jobs.submit(job).to_dict()
 
-            fields = analysis.get("fields", [])
-            if fields:
-                await DocumentVariableService.bulk_create_variables(
-                    doc_id,
-                    [
-                        {
-                            "name": f["name"],
-                            "value": str(f.get("value", "")),
-                            "confidence": f.get("confidence", 1.0),
-                            "editable": f.get("editable", True),
-                        }
-                        for f in fields
-                    ],
-                )
+    def get_reprocess_job(self, job_id: str, org_id: str):
+        job = reprocess_jobs.get(job_id, org_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Reprocess job not found")
+        return job.to_dict()
 
+    async def _release_blob(self, content_hash: str):
+        """Remove a stored file once no document (in any org) references it."""
+        try:
+            if await release_blob(content_hash):
+                await asyncio.to_thread(preview_service.evict, content_hash)
         except Exception as e:
-            logger.error(f"[{doc_id}] Processing failed: {e}", exc_info=True)
-            await db.document.update(
-                where={"id": doc_id},
-                data={"status": "failed"}
-            )
+            logger.warning(f"Failed to delete blob {content_hash}: {e}")
 
     # ---------------------------
     # GET ALL DOCUMENTS — ORG SAFE
@@ -143,13 +201,26 @@ class DocumentService:
             where={"orgId": org_id},
             order={"createdAt": "desc"},
         )
+        # Full text is too large for a listing; only insights are decompressed
+        await load_payloads(docs, ("insights",))
 
         # FIX: convert JSON strings → real JSON for UI
+        data = []
+        for doc in docs:
+            item = serialize_document(doc)
+            item.pop("fullText", None)
+            data.append(item)
         return {
             "success": True,
-            "data": [serialize_document(doc) for doc in docs]
+            "data": data
         }
 
+    # ---------------------------
+    # FULL-TEXT SEARCH — ORG SAFE
+    # ---------------------------
+    async def search_documents(self, org_id: str, query: str, **filters):
+        return await search_documents(org_id, query, **filters)
+
     # ---------------------------
     # GET FIELDS — ORG SAFE
     # ---------------------------
@@ -176,17 +247,50 @@ class DocumentService:
                 where={"documentId": doc_id, "name": key},
                 data={"value": value},
             )
+        await self._refresh_search_vector(doc)
         return {"success": True, "message": "Fields updated successfully"}
 
     # ---------------------------
     # GET FILE — ORG SAFE
     # ---------------------------
-    async def get_document_file_path(self, doc_id: str, org_id: str):
+    async def get_document_file(self, doc_id: str, org_id: str):
+        """
+        Returns (filename, local path or None, content hash or None). A None
+        path with a hash means the blob lives in remote storage.
+        """
         doc = await db.document.find_unique(where={"id": doc_id})
         if not doc or doc.orgId != org_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
 
-        return doc.filePath
+        if doc.contentHash:
+            path = file_storage.local_path(doc.contentHash)
+            if path is not None and not os.path.exists(path):
+                raise HTTPException(status_code=404, detail="Document file not found")
+            return doc.fileName or doc.contentHash, path, doc.contentHash
+
+        if not doc.filePath or not os.path.exists(doc.filePath):
+            raise HTTPException(status_code=404, detail="Document file not found")
+        return doc.fileName or os.path.basename(doc.filePath), doc.filePath, None
+
+    # ---------------------------
+    # PAGE PREVIEW — ORG SAFE
+    # ---------------------------
+    async def get_document_preview(self, doc_id: str, org_id: str, page: int, width: Optional[int]):
+        """Returns (jpeg path, strong etag) for a page thumbnail."""
+        doc = await db.document.find_unique(where={"id": doc_id})
+        if not doc or doc.orgId != org_id:
+            raise HTTPException(status_code=403, detail="Unauthorized")
+        if not doc.contentHash:
+            raise HTTPException(status_code=404, detail="No preview for files uploaded before content storage")
+
+        width = preview_service.fit_width(width)
+        try:
+            path = await preview_service.get_preview(
+                doc.contentHash, os.path.splitext(doc.fileName or "")[1], page, width
+            )
+        except PreviewUnavailable as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return path, f'"{doc.contentHash}-p{page}-w{width}"'
 
     # ---------------------------
     # STATUS — ORG SAFE
@@ -206,17 +310,40 @@ class DocumentService:
         if not doc or doc.orgId != org_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
 
-        return json.loads(doc.insights or "{}")
+        return json.loads(await self.load_insights(doc) or "{}")
 
     # ---------------------------
     # QUERY — ORG SAFE
     # ---------------------------
-    async def query_document(self, doc_id: str, question: dict, org_id: str):
+    async def _get_queryable_document(self, doc_id: str, org_id: str):
         doc = await db.document.find_unique(where={"id": doc_id})
         if not doc or doc.orgId != org_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
 
-        return await analyze_document_text(doc.fullText, question.get("question"))
+        if not await self.load_full_text(doc):
+            raise HTTPException(status_code=409, detail="Document has not finished processing")
+        return doc
+
+    @staticmethod
+    def _question_text(question: dict) -> str:
+        text = (question.get("question") or "").strip()
+        if not text:
+            raise HTTPException(status_code=400, detail="Question is required")
+        return text
+
+    async def query_document(self, doc_id: str, question: dict, org_id: str):
+        doc = await self._get_queryable_document(doc_id, org_id)
+        return await answer_question(doc, self._question_text(question))
+
+    # Streaming variants validate up front so errors still map to HTTP
+    # statuses, then hand back an SSE event generator.
+    async def stream_query_document(self, doc_id: str, question: dict, org_id: str):
+        doc = await self._get_queryable_document(doc_id, org_id)
+        return stream_answer(doc, self._question_text(question))
+
+    async def stream_document_summary(self, doc_id: str, org_id: str):
+        doc = await self._get_queryable_document(doc_id, org_id)
+        return stream_summary(doc)
 
     # ---------------------------
     # DELETE — ORG SAFE
@@ -226,10 +353,12 @@ class DocumentService:
         if not doc or doc.orgId != org_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
 
-        if doc.filePath and os.path.exists(doc.filePath):
-            os.remove(doc.filePath)
-
         await db.documentvariable.delete_many(where={"documentId": doc_id})
         await db.document.delete(where={"id": doc_id})
 
+        if doc.contentHash:
+            await self._release_blob(doc.contentHash)
+        elif doc.filePath and os.path.exists(doc.filePath):
+            os.remove(doc.filePath)
+
         return {"success": True, "message": "Document deleted successfully"}
@@ -5,8 +5,8 @@ import json
 import logging
 from prisma import Prisma
 
-UPLOAD_DIR = "uploaded_document_types"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+from backend.app.services.file_storage import file_storage
+from backend.app.services.blob_reference_service import store_blob
 
 class DocumentTypeService:
     """Service for managing document types and related uploads."""
@@ -90,18 +90,17 @@ class DocumentTypeService:
         if file_extension not in [".pdf", ".docx", ".txt"]:
             raise HTTPException(status_code=400, detail="Unsupported file type")
 
-        file_path = os.path.join(UPLOAD_DIR, f"{doc_type_id}_{file.filename}")
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
-
-        new_doc = await self.db.document.create(
-            data={
-                "documentTypeId": doc_type_id,
-                "filename": file.filename,
-                "status": "uploaded",
-                "filePath": file_path,
-            }
-        )
+        path, content_hash = await file_storage.stage_stream(file.file)
+        async with store_blob(path, content_hash) as stored:
+            new_doc = await self.db.document.create(
+                data={
+                    "documentTypeId": doc_type_id,
+                    "fileName": os.path.basename(file.filename),
+                    "status": "uploaded",
+                    "filePath": stored.uri,
+                    "contentHash": stored.content_hash,
+                }
+            )
 
         return {"message": "Document uploaded successfully", "document": new_doc}
 
@@ -0,0 +1,104 @@
+import os
+import logging
+import threading
+from typing import Optional
+from cachetools import LRUCache
+
+from backend.core.config import settings
+from backend.app.services.export_service import render_docx_skeleton
+
+logger = logging.getLogger(__name__)
+
+
+class DocxSkeletonCache:
+    """
+    Two-tier cache (memory LRU + disk) of the unfilled DOCX rendered from a
+    template's markdown body. Entries are keyed by template id and updatedAt,
+    so editing a template naturally misses and replaces the old skeleton.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 64):
+        self.cache_dir = cache_dir
+        self._memory = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # ---------------------------
+    # KEYS / PATHS
+    # ---------------------------
+    @staticmethod
+    def _version(template) -> str:
+        return str(int(template.updatedAt.timestamp() * 1000))
+
+    def _disk_path(self, template_id: str, version: str) -> str:
+        return os.path.join(self.cache_dir, f"{template_id}-{version}.docx")
+
+    # ---------------------------
+    # LOOKUP
+    # ---------------------------
+    def get(self, template) -> bytes:
+        """Return skeleton DOCX bytes for a template, rendering on miss."""
+        version = self._version(template)
+        key = (template.id, version)
+
+        with self._lock:
+            data = self._memory.get(key)
+        if data is not None:
+            return data
+
+        data = self._read_disk(template.id, version)
+        if data is None:
+            data = render_docx_skeleton(template.bodyMd, template.title)
+            self._write_disk(template.id, version, data)
+
+        with self._lock:
+            self._memory[key] = data
+        return data
+
+    # ---------------------------
+    # DISK TIER
+    # ---------------------------
+    def _read_disk(self, template_id: str, version: str) -> Optional[bytes]:
+        path = self._disk_path(template_id, version)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read skeleton cache {path}: {e}")
+            return None
+
+    def _write_disk(self, template_id: str, version: str, data: bytes):
+        path = self._disk_path(template_id, version)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self._remove_disk_versions(template_id)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write skeleton cache {path}: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def _remove_disk_versions(self, template_id: str):
+        prefix = f"{template_id}-"
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.startswith(prefix) and name.endswith(".docx"):
+                try:
+                    os.unlink(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+docx_skeleton_cache = DocxSkeletonCache(
+    settings.DOCX_SKELETON_CACHE_DIR,
+    max_entries=settings.DOCX_SKELETON_CACHE_SIZE,
+)
@@ -0,0 +1,184 @@
+import os
+import uuid
+import shutil
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Dict, Optional
+
+import aiofiles
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from backend.core.config import settings
+from backend.app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 256 * 1024
+# The quota scan lists the whole scratch dir; a background task runs it this often
+RECLAIM_INTERVAL_SECONDS = 10
+
+
+class ExportArtifactManager:
+    """
+    Owns every intermediate and output file produced by exports. Files live
+    in one scratch directory, are deleted once their response has been sent,
+    and the directory is held under a disk quota by reclaiming the least
+    recently used files that no request is still using. The quota is
+    enforced by a background task (start()/stop() from the app lifespan)
+    that scans in a worker thread, never from path allocation.
+    """
+
+    def __init__(self, scratch_dir: str, quota_bytes: int):
+        self.scratch_dir = os.path.abspath(scratch_dir)
+        self.quota_bytes = quota_bytes
+        self._active = set()
+        self._lock = threading.Lock()
+        self._reclaimed_files = 0
+        self._reclaimed_bytes = 0
+        self._reclaimer: Optional[asyncio.Task] = None
+        os.makedirs(self.scratch_dir, exist_ok=True)
+
+    # ---------------------------
+    # ALLOCATION / RELEASE
+    # ---------------------------
+    def new_path(self, suffix: str = "") -> str:
+        """Reserve a fresh scratch file path (the file itself is not created)."""
+        path = os.path.join(self.scratch_dir, f"{uuid.uuid4().hex}{suffix}")
+        with self._lock:
+            self._active.add(path)
+        return path
+
+    def release(self, *paths: Optional[str]):
+        """Delete scratch files; paths outside the scratch dir are ignored."""
+        for path in paths:
+            if not path:
+                continue
+            with self._lock:
+                self._active.discard(path)
+            if os.path.dirname(os.path.abspath(path)) != self.scratch_dir:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def adopt_copy(self, source: str, suffix: str = "") -> str:
+        """
+        A scratch-owned copy of a file kept elsewhere (e.g. the export cache),
+        hard linked when possible, so evicting the original cannot remove it.
+        """
+        path = self.new_path(suffix)
+        try:
+            os.link(source, path)
+        except OSError:
+            shutil.copyfile(source, path)
+        return path
+
+    def detach(self, path: str):
+        """Forget a path that has been moved out of the scratch dir."""
+        with self._lock:
+            self._active.discard(path)
+
+    # ---------------------------
+    # QUOTA
+    # ---------------------------
+    def _scan(self):
+        entries = []
+        with os.scandir(self.scratch_dir) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                except OSError:
+                    continue
+        return entries
+
+    def start(self):
+        if self._reclaimer is None:
+            self._reclaimer = asyncio.create_task(self._reclaim_loop())
+
+    async def stop(self):
+        if self._reclaimer is not None:
+            self._reclaimer.cancel()
+            try:
+                await self._reclaimer
+            except asyncio.CancelledError:
+                pass
+            self._reclaimer = None
+
+    async def _reclaim_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._reclaim)
+            except Exception as e:
+                logger.error(f"Export scratch reclaim failed: {e}")
+            await asyncio.sleep(RECLAIM_INTERVAL_SECONDS)
+
+    def _reclaim(self):
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.quota_bytes:
+            return
+
+        entries.sort()
+        with self._lock:
+            active = set(self._active)
+        for _, size, path in entries:
+            if total <= self.quota_bytes:
+                break
+            if path in active:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self._reclaimed_files += 1
+                self._reclaimed_bytes += size
+
+        if total > self.quota_bytes:
+            logger.warning(f"Export scratch over quota ({total} > {self.quota_bytes} bytes) with all files in use")
+
+    def usage(self) -> Dict:
+        entries = self._scan()
+        with self._lock:
+            active = len(self._active)
+            reclaimed_files, reclaimed_bytes = self._reclaimed_files, self._reclaimed_bytes
+        return {
+            "files": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "quota_bytes": self.quota_bytes,
+            "active_files": active,
+            "reclaimed_files": reclaimed_files,
+            "reclaimed_bytes": reclaimed_bytes,
+        }
+
+    # ---------------------------
+    # STREAMING
+    # ---------------------------
+    async def iter_file(self, path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        async with aiofiles.open(path, "rb") as f:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+
+    def streaming_response(self, path: str, media_type: str, headers: Optional[Dict] = None) -> StreamingResponse:
+        """Stream a scratch artifact in chunks and delete it once sent."""
+        headers = dict(headers or {})
+        headers["Content-Length"] = str(os.path.getsize(path))
+        return StreamingResponse(
+            self.iter_file(path),
+            media_type=media_type,
+            headers=headers,
+            background=BackgroundTask(self.release, path),
+        )
+
+
+export_artifacts = ExportArtifactManager(
+    settings.EXPORT_SCRATCH_DIR,
+    quota_bytes=settings.EXPORT_SCRATCH_QUOTA_BYTES,
+)
+metrics.register_collector("export_scratch", export_artifacts.usage)
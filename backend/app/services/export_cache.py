@@ -0,0 +1,122 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Optional, Tuple
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExportOutputCache:
+    """
+    Disk cache of finished export artifacts, keyed by template version,
+    a canonical hash of the variables and the export type. The key doubles
+    as the strong ETag for the artifact. Total size is bounded; the least
+    recently served entries are evicted first (mtime is touched on hit).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # ---------------------------
+    # KEYS
+    # ---------------------------
+    @staticmethod
+    def make_key(template_id: str, updated_at, variables: Dict, export_type: str, variant: str = "") -> str:
+        canonical_variables = json.dumps(
+            variables, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+        )
+        version = updated_at.isoformat() if hasattr(updated_at, "isoformat") else str(updated_at)
+        material = "\x1f".join([template_id, version, export_type, variant, canonical_variables])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _artifact_path(self, key: str, export_type: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{export_type}")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.meta.json")
+
+    # ---------------------------
+    # LOOKUP / STORE
+    # ---------------------------
+    def get(self, key: str, export_type: str) -> Optional[Tuple[str, Dict]]:
+        """Return (artifact path, metadata) on hit, refreshing its LRU position."""
+        path = self._artifact_path(key, export_type)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        meta = {}
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+        return path, meta
+
+    def put(self, key: str, export_type: str, source_path: str, meta: Optional[Dict] = None) -> str:
+        """
+        Move a freshly rendered artifact into the cache and return its cached
+        path. The source file is consumed either way.
+        """
+        path = self._artifact_path(key, export_type)
+        try:
+            if meta is not None:
+                with open(self._meta_path(key), "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+            try:
+                os.replace(source_path, path)
+            except OSError:
+                # Source on another filesystem (e.g. /tmp) - copy instead
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(source_path, "rb") as src, open(tmp_path, "wb") as dst:
+                    while chunk := src.read(1024 * 1024):
+                        dst.write(chunk)
+                os.replace(tmp_path, path)
+                os.unlink(source_path)
+        except OSError as e:
+            logger.warning(f"Failed to cache export {key}: {e}")
+            return source_path
+
+        self._evict()
+        return path
+
+    # ---------------------------
+    # EVICTION
+    # ---------------------------
+    def _evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith((".meta.json", ".tmp")):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.name))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            key = name.split(".", 1)[0]
+            for path in (os.path.join(self.cache_dir, name), self._meta_path(key)):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            total -= size
+
+
+export_output_cache = ExportOutputCache(
+    settings.EXPORT_CACHE_DIR,
+    max_bytes=settings.EXPORT_CACHE_MAX_BYTES,
+)
@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+import itertools
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.core.config import settings
+from backend.app.services.export_artifacts import export_artifacts
+from backend.app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower value runs first: interactive single exports jump ahead of bulk batches.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+# Running jobs write their progress to the job store at most this often
+PROGRESS_SAVE_INTERVAL_SECONDS = 1.0
+
+# Fields persisted in the job store; everything a status or download request needs
+RECORD_FIELDS = (
+    "id", "org_id", "kind", "priority", "status", "completed", "total", "error",
+    "artifact_path", "filename", "media_type", "unfilled", "degraded",
+    "created_at", "started_at", "finished_at",
+)
+
+
+class ExportJob:
+    """State of one asynchronous export, as reported by GET /export/jobs/{id}."""
+
+    def __init__(self, org_id: str, kind: str, priority: int, total: int):
+        self.id = uuid.uuid4().hex
+        self.org_id = org_id
+        self.kind = kind
+        self.priority = priority
+        self.status = "queued"
+        self.completed = 0
+        self.total = total
+        self.error: Optional[str] = None
+        self.artifact_path: Optional[str] = None
+        self.artifact_is_scratch = False
+        self.filename: Optional[str] = None
+        self.media_type: Optional[str] = None
+        self.unfilled = []
+        self.degraded = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def set_progress(self, completed: int):
+        self.completed = completed
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": {"completed": self.completed, "total": self.total},
+            "error": self.error,
+            "unfilled_placeholders": self.unfilled,
+            "degraded": self.degraded,
+            "download_ready": self.status == "completed",
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def to_record(self) -> Dict:
+        return {field: getattr(self, field) for field in RECORD_FIELDS}
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "ExportJob":
+        job = cls(record["org_id"], record["kind"], record["priority"], record["total"])
+        for field in RECORD_FIELDS:
+            setattr(job, field, record.get(field))
+        return job
+
+
+class ExportJobStore:
+    """
+    Job records and finished artifacts on disk, so that any worker process
+    sharing the directory can answer GET /export/jobs/{id} and serve the
+    download, not only the process that ran the job. Records are written
+    atomically (temp file + rename); every method does blocking IO and is
+    called through asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _record_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def save(self, record: Dict):
+        path = self._record_path(record["id"])
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        # Job ids are uuid hex; anything else cannot name a record
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._record_path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def keep_artifact(self, job_id: str, path: str) -> str:
+        """Move a finished artifact out of the export scratch dir into the store."""
+        dest = os.path.join(self.directory, f"{job_id}{os.path.splitext(path)[1]}")
+        shutil.move(path, dest)
+        return dest
+
+    def expire(self, cutoff: float):
+        """Delete records (and their artifacts) of jobs that finished before cutoff."""
+        with os.scandir(self.directory) as it:
+            names = [entry.name for entry in it if entry.name.endswith(".json")]
+        for name in names:
+            record = self.load(name[:-len(".json")])
+            if not record or not record.get("finished_at") or record["finished_at"] >= cutoff:
+                continue
+            for path in (record.get("artifact_path"), self._record_path(record["id"])):
+                if path and os.path.dirname(path) == self.directory:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+
+
+class ExportJobQueue:
+    """
+    Priority queue of export jobs drained by a fixed number of asyncio
+    workers. Batch jobs may occupy at most `workers - reserved_interactive`
+    of them, so interactive exports always have a free worker even while
+    long mail-merges run. Jobs run in the process that accepted them, but
+    their state is mirrored to `store`, so status and download requests
+    can land on any worker. Finished jobs and their artifacts are kept for
+    `retention_seconds` so the client can download them, and swept in the
+    background afterwards.
+    """
+
+    def __init__(self, workers: int, retention_seconds: int, store: ExportJobStore, reserved_interactive: int = 1):
+        self.worker_count = workers
+        self.retention_seconds = retention_seconds
+        self.max_batch_running = max(1, workers - reserved_interactive)
+        self._store = store
+        self._jobs: Dict[str, ExportJob] = {}
+        self._runners: Dict[str, Callable[[ExportJob], Awaitable[None]]] = {}
+        self._pending: List[Tuple[int, int, str]] = []
+        self._ready: Optional[asyncio.Condition] = None
+        self._batch_running = 0
+        self._workers = []
+        self._sequence = itertools.count()
+
+    # ---------------------------
+    # LIFECYCLE
+    # ---------------------------
+    def _ensure_started(self):
+        if self._ready is not None:
+            return
+        self._ready = asyncio.Condition()
+        self._workers = [
+            asyncio.create_task(self._worker(index)) for index in range(self.worker_count)
+        ]
+        self._workers.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._ready = None
+        self._pending = []
+        self._batch_running = 0
+
+    # ---------------------------
+    # SUBMIT / LOOKUP
+    # ---------------------------
+    async def submit(self, job: ExportJob, runner: Callable[[ExportJob], Awaitable[None]]) -> ExportJob:
+        self._ensure_started()
+        self._expire()
+        await self._save(job)
+        self._jobs[job.id] = job
+        self._runners[job.id] = runner
+        self._pending.append((job.priority, next(self._sequence), job.id))
+        asyncio.ensure_future(self._notify())
+        metrics.increment(f"export_jobs_submitted_{job.kind}")
+        return job
+
+    async def get(self, job_id: str, org_id: str) -> Optional[ExportJob]:
+        """A job of this org, whichever worker process is running (or ran) it."""
+        self._expire()
+        job = self._jobs.get(job_id)
+        if not job:
+            record = await asyncio.to_thread(self._store.load, job_id)
+            job = ExportJob.from_record(record) if record else None
+        if not job or job.org_id != org_id or self._expired(job):
+            return None
+        return job
+
+    async def _save(self, job: ExportJob):
+        await asyncio.to_thread(self._store.save, job.to_record())
+
+    def _expired(self, job: ExportJob) -> bool:
+        return bool(job.finished_at) and job.finished_at < time.time() - self.retention_seconds
+
+    def _expire(self):
+        """Forget finished local jobs; their records and artifacts are swept from the store."""
+        for job_id, job in list(self._jobs.items()):
+            if self._expired(job):
+                del self._jobs[job_id]
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(min(self.retention_seconds, 60))
+            self._expire()
+            try:
+                await asyncio.to_thread(self._store.expire, time.time() - self.retention_seconds)
+            except Exception as e:
+                logger.error(f"Export job sweep failed: {e}")
+
+    # ---------------------------
+    # SCHEDULING
+    # ---------------------------
+    async def _notify(self):
+        async with self._ready:
+            self._ready.notify_all()
+
+    def _is_batch(self, entry: Tuple[int, int, str]) -> bool:
+        return entry[0] >= PRIORITY_BATCH
+
+    def _next_runnable(self) -> Optional[Tuple[int, int, str]]:
+        """Best (priority, submit order) entry, skipping batches while the batch cap is reached."""
+        candidates = [
+            entry for entry in self._pending
+            if not self._is_batch(entry) or self._batch_running < self.max_batch_running
+        ]
+        return min(candidates) if candidates else None
+
+    async def _take(self) -> Tuple[int, int, str]:
+        async with self._ready:
+            await self._ready.wait_for(lambda: self._next_runnable() is not None)
+            entry = self._next_runnable()
+            self._pending.remove(entry)
+            if self._is_batch(entry):
+                self._batch_running += 1
+            return entry
+
+    async def _finish(self, entry: Tuple[int, int, str]):
+        async with self._ready:
+            if self._is_batch(entry):
+                self._batch_running -= 1
+            self._ready.notify_all()
+
+    # ---------------------------
+    # WORKERS
+    # ---------------------------
+    async def _worker(self, index: int):
+        while True:
+            entry = await self._take()
+            try:
+                await self._run(entry[2])
+            finally:
+                await asyncio.shield(self._finish(entry))
+
+    async def _run(self, job_id: str):
+        job = self._jobs.get(job_id)
+        runner = self._runners.pop(job_id, None)
+        if not job or not runner:
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        metrics.observe("export_job_queue_wait_seconds", job.started_at - job.created_at)
+        await self._save(job)
+        progress = asyncio.create_task(self._save_progress(job))
+        try:
+            await runner(job)
+            if job.artifact_path and job.artifact_is_scratch:
+                scratch_path = job.artifact_path
+                job.artifact_path = await asyncio.to_thread(self._store.keep_artifact, job.id, scratch_path)
+                export_artifacts.detach(scratch_path)
+            job.status = "completed"
+            metrics.increment("export_jobs_completed")
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Export worker stopped"
+            raise
+        except Exception as e:
+            logger.error(f"Export job {job.id} failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+            metrics.increment("export_jobs_failed")
+        finally:
+            progress.cancel()
+            if job.status == "failed" and job.artifact_is_scratch:
+                export_artifacts.release(job.artifact_path)
+                job.artifact_path = None
+            job.finished_at = time.time()
+            metrics.observe("export_job_run_seconds", job.finished_at - job.started_at)
+            await asyncio.shield(self._save(job))
+
+    async def _save_progress(self, job: ExportJob):
+        saved = job.completed
+        while True:
+            await asyncio.sleep(PROGRESS_SAVE_INTERVAL_SECONDS)
+            if job.completed != saved:
+                saved = job.completed
+                await self._save(job)
+
+    def stats(self) -> Dict:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.worker_count, "batch_running": self._batch_running, "jobs": counts}
+
+
+export_job_queue = ExportJobQueue(
+    workers=settings.EXPORT_JOB_WORKERS,
+    retention_seconds=settings.EXPORT_JOB_RETENTION_SECONDS,
+    store=ExportJobStore(settings.EXPORT_JOB_DIR),
+    reserved_interactive=settings.EXPORT_JOB_INTERACTIVE_WORKERS,
+)
+metrics.register_collector("export_jobs", export_job_queue.stats)
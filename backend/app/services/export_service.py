@@ -1,22 +1,21 @@
+import io
 import os
-import tempfile
+import bisect
+import asyncio
+import logging
+import zipfile
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Union
 from docx import Document
 from docx.shared import Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-import subprocess
-import platform
-import docx2pdf
+from backend.app.services.pdf_conversion_pool import libreoffice_pool
+from backend.app.services.export_artifacts import export_artifacts
+from backend.app.utils.placeholders import PLACEHOLDER_PATTERN, placeholder_key
 
-def create_docx_from_markdown(markdown_content: str, title: str = "Document") -> str:
+def build_docx_from_markdown(markdown_content: str, title: str = "Document") -> Document:
     """
-    Creates a DOCX file from markdown content, preserving {{variable}} placeholders.
-    
-    Args:
-        markdown_content: Markdown text with {{variable}} placeholders
-        title: Document title
-        
-    Returns:
-        Path to the created temporary DOCX file
+    Builds an in-memory python-docx Document from markdown content,
+    preserving {{variable}} placeholders.
     """
     doc = Document()
     
@@ -61,137 +60,250 @@ def create_docx_from_markdown(markdown_content: str, title: str = "Document") ->
                 current_paragraph = doc.add_paragraph(line)
             else:
                 current_paragraph.add_run('\n' + line)
-    
-    # Save to temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-    doc.save(temp_file.name)
-    temp_file.close()
-    
-    return temp_file.name
+
+    return doc
+
+
+def render_docx_skeleton(markdown_content: str, title: str = "Document") -> bytes:
+    """Renders markdown to DOCX bytes without touching the filesystem."""
+    buffer = io.BytesIO()
+    build_docx_from_markdown(markdown_content, title).save(buffer)
+    return buffer.getvalue()
+
+
+def _iter_container_paragraphs(container, seen_cells: set):
+    """Yield paragraphs of a body/cell/header, descending into nested tables."""
+    yield from container.paragraphs
+    for table in container.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                # Merged cells are returned once per grid column they span
+                if cell._tc in seen_cells:
+                    continue
+                seen_cells.add(cell._tc)
+                yield from _iter_container_paragraphs(cell, seen_cells)
 
 
-def fill_docx_template(template_path: str, variables: dict, export_type: str) -> str:
+def iter_document_paragraphs(doc):
     """
-    Fills a DOCX template with variables and optionally converts to PDF.
-    
-    Args:
-        template_path: Path to the DOCX template file
-        variables: Dictionary of variable key-value pairs
-        export_type: Either "docx" or "pdf"
-        
+    Yield every paragraph in the document exactly once: body, tables
+    (including nested tables), and all header/footer variants.
+    """
+    seen_cells = set()
+    yield from _iter_container_paragraphs(doc, seen_cells)
+
+    for section in doc.sections:
+        parts = [section.header, section.footer]
+        if section.different_first_page_header_footer:
+            parts += [section.first_page_header, section.first_page_footer]
+        if doc.settings.odd_and_even_pages_header_footer:
+            parts += [section.even_page_header, section.even_page_footer]
+        for part in parts:
+            # Linked parts reuse a previous section's definition
+            if part.is_linked_to_previous:
+                continue
+            yield from _iter_container_paragraphs(part, seen_cells)
+
+
+def _substitute_paragraph(paragraph, variables: dict, unfilled: Set[str]) -> int:
+    """
+    Replace every {{key}} in a paragraph with a single regex pass over the
+    joined run text. A placeholder split across runs is written into the run
+    where it starts (keeping that run's formatting) and the remainder is
+    trimmed from the following runs.
+    """
+    runs = paragraph.runs
+    if not runs:
+        return 0
+
+    texts = [run.text for run in runs]
+    full_text = "".join(texts)
+    if "{{" not in full_text:
+        return 0
+
+    offsets = []
+    position = 0
+    for text in texts:
+        offsets.append(position)
+        position += len(text)
+
+    def run_at(char_index: int) -> int:
+        return bisect.bisect_right(offsets, char_index) - 1
+
+    changed = set()
+    replaced = 0
+    for match in reversed(list(PLACEHOLDER_PATTERN.finditer(full_text))):
+        key = placeholder_key(match.group(1))
+        if key not in variables:
+            unfilled.add(key)
+            continue
+
+        value = str(variables[key])
+        start, end = match.span()
+        first, last = run_at(start), run_at(end - 1)
+        first_text = texts[first]
+
+        if first == last:
+            texts[first] = first_text[:start - offsets[first]] + value + first_text[end - offsets[first]:]
+        else:
+            texts[first] = first_text[:start - offsets[first]] + value
+            for idx in range(first + 1, last):
+                texts[idx] = ""
+            texts[last] = texts[last][end - offsets[last]:]
+        changed.update(range(first, last + 1))
+        replaced += 1
+
+    for idx in changed:
+        runs[idx].text = texts[idx]
+
+    return replaced
+
+
+def substitute_placeholders(doc, variables: dict) -> Set[str]:
+    """
+    Fill {{key}} placeholders across the whole document in one traversal.
+
+    Returns:
+        Keys of placeholders that had no value in `variables`
+    """
+    unfilled: Set[str] = set()
+    for paragraph in iter_document_paragraphs(doc):
+        _substitute_paragraph(paragraph, variables, unfilled)
+    return unfilled
+
+
+def fill_docx_file(
+    template_source: Union[str, bytes],
+    variables: dict,
+    unfilled: Optional[Set[str]] = None,
+) -> str:
+    """
+    Fills a DOCX template with variables and saves it to a temporary file.
+
     Returns:
-        Path to the generated file
+        Path to the filled DOCX file
     """
     # Load the template
-    doc = Document(template_path)
-    
-    # Replace variables in paragraphs
-    for paragraph in doc.paragraphs:
-        for key, value in variables.items():
-            placeholder = "{{" + key + "}}"
-            if placeholder in paragraph.text:
-                # Replace in runs to preserve formatting
-                for run in paragraph.runs:
-                    if placeholder in run.text:
-                        run.text = run.text.replace(placeholder, str(value))
-    
-    # Replace variables in tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    for key, value in variables.items():
-                        placeholder = "{{" + key + "}}"
-                        if placeholder in paragraph.text:
-                            for run in paragraph.runs:
-                                if placeholder in run.text:
-                                    run.text = run.text.replace(placeholder, str(value))
-    
-    # Replace in headers/footers
-    for section in doc.sections:
-        # Header
-        header = section.header
-        for paragraph in header.paragraphs:
-            for key, value in variables.items():
-                placeholder = "{{" + key + "}}"
-                if placeholder in paragraph.text:
-                    for run in paragraph.runs:
-                        if placeholder in run.text:
-                            run.text = run.text.replace(placeholder, str(value))
-        
-        # Footer
-        footer = section.footer
-        for paragraph in footer.paragraphs:
-            for key, value in variables.items():
-                placeholder = "{{" + key + "}}"
-                if placeholder in paragraph.text:
-                    for run in paragraph.runs:
-                        if placeholder in run.text:
-                            run.text = run.text.replace(placeholder, str(value))
+    if isinstance(template_source, bytes):
+        doc = Document(io.BytesIO(template_source))
+    else:
+        doc = Document(template_source)
     
+    missing = substitute_placeholders(doc, variables)
+    if missing:
+        logging.info(f"Unfilled placeholders: {sorted(missing)}")
+        if unfilled is not None:
+            unfilled.update(missing)
+
     # Save filled DOCX
-    filled_docx_path = tempfile.NamedTemporaryFile(delete=False, suffix=".docx").name
+    filled_docx_path = export_artifacts.new_path(".docx")
     doc.save(filled_docx_path)
-    
-    # If DOCX is requested, return it
-    if export_type == "docx":
+    return filled_docx_path
+
+
+def convert_docx_to_pdf_fallback(docx_path: str, pdf_path: str):
+    """Convert without LibreOffice: docx2pdf (Windows/macOS), then ReportLab."""
+    try:
+        from docx2pdf import convert
+        convert(docx_path, pdf_path)
+    except Exception as e:
+        print(f"⚠️ docx2pdf failed: {e}")
+        # Last resort: basic PDF generation
+        convert_docx_to_pdf_basic(docx_path, pdf_path)
+
+
+async def export_filled_document(
+    template_source: Union[str, bytes],
+    variables: dict,
+    export_type: str,
+    unfilled: Optional[Set[str]] = None,
+    degraded: Optional[Set[str]] = None,
+) -> str:
+    """
+    Fill a DOCX template for request handlers: the DOCX fill runs in a
+    worker thread and PDF conversion is submitted to the
+    shared LibreOffice pool, so the event loop is never blocked.
+
+    When LibreOffice fails or times out the PDF comes from the lower
+    fidelity fallback converter and "pdf-fallback" is added to `degraded`.
+    """
+    filled_docx_path = await asyncio.to_thread(fill_docx_file, template_source, variables, unfilled)
+    if export_type != "pdf":
         return filled_docx_path
-    
-    # Convert to PDF if requested
-    if export_type == "pdf":
-        pdf_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-        
-        try:
-            # Try using LibreOffice for conversion (best quality)
-            convert_docx_to_pdf_libreoffice(filled_docx_path, pdf_path)
-        except Exception as e:
-            print(f"⚠️ LibreOffice conversion failed, trying alternative: {e}")
-            try:
-                # Fallback: Try using docx2pdf (Windows only)
-                from docx2pdf import convert
-                convert(filled_docx_path, pdf_path)
-            except Exception as e2:
-                print(f"⚠️ docx2pdf failed: {e2}")
-                # Last resort: basic PDF generation
-                convert_docx_to_pdf_basic(filled_docx_path, pdf_path)
-        
-        # Clean up the intermediate DOCX
+
+    pdf_path = export_artifacts.new_path(".pdf")
+    try:
+        await libreoffice_pool.convert(filled_docx_path, pdf_path)
+    except Exception as e:
+        logging.warning(f"LibreOffice pool conversion failed, using fallback converter: {e!r}")
+        if degraded is not None:
+            degraded.add("pdf-fallback")
         try:
-            os.unlink(filled_docx_path)
-        except:
-            pass
-        
-        return pdf_path
-    
-    return filled_docx_path
+            await asyncio.to_thread(convert_docx_to_pdf_fallback, filled_docx_path, pdf_path)
+        except Exception:
+            export_artifacts.release(pdf_path)
+            raise
+    finally:
+        export_artifacts.release(filled_docx_path)
 
+    return pdf_path
 
-def convert_docx_to_pdf_libreoffice(docx_path: str, pdf_path: str):
-    """Convert DOCX to PDF using LibreOffice (best quality)"""
-    output_dir = os.path.dirname(pdf_path)
-    
-    # LibreOffice command
-    if platform.system() == "Windows":
-        libreoffice_cmd = "soffice"
-    else:
-        libreoffice_cmd = "libreoffice"
-    
-    cmd = [
-        libreoffice_cmd,
-        "--headless",
-        "--convert-to", "pdf",
-        "--outdir", output_dir,
-        docx_path
-    ]
-    
-    subprocess.run(cmd, check=True, capture_output=True)
-    
-    # LibreOffice creates PDF with same name as input
-    generated_pdf = os.path.join(output_dir, os.path.splitext(os.path.basename(docx_path))[0] + ".pdf")
-    
-    # Move to desired location if different
-    if generated_pdf != pdf_path:
-        os.rename(generated_pdf, pdf_path)
+
+class _ZipChunkBuffer:
+    """Write-only sink that lets zipfile stream into response chunks."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def iter_filled_documents_zip(
+    template_source: Union[str, bytes],
+    variable_sets: List[Dict[str, str]],
+    export_type: str,
+    name_prefix: str = "document",
+    progress: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Fill the template once per variable set and yield a ZIP archive
+    incrementally as documents are produced. Documents are rendered in
+    windows as wide as the LibreOffice pool and added in input order.
+    `progress` is called with the number of documents written so far.
+    """
+    buffer = _ZipChunkBuffer()
+    window = max(libreoffice_pool.size, 1)
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for start in range(0, len(variable_sets), window):
+            batch = variable_sets[start:start + window]
+            results = await asyncio.gather(
+                *(export_filled_document(template_source, variables, export_type) for variables in batch),
+                return_exceptions=True,
+            )
+            output_paths = [r for r in results if isinstance(r, str)]
+            try:
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+                for offset, output_path in enumerate(output_paths):
+                    index = start + offset + 1
+                    archive.write(output_path, arcname=f"{name_prefix}_{index:04d}.{export_type}")
+                    if progress:
+                        progress(index)
+                    yield buffer.drain()
+            finally:
+                export_artifacts.release(*output_paths)
+    yield buffer.drain()
 
 
 def convert_docx_to_pdf_basic(docx_path: str, pdf_path: str):
@@ -0,0 +1,236 @@
+import os
+import uuid
+import shutil
+import asyncio
+import hashlib
+import logging
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, NamedTuple, Optional, Tuple
+
+from backend.app.utils.metrics import metrics
+from backend.core.config import settings
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+    ClientError = Exception
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_BYTES = 1024 * 1024
+
+
+class StoredBlob(NamedTuple):
+    content_hash: str
+    size: int
+    uri: str
+    deduplicated: bool
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(COPY_BUFFER_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileStorage(ABC):
+    """
+    Content-addressed blob store for uploaded files. Blobs are keyed by the
+    SHA-256 of their bytes, so identical uploads are stored once; documents
+    reference them through Document.contentHash.
+    """
+
+    def __init__(self, scratch_dir: str):
+        self.scratch_dir = scratch_dir
+
+    # ---------------------------
+    # BACKEND INTERFACE (sync, run in threads)
+    # ---------------------------
+    @abstractmethod
+    def _exists(self, content_hash: str) -> bool: ...
+
+    @abstractmethod
+    def _store(self, path: str, content_hash: str):
+        """Take ownership of the file at `path` (moving or removing it) as blob `content_hash`."""
+
+    @abstractmethod
+    def _delete(self, content_hash: str): ...
+
+    @abstractmethod
+    def _download(self, content_hash: str, dest: str): ...
+
+    @abstractmethod
+    def uri(self, content_hash: str) -> str: ...
+
+    def local_path(self, content_hash: str) -> Optional[str]:
+        """Path of the blob on this node's disk, or None for remote backends."""
+        return None
+
+    # ---------------------------
+    # PUBLIC API
+    # ---------------------------
+    def scratch_path(self) -> str:
+        """A fresh path on the scratch volume for staging an incoming file."""
+        os.makedirs(self.scratch_dir, exist_ok=True)
+        return os.path.join(self.scratch_dir, f"{uuid.uuid4().hex}.part")
+
+    async def put_file(self, path: str, content_hash: Optional[str] = None) -> StoredBlob:
+        """
+        Store a staged file and consume it (it is moved or removed). Pass the
+        hash when the caller already computed it while receiving the bytes.
+        """
+        size = os.path.getsize(path)
+        content_hash = content_hash or await asyncio.to_thread(file_sha256, path)
+        if await asyncio.to_thread(self._exists, content_hash):
+            os.remove(path)
+            metrics.increment("storage.dedup_hits")
+            metrics.increment("storage.dedup_bytes_saved", size)
+            return StoredBlob(content_hash, size, self.uri(content_hash), True)
+
+        await asyncio.to_thread(self._store, path, content_hash)
+        metrics.increment("storage.blobs_written")
+        return StoredBlob(content_hash, size, self.uri(content_hash), False)
+
+    async def stage_stream(self, source: BinaryIO) -> Tuple[str, str]:
+        """Stream a file-like object to scratch while hashing it; returns (path, sha256)."""
+        path = self.scratch_path()
+        digest = hashlib.sha256()
+
+        def copy():
+            with open(path, "wb") as out:
+                while chunk := source.read(COPY_BUFFER_BYTES):
+                    digest.update(chunk)
+                    out.write(chunk)
+
+        try:
+            await asyncio.to_thread(copy)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path, digest.hexdigest()
+
+    async def exists(self, content_hash: str) -> bool:
+        return await asyncio.to_thread(self._exists, content_hash)
+
+    async def delete(self, content_hash: str):
+        await asyncio.to_thread(self._delete, content_hash)
+        metrics.increment("storage.blobs_deleted")
+
+    @asynccontextmanager
+    async def local_copy(self, content_hash: str) -> AsyncIterator[str]:
+        """A local path to the blob for tools that need one (text extraction, rendering)."""
+        path = self.local_path(content_hash)
+        if path:
+            yield path
+            return
+        path = self.scratch_path()
+        try:
+            await asyncio.to_thread(self._download, content_hash, path)
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class LocalFileStorage(FileStorage):
+    """Blobs under root/ab/cd/<sha256>; two levels of sharding keep directories small."""
+
+    def __init__(self, root: str, scratch_dir: Optional[str] = None):
+        # Scratch lives on the same volume so storing is a rename
+        super().__init__(scratch_dir or os.path.join(root, ".scratch"))
+        self.root = root
+
+    def local_path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], content_hash)
+
+    def uri(self, content_hash: str) -> str:
+        return self.local_path(content_hash)
+
+    def _exists(self, content_hash: str) -> bool:
+        return os.path.exists(self.local_path(content_hash))
+
+    def _store(self, path: str, content_hash: str):
+        target = self.local_path(content_hash)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # A rename when staged on the same volume, a copy otherwise
+        shutil.move(path, target)
+
+    def _delete(self, content_hash: str):
+        try:
+            os.remove(self.local_path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    def _download(self, content_hash: str, dest: str):
+        shutil.copyfile(self.local_path(content_hash), dest)
+
+
+class S3FileStorage(FileStorage):
+    """
+    Blobs in an S3-compatible bucket under <prefix>/ab/cd/<sha256>. Set
+    S3_ENDPOINT_URL to use a local stand-in (MinIO, moto server) in
+    development.
+    """
+
+    def __init__(self, bucket: str, prefix: str, scratch_dir: str, endpoint_url: Optional[str], region: Optional[str]):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        super().__init__(scratch_dir)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def _key(self, content_hash: str) -> str:
+        key = f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def uri(self, content_hash: str) -> str:
+        return f"s3://{self.bucket}/{self._key(content_hash)}"
+
+    def _exists(self, content_hash: str) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._key(content_hash))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _store(self, path: str, content_hash: str):
+        self._client.upload_file(path, self.bucket, self._key(content_hash))
+        os.remove(path)
+
+    def _delete(self, content_hash: str):
+        self._client.delete_object(Bucket=self.bucket, Key=self._key(content_hash))
+
+    def _download(self, content_hash: str, dest: str):
+        self._client.download_file(self.bucket, self._key(content_hash), dest)
+
+    def open_stream(self, content_hash: str, byte_range: Optional[str] = None):
+        """Streaming body of the blob (optionally an HTTP Range) for proxying downloads."""
+        params = {"Bucket": self.bucket, "Key": self._key(content_hash)}
+        if byte_range:
+            params["Range"] = byte_range
+        return self._client.get_object(**params)
+
+
+def create_file_storage() -> FileStorage:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3FileStorage(
+            bucket=settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            scratch_dir=os.path.join(tempfile.gettempdir(), "prelexa-uploads"),
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+        )
+    return LocalFileStorage(settings.STORAGE_LOCAL_ROOT)
+
+
+file_storage = create_file_storage()
@@ -0,0 +1,336 @@
+import io
+import re
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4, letter, legal
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from reportlab.lib.fonts import addMapping
+
+from backend.app.utils.placeholders import PLACEHOLDER_PATTERN, placeholder_key
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZES = {"a4": A4, "letter": letter, "legal": legal}
+
+NUMBERED_PATTERN = re.compile(r"^(\d+)[.)] (.*)$")
+TABLE_SEPARATOR_PATTERN = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+EMPHASIS_RUN_PATTERN = re.compile(r"\*+|_+")
+EMPHASIS_TAGS = {1: ("i",), 2: ("b",), 3: ("b", "i")}
+# Private-use markers that stand in for variable values while the markdown
+# is parsed, so a value can never add headings, lists, tables or emphasis
+VALUE_MARKER = "\ue000{}\ue001"
+VALUE_MARKER_PATTERN = re.compile("\ue000(\\d+)\ue001")
+
+
+class PdfStyle:
+    """Font and page settings for the native markdown renderer."""
+
+    def __init__(
+        self,
+        page_size: str = "a4",
+        font_name: str = "Helvetica",
+        font_size: float = 11,
+        margin_mm: float = 20,
+        font_path: Optional[str] = None,
+        bold_font_path: Optional[str] = None,
+    ):
+        self.page_size = PAGE_SIZES.get(page_size.lower(), A4)
+        self.font_name = font_name
+        self.font_size = font_size
+        self.margin = margin_mm * mm
+        self.bold_font_name = font_name
+        if font_path:
+            self._register_font(font_path, bold_font_path)
+        elif font_name == "Helvetica":
+            self.bold_font_name = "Helvetica-Bold"
+
+    def _register_font(self, font_path: str, bold_font_path: Optional[str]):
+        """Register a TTF family so <b>/<i> markup resolves to real faces."""
+        if self.font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(self.font_name, font_path))
+        bold_name = self.font_name
+        if bold_font_path:
+            bold_name = f"{self.font_name}-Bold"
+            if bold_name not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(TTFont(bold_name, bold_font_path))
+        addMapping(self.font_name, 0, 0, self.font_name)
+        addMapping(self.font_name, 0, 1, self.font_name)
+        addMapping(self.font_name, 1, 0, bold_name)
+        addMapping(self.font_name, 1, 1, bold_name)
+        self.bold_font_name = bold_name
+
+    @classmethod
+    def from_settings(cls) -> "PdfStyle":
+        if not settings.PDF_FONT_PATH:
+            logger.warning(
+                f"Native PDF export uses the built-in {settings.PDF_FONT} font, which covers Latin-1 only; "
+                "set PDF_FONT_PATH to a Unicode TTF for other scripts and symbols such as ₹"
+            )
+        return cls(
+            page_size=settings.PDF_PAGE_SIZE,
+            font_name=settings.PDF_FONT,
+            font_size=settings.PDF_FONT_SIZE,
+            margin_mm=settings.PDF_MARGIN_MM,
+            font_path=settings.PDF_FONT_PATH,
+            bold_font_path=settings.PDF_FONT_BOLD_PATH,
+        )
+
+    def paragraph_styles(self) -> dict:
+        base = getSampleStyleSheet()
+        body = ParagraphStyle(
+            "Body", parent=base["Normal"], fontName=self.font_name,
+            fontSize=self.font_size, leading=self.font_size * 1.4, spaceAfter=self.font_size * 0.6,
+        )
+
+        def heading(name: str, scale: float) -> ParagraphStyle:
+            return ParagraphStyle(
+                name, parent=body, fontName=self.bold_font_name,
+                fontSize=self.font_size * scale, leading=self.font_size * scale * 1.3,
+                spaceBefore=self.font_size * 0.8, spaceAfter=self.font_size * 0.5,
+            )
+
+        title = heading("Title", 2.0)
+        title.alignment = TA_CENTER
+        return {
+            "title": title,
+            "h1": heading("H1", 1.6),
+            "h2": heading("H2", 1.35),
+            "h3": heading("H3", 1.15),
+            "body": body,
+            "list": ParagraphStyle("ListItem", parent=body, leftIndent=self.font_size * 1.6, bulletIndent=self.font_size * 0.4, spaceAfter=self.font_size * 0.3),
+            "cell": ParagraphStyle("Cell", parent=body, spaceAfter=0),
+            "header_cell": ParagraphStyle("HeaderCell", parent=body, fontName=self.bold_font_name, spaceAfter=0),
+        }
+
+
+def _inline_markup(text: str) -> str:
+    """
+    Escape text for ReportLab's mini-markup and apply **bold**, *italic*
+    and ***both***. Delimiter runs are matched on a stack so the tags are
+    always balanced: overlapping emphasis (`**a *b** c*`) is closed and
+    reopened around the inner tag, and unmatched delimiters stay literal.
+    """
+    text = escape(text)
+    out: List[str] = []
+    # Open tags, innermost last: [tag, delimiter char, index of the opener in out, literal]
+    stack: List[list] = []
+
+    def open_tag(tag: str, char: str, literal: str):
+        stack.append([tag, char, len(out), literal])
+        out.append(f"<{tag}>")
+
+    def find(tag: str, char: str) -> int:
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == tag and stack[i][1] == char:
+                return i
+        return -1
+
+    def close_tag(tag: str, char: str):
+        position = find(tag, char)
+        reopened = stack[position + 1:]
+        for entry in reversed(reopened):
+            out.append(f"</{entry[0]}>")
+        out.append(f"</{tag}>")
+        del stack[position:]
+        for entry in reopened:
+            open_tag(entry[0], entry[1], "")
+
+    cursor = 0
+    for match in EMPHASIS_RUN_PATTERN.finditer(text):
+        out.append(text[cursor:match.start()])
+        cursor = match.end()
+        run = match.group()
+        char = run[0]
+        before = text[match.start() - 1] if match.start() else " "
+        after = text[match.end()] if match.end() < len(text) else " "
+        # Flanking rules: `_` never opens or closes inside a word (snake_case)
+        can_open = not after.isspace() and not (char == "_" and before.isalnum())
+        can_close = not before.isspace() and not (char == "_" and after.isalnum())
+        tags = EMPHASIS_TAGS.get(len(run))
+
+        if tags and can_close and all(find(tag, char) >= 0 for tag in tags):
+            # Innermost first, so `***x***` closes as </i></b>
+            for tag in sorted(tags, key=lambda t: find(t, char), reverse=True):
+                close_tag(tag, char)
+        elif tags and can_open:
+            for tag in tags:
+                open_tag(tag, char, char * (2 if tag == "b" else 1))
+        else:
+            out.append(run)
+    out.append(text[cursor:])
+
+    # Delimiters that were never closed are printed as typed
+    for _, _, index, literal in stack:
+        out[index] = literal
+    return "".join(out)
+
+
+def _mark_values(markdown_content: str, variables: Dict) -> Tuple[str, List[str]]:
+    """
+    Replace {{key}} placeholders that have a value with VALUE_MARKERs and
+    return the values in marker order. Unknown placeholders stay as typed.
+    """
+    values: List[str] = []
+
+    def mark(match) -> str:
+        key = placeholder_key(match.group(1))
+        if key not in variables:
+            return match.group(0)
+        values.append(str(variables[key]))
+        return VALUE_MARKER.format(len(values) - 1)
+
+    return PLACEHOLDER_PATTERN.sub(mark, markdown_content), values
+
+
+def _fill_values(markup: str, values: Sequence[str]) -> str:
+    """Put the escaped values back in place of their markers, as literal text."""
+    if not values:
+        return markup
+    return VALUE_MARKER_PATTERN.sub(lambda m: escape(values[int(m.group(1))]).replace("\n", "<br/>"), markup)
+
+
+def _paragraph(lines: List[str], style, values: Sequence[str] = (), **kwargs) -> Paragraph:
+    """A Paragraph of inline-markup lines, falling back to plain text if ReportLab rejects the markup."""
+    try:
+        return Paragraph(_fill_values("<br/>".join(_inline_markup(line) for line in lines), values), style, **kwargs)
+    except ValueError as e:
+        logger.warning(f"Markdown paragraph rendered as plain text: {e}")
+        return Paragraph(_fill_values("<br/>".join(escape(line) for line in lines), values), style, **kwargs)
+
+
+def _split_table_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def _build_table(rows: List[List[str]], styles: dict, available_width: float, values: Sequence[str] = ()) -> Table:
+    column_count = max(len(row) for row in rows)
+    data = []
+    for row_idx, row in enumerate(rows):
+        cell_style = styles["header_cell"] if row_idx == 0 else styles["cell"]
+        padded = row + [""] * (column_count - len(row))
+        data.append([_paragraph([cell], cell_style, values) for cell in padded])
+
+    table = Table(data, colWidths=[available_width / column_count] * column_count, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#EEEEEE")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    return table
+
+
+def markdown_to_flowables(markdown_content: str, title: str, style: PdfStyle, values: Sequence[str] = ()) -> list:
+    """
+    Convert the markdown subset understood by build_docx_from_markdown
+    (headings, bullets, numbered lists, paragraphs) plus **bold**, *italic*
+    and pipe tables into ReportLab flowables. `values` fill the
+    VALUE_MARKERs left by _mark_values once the markup is built.
+    """
+    styles = style.paragraph_styles()
+    available_width = style.page_size[0] - 2 * style.margin
+    story = [_paragraph([title], styles["title"]), Spacer(1, style.font_size)]
+
+    lines = [line.rstrip() for line in markdown_content.split("\n")]
+    paragraph_lines: List[str] = []
+
+    def flush_paragraph():
+        if paragraph_lines:
+            story.append(_paragraph(paragraph_lines, styles["body"], values))
+            paragraph_lines.clear()
+
+    idx = 0
+    while idx < len(lines):
+        line = lines[idx]
+        stripped = line.strip()
+
+        if not stripped:
+            flush_paragraph()
+            idx += 1
+            continue
+
+        # Pipe table: header row followed by a |---| separator row
+        if stripped.startswith("|") and idx + 1 < len(lines) and TABLE_SEPARATOR_PATTERN.match(lines[idx + 1].strip()):
+            flush_paragraph()
+            rows = [_split_table_row(stripped)]
+            idx += 2
+            while idx < len(lines) and lines[idx].strip().startswith("|"):
+                rows.append(_split_table_row(lines[idx]))
+                idx += 1
+            story.append(_build_table(rows, styles, available_width, values))
+            story.append(Spacer(1, style.font_size * 0.6))
+            continue
+
+        numbered = NUMBERED_PATTERN.match(line)
+        if line.startswith("### "):
+            flush_paragraph()
+            story.append(_paragraph([line[4:]], styles["h3"], values))
+        elif line.startswith("## "):
+            flush_paragraph()
+            story.append(_paragraph([line[3:]], styles["h2"], values))
+        elif line.startswith("# "):
+            flush_paragraph()
+            story.append(_paragraph([line[2:]], styles["h1"], values))
+        elif line.startswith("- ") or line.startswith("* "):
+            flush_paragraph()
+            story.append(_paragraph([line[2:]], styles["list"], values, bulletText="•"))
+        elif numbered:
+            flush_paragraph()
+            story.append(_paragraph([numbered.group(2)], styles["list"], values, bulletText=f"{numbered.group(1)}."))
+        else:
+            paragraph_lines.append(line)
+        idx += 1
+
+    flush_paragraph()
+    return story
+
+
+def render_markdown_pdf(
+    markdown_content: str,
+    title: str = "Document",
+    style: Optional[PdfStyle] = None,
+    variables: Optional[Dict] = None,
+) -> bytes:
+    """
+    Render markdown straight to PDF bytes, with no DOCX or external process.
+    `variables` fill {{key}} placeholders after the markdown is parsed, so
+    values are printed literally (as in DOCX exports) and cannot change
+    the formatting.
+    """
+    style = style or default_pdf_style()
+    markdown_content, values = _mark_values(markdown_content, variables or {})
+    buffer = io.BytesIO()
+    pdf_doc = SimpleDocTemplate(
+        buffer,
+        pagesize=style.page_size,
+        leftMargin=style.margin,
+        rightMargin=style.margin,
+        topMargin=style.margin,
+        bottomMargin=style.margin,
+        title=title,
+    )
+    pdf_doc.build(markdown_to_flowables(markdown_content, title, style, values))
+    return buffer.getvalue()
+
+
+_default_style: Optional[PdfStyle] = None
+
+
+def default_pdf_style() -> PdfStyle:
+    global _default_style
+    if _default_style is None:
+        _default_style = PdfStyle.from_settings()
+    return _default_style
@@ -0,0 +1,246 @@
+import os
+import shutil
+import asyncio
+import logging
+import platform
+from typing import List, Optional
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    # Python-UNO bridge ships with LibreOffice (python3-uno); optional.
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+
+def _default_binary() -> str:
+    return "soffice" if platform.system() == "Windows" else "libreoffice"
+
+
+def _property(name: str, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class LibreOfficeWorker:
+    """
+    One headless LibreOffice slot with its own user profile directory, so
+    concurrent conversions never fight over the same profile lock.
+
+    When the Python-UNO bridge is available the worker keeps a resident
+    soffice process and converts over a UNO pipe; otherwise each job runs
+    `--convert-to` against the worker's warm profile.
+    """
+
+    def __init__(self, index: int, base_dir: str, binary: str):
+        self.index = index
+        self.binary = binary
+        self.profile_dir = os.path.abspath(os.path.join(base_dir, f"worker-{index}"))
+        self.pipe_name = f"prelexa_lo_{os.getpid()}_{index}"
+        self.conversions = 0
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._desktop = None
+
+    @property
+    def _profile_url(self) -> str:
+        return "file:///" + self.profile_dir.replace("\\", "/").lstrip("/")
+
+    # ---------------------------
+    # LIFECYCLE
+    # ---------------------------
+    async def start(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if uno is None:
+            return
+
+        self._process = await asyncio.create_subprocess_exec(
+            self.binary,
+            f"-env:UserInstallation={self._profile_url}",
+            "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+            f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._desktop = await self._connect()
+
+    async def _connect(self, attempts: int = 40, delay: float = 0.25):
+        def resolve():
+            local_ctx = uno.getComponentContext()
+            resolver = local_ctx.ServiceManager.createInstanceWithContext(
+                "com.sun.star.bridge.UnoUrlResolver", local_ctx
+            )
+            ctx = resolver.resolve(f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext")
+            return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+        last_error = None
+        for _ in range(attempts):
+            if self._process and self._process.returncode is not None:
+                break
+            try:
+                return await asyncio.to_thread(resolve)
+            except Exception as e:
+                last_error = e
+                await asyncio.sleep(delay)
+        raise RuntimeError(f"LibreOffice worker {self.index} failed to start: {last_error}")
+
+    async def stop(self):
+        self._desktop = None
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        self._process = None
+
+    async def recycle(self):
+        """Restart the worker with a fresh profile."""
+        logger.info(f"Recycling LibreOffice worker {self.index} after {self.conversions} conversions")
+        await self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.conversions = 0
+        await self.start()
+
+    # ---------------------------
+    # CONVERSION
+    # ---------------------------
+    async def convert(self, docx_path: str, pdf_path: str, timeout: float):
+        if self._desktop is not None:
+            await self._convert_uno(docx_path, pdf_path, timeout)
+        else:
+            await self._convert_cli(docx_path, pdf_path, timeout)
+        self.conversions += 1
+
+    async def _convert_uno(self, docx_path: str, pdf_path: str, timeout: float):
+        desktop = self._desktop
+
+        def run():
+            document = desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(docx_path)), "_blank", 0,
+                (_property("Hidden", True),)
+            )
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(os.path.abspath(pdf_path)),
+                    (_property("FilterName", "writer_pdf_Export"),)
+                )
+            finally:
+                document.close(True)
+
+        await asyncio.wait_for(asyncio.to_thread(run), timeout)
+
+    async def _convert_cli(self, docx_path: str, pdf_path: str, timeout: float):
+        output_dir = os.path.dirname(os.path.abspath(pdf_path))
+        process = await asyncio.create_subprocess_exec(
+            self.binary,
+            f"-env:UserInstallation={self._profile_url}",
+            "--headless", "--convert-to", "pdf", "--outdir", output_dir, docx_path,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+
+        if process.returncode != 0:
+            raise RuntimeError(f"LibreOffice exited with {process.returncode}: {stderr.decode(errors='ignore')[:500]}")
+
+        generated_pdf = os.path.join(output_dir, os.path.splitext(os.path.basename(docx_path))[0] + ".pdf")
+        if not os.path.exists(generated_pdf):
+            raise RuntimeError("LibreOffice produced no output")
+        if generated_pdf != os.path.abspath(pdf_path):
+            os.replace(generated_pdf, pdf_path)
+
+
+class LibreOfficePool:
+    """
+    Fixed-size pool of LibreOffice workers. Jobs wait up to `queue_timeout`
+    for an idle worker, then get `job_timeout` for the conversion itself.
+    Workers are recycled after a number of conversions or whenever a job
+    fails, times out or is cancelled.
+    """
+
+    def __init__(self, size: int, max_conversions: int, job_timeout: float, queue_timeout: float, base_dir: str, binary: str):
+        self.size = size
+        self.max_conversions = max_conversions
+        self.job_timeout = job_timeout
+        self.queue_timeout = queue_timeout
+        self.base_dir = base_dir
+        self.binary = binary
+        self._workers: List[LibreOfficeWorker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            os.makedirs(self.base_dir, exist_ok=True)
+            idle = asyncio.Queue()
+            try:
+                for index in range(self.size):
+                    worker = LibreOfficeWorker(index, self.base_dir, self.binary)
+                    self._workers.append(worker)
+                    await worker.start()
+                    idle.put_nowait(worker)
+            except Exception:
+                await self.stop()
+                raise
+            self._idle = idle
+            logger.info(f"Started LibreOffice pool with {self.size} workers (uno={'yes' if uno else 'no'})")
+
+    async def stop(self):
+        for worker in self._workers:
+            await worker.stop()
+        self._workers = []
+        self._idle = None
+
+    async def convert(self, docx_path: str, pdf_path: str, timeout: Optional[float] = None):
+        """
+        Convert a DOCX file to PDF on the next idle worker. The timeout
+        covers the conversion only, not the wait for a worker.
+        """
+        if self._idle is None:
+            await self.start()
+        idle = self._idle
+
+        worker = await asyncio.wait_for(idle.get(), self.queue_timeout)
+        try:
+            await worker.convert(docx_path, pdf_path, timeout or self.job_timeout)
+        except asyncio.CancelledError:
+            # The UNO call or subprocess may still be running: restart the
+            # worker in the background rather than handing it out busy.
+            asyncio.ensure_future(self._release(worker, idle, recycle=True))
+            raise
+        except Exception:
+            await self._release(worker, idle, recycle=True)
+            raise
+        await self._release(worker, idle, recycle=worker.conversions >= self.max_conversions)
+
+    async def _release(self, worker: LibreOfficeWorker, idle: asyncio.Queue, recycle: bool):
+        if idle is not self._idle:
+            # Pool was stopped (or restarted) while the job ran
+            await worker.stop()
+            return
+        if recycle:
+            try:
+                await worker.recycle()
+            except Exception as e:
+                logger.error(f"Failed to recycle LibreOffice worker {worker.index}: {e}")
+        idle.put_nowait(worker)
+
+
+libreoffice_pool = LibreOfficePool(
+    size=settings.LIBREOFFICE_POOL_SIZE,
+    max_conversions=settings.LIBREOFFICE_MAX_CONVERSIONS,
+    job_timeout=settings.LIBREOFFICE_JOB_TIMEOUT,
+    queue_timeout=settings.LIBREOFFICE_QUEUE_TIMEOUT,
+    base_dir=settings.LIBREOFFICE_PROFILE_DIR,
+    binary=settings.LIBREOFFICE_BINARY or _default_binary(),
+)
@@ -1,36 +1,54 @@
 import json
 import logging
-import asyncio
+import time
 from typing import Dict
 from fastapi import HTTPException
 from backend.db.database import db
 from backend.app.agent.prefiller import prefiller_agent
+from backend.app.services.rule_prefill import rule_prefill
+from backend.app.utils.metrics import metrics
 from backend.app.models.models import PrefillRequest , GenerateQuestionsRequest
 from backend.app.utils.schemas import TemplateOut
-from backend.app.agent.question_generator import question_generator_agent
+from backend.app.services.template_question_service import needs_question, persist_questions
 
 
 
 async def prefill_variables_from_query(request: PrefillRequest):
     """
-    
-    Uses an LLM to pre-fill template variables based on the initial user query.
+    Pre-fills template variables from the initial user query. A local
+    rule pass (variable regex/enum/type) runs first; the LLM only sees the
+    variables it could not resolve.
     """
     template = await db.template.find_unique(where={"id": request.template_id}, include={"variables": True})
     if not template:
         raise HTTPException(status_code=404, detail="Template not found.")
 
-    # Prepare the variables for the agent prompt
+    started = time.perf_counter()
+    detected_variables, unresolved = rule_prefill(template, request.query)
+    metrics.observe("prefill.rule_pass_seconds", time.perf_counter() - started)
+    metrics.increment("prefill.requests")
+    metrics.increment("prefill.rule_filled_variables", len(detected_variables))
+
+    if not unresolved:
+        metrics.increment("prefill.llm_calls_avoided")
+        return {"message": "Prefill successful.", "query": request.query, "detected_variables": detected_variables}
+
+    unresolved_keys = set(unresolved)
     variables_for_prompt = [
         {"key": v.key, "label": v.label, "description": v.description}
         for v in template.variables
+        if v.key in unresolved_keys
     ]
 
     try:
-        detected_variables = await prefiller_agent.process({
+        metrics.increment("prefill.llm_calls")
+        llm_variables = await prefiller_agent.process({
             "query": request.query,
             "variables_json": json.dumps(variables_for_prompt, indent=2)
         })
+        metrics.increment("prefill.llm_filled_variables", len(llm_variables))
+        # Rule matches are authoritative; the LLM only adds what they missed
+        detected_variables = {**{k: v for k, v in llm_variables.items() if k in unresolved_keys}, **detected_variables}
 
         return {"message": "Prefill successful.", "query": request.query, "detected_variables": detected_variables}
 
@@ -51,23 +69,18 @@ async def generate_questions(request: GenerateQuestionsRequest):
         if var.required and var.key not in request.filled_variables
     ]
 
-    # Create a list of tasks to generate questions concurrently
-    question_generation_tasks = []
-    for var in template.variables:
-        if var.required and var.key not in request.filled_variables:
-            task = question_generator_agent.process({
-                "label": var.label,
-                "description": var.description
-            })
-            question_generation_tasks.append(task)
-
-    # Execute all question generation tasks in parallel
-    generated_questions = await asyncio.gather(*question_generation_tasks)
+    # Questions are generated once per label/description and stored on the
+    # variable; only ones never generated (or since edited) hit the LLM here.
+    generated = {var.id: var.question for var in missing_vars if not needs_question(var)}
+    stale = [var for var in missing_vars if var.id not in generated]
+    if stale:
+        logging.info(f"Generating {len(stale)} missing questions for template {request.template_id}.")
+        generated.update(await persist_questions(stale))
 
     # Combine the results with the variable keys
     questions_to_ask = [
-        {"key": var.key, "question": question, "example": var.example}
-        for var, question in zip(missing_vars, generated_questions)
+        {"key": var.key, "question": generated.get(var.id), "example": var.example}
+        for var in missing_vars
     ]
 
     return {"missing_variables_questions": questions_to_ask}
@@ -0,0 +1,192 @@
+import io
+import os
+import glob
+import asyncio
+import logging
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from backend.app.utils.metrics import metrics
+from backend.app.services.file_storage import file_storage
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PREVIEWABLE_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg"}
+JPEG_QUALITY = 80
+# Page sizes come from the PDF and can be pathological (1pt x 14400pt).
+# Tall pages are cropped from the top to this height:width ratio, and
+# anything that would still rasterise to more pixels is refused.
+MAX_PAGE_ASPECT = 4
+MAX_PREVIEW_PIXELS = 4_000_000
+
+
+class PreviewUnavailable(Exception):
+    pass
+
+
+# ---------------------------
+# RENDERING (runs in worker processes)
+# ---------------------------
+def _render_pdf_page(path: str, page: int, width: int) -> bytes:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as pdf:
+        if page >= pdf.page_count:
+            raise PreviewUnavailable(f"Document has {pdf.page_count} pages")
+        pdf_page = pdf.load_page(page)
+        rect = pdf_page.rect
+        if rect.width <= 0 or rect.height <= 0:
+            raise PreviewUnavailable("Page has no area")
+        zoom = width / rect.width
+        clip = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + min(rect.height, rect.width * MAX_PAGE_ASPECT))
+        height = clip.height * zoom
+        if height < 1 or width * height > MAX_PREVIEW_PIXELS:
+            raise PreviewUnavailable(f"Page of {rect.width:g}x{rect.height:g}pt cannot be previewed at width {width}")
+        pixmap = pdf_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+        return pixmap.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+
+
+def _render_image(path: str, width: int) -> bytes:
+    from PIL import Image
+
+    # Pillow only warns between MAX_IMAGE_PIXELS and twice that; refuse those too
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        try:
+            with Image.open(path) as image:
+                image = image.convert("RGB")
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+                out = io.BytesIO()
+                image.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+                return out.getvalue()
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+            raise PreviewUnavailable(f"Image is too large to preview: {e}")
+
+
+def render_preview(path: str, extension: str, page: int, width: int) -> bytes:
+    if extension == ".pdf":
+        return _render_pdf_page(path, page, width)
+    if page != 0:
+        raise PreviewUnavailable("Images have a single page")
+    return _render_image(path, width)
+
+
+# ---------------------------
+# SERVICE
+# ---------------------------
+class PreviewService:
+    """
+    Page thumbnails rendered in a process pool (rasterising is CPU bound
+    and holds the GIL) and cached on disk under cache_dir/ab/<hash>_p<page>_w<width>.jpg.
+    Files are content addressed, so a cached preview never goes stale;
+    previews are evicted when their blob is deleted. Concurrent requests
+    for the same preview share one render.
+    """
+
+    def __init__(self, cache_dir: str, sizes: List[int], workers: int):
+        self.cache_dir = cache_dir
+        self.sizes = sorted(sizes)
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _reset_pool(self, broken: ProcessPoolExecutor):
+        """Drop a pool whose worker died; the next render starts a fresh one."""
+        if self._pool is broken:
+            self._pool = None
+            broken.shutdown(wait=False, cancel_futures=True)
+            metrics.increment("previews.pool_resets")
+
+    def cache_path(self, content_hash: str, page: int, width: int) -> str:
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}_p{page}_w{width}.jpg")
+
+    def evict(self, content_hash: str) -> int:
+        """Remove every cached preview of a blob (once the blob itself is deleted)."""
+        removed = 0
+        for path in glob.glob(os.path.join(self.cache_dir, content_hash[:2], f"{glob.escape(content_hash)}_*")):
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def fit_width(self, width: Optional[int]) -> int:
+        """Snap a requested width to the nearest configured size (bounds the cache)."""
+        if not width:
+            return self.sizes[0]
+        return min(self.sizes, key=lambda size: (abs(size - width), -size))
+
+    async def get_preview(self, content_hash: str, extension: str, page: int = 0, width: Optional[int] = None) -> str:
+        """Path of the cached JPEG preview, rendering it first if needed."""
+        extension = extension.lower()
+        if extension not in PREVIEWABLE_EXTENSIONS:
+            raise PreviewUnavailable(f"No preview for {extension or 'unknown'} files")
+        if page < 0:
+            raise PreviewUnavailable("Page must be >= 0")
+
+        width = self.fit_width(width)
+        path = self.cache_path(content_hash, page, width)
+        if os.path.exists(path):
+            metrics.increment("previews.cache_hits")
+            return path
+
+        pending = self._inflight.get(path)
+        if pending is None:
+            pending = asyncio.ensure_future(self._render(content_hash, extension, page, width, path))
+            self._inflight[path] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(path, None))
+        return await asyncio.shield(pending)
+
+    async def _render(self, content_hash: str, extension: str, page: int, width: int, path: str) -> str:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with file_storage.local_copy(content_hash) as source:
+            pool = self._ensure_pool()
+            try:
+                data = await loop.run_in_executor(pool, render_preview, source, extension, page, width)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed on a hostile file); later renders must not inherit it
+                self._reset_pool(pool)
+                logger.warning(f"Preview worker crashed rendering {content_hash} page {page}")
+                raise PreviewUnavailable("Preview renderer failed on this file")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        metrics.increment("previews.rendered")
+        metrics.observe("previews.render_seconds", loop.time() - started)
+        return path
+
+    async def warm(self, content_hash: str, extension: str):
+        """Render the first-page thumbnail ahead of the first list view; never raises."""
+        try:
+            await self.get_preview(content_hash, extension, 0, self.sizes[0])
+        except PreviewUnavailable:
+            pass
+        except Exception as e:
+            logger.warning(f"Preview warm-up failed for {content_hash}: {e}")
+
+
+preview_service = PreviewService(
+    cache_dir=settings.PREVIEW_CACHE_DIR,
+    sizes=settings.PREVIEW_SIZES,
+    workers=settings.PREVIEW_WORKERS,
+)
@@ -0,0 +1,264 @@
+import re
+import logging
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from backend.core.config import settings
+
+try:
+    import phonenumbers
+except ImportError:
+    phonenumbers = None
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------
+# BUILT-IN EXTRACTORS
+# -----------------------------------------------------------
+MONTHS = {
+    name: idx
+    for idx, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ], start=1)
+    for name in names
+}
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+ISO_DATE_PATTERN = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+NUMERIC_DATE_PATTERN = re.compile(r"\b(\d{1,2})[/.](\d{1,2})[/.](\d{4})\b")
+DAY_MONTH_PATTERN = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTH_NAMES})\.?,?\s+(\d{{4}})\b", re.IGNORECASE)
+MONTH_DAY_PATTERN = re.compile(rf"\b({_MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b", re.IGNORECASE)
+
+AMOUNT_PATTERN = re.compile(
+    r"(?:(?P<prefix>[$€£₹]|\b(?:USD|EUR|GBP|INR|Rs\.?)\s?)\s*(?P<num1>\d[\d,]*(?:\.\d+)?)"
+    r"|(?P<num2>\d[\d,]*(?:\.\d+)?)\s*(?P<suffix>USD|EUR|GBP|INR|dollars|euros|pounds|rupees)\b)",
+    re.IGNORECASE,
+)
+EMAIL_PATTERN = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+PHONE_PATTERN = re.compile(r"(?<![\w+])(\+?\d[\d\s().-]{7,}\d)(?!\w)")
+# Phone-like runs that are really dates (2024-01-01, 01/02/2024) or ranges of them
+PHONE_DATE_PATTERN = re.compile(r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.]\d{1,2}[/.]\d{4}")
+REFERENCE_PATTERN = r"\b{kind}\s*(?:no\.?|number|num\.?|#|id)?\s*[:#]?\s*([A-Z0-9][A-Z0-9/-]{{3,}})\b"
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def extract_dates(text: str) -> List[str]:
+    """Find dates in common legal-letter formats, normalised to YYYY-MM-DD."""
+    found = []
+    for m in ISO_DATE_PATTERN.finditer(text):
+        found.append(_safe_date(int(m.group(1)), int(m.group(2)), int(m.group(3))))
+    for m in NUMERIC_DATE_PATTERN.finditer(text):
+        # Day-first, as in the jurisdictions the templates target
+        found.append(_safe_date(int(m.group(3)), int(m.group(2)), int(m.group(1))))
+    for m in DAY_MONTH_PATTERN.finditer(text):
+        found.append(_safe_date(int(m.group(3)), MONTHS[m.group(2).lower()], int(m.group(1))))
+    for m in MONTH_DAY_PATTERN.finditer(text):
+        found.append(_safe_date(int(m.group(3)), MONTHS[m.group(1).lower()], int(m.group(2))))
+    return [d for d in found if d]
+
+
+def extract_amounts(text: str) -> List[str]:
+    """Find currency amounts ("$1,200", "5000 USD"), keeping the matched text."""
+    return [m.group(0).strip() for m in AMOUNT_PATTERN.finditer(text)]
+
+
+def extract_emails(text: str) -> List[str]:
+    return EMAIL_PATTERN.findall(text)
+
+
+def _is_phone(candidate: str) -> bool:
+    if PHONE_DATE_PATTERN.search(candidate):
+        return False
+    digits = re.sub(r"\D", "", candidate)
+    if not 10 <= len(digits) <= 15:
+        return False
+    if phonenumbers is not None and (candidate.startswith("+") or settings.PREFILL_PHONE_REGION):
+        try:
+            return phonenumbers.is_valid_number(phonenumbers.parse(candidate, settings.PREFILL_PHONE_REGION))
+        except phonenumbers.NumberParseException:
+            return False
+    return True
+
+
+def extract_phones(text: str) -> List[str]:
+    """Phone numbers: 10-15 digits, not date-shaped; validated with phonenumbers when installed."""
+    return [candidate.strip() for candidate in PHONE_PATTERN.findall(text) if _is_phone(candidate.strip())]
+
+
+def _reference_extractor(kind: str) -> Callable[[str], List[str]]:
+    pattern = re.compile(REFERENCE_PATTERN.format(kind=kind), re.IGNORECASE)
+
+    def extract(text: str) -> List[str]:
+        return [value for value in pattern.findall(text) if any(ch.isdigit() for ch in value)]
+
+    return extract
+
+
+EXTRACTORS: Dict[str, Callable[[str], List[str]]] = {
+    "date": extract_dates,
+    "amount": extract_amounts,
+    "email": extract_emails,
+    "phone": extract_phones,
+    "policy_number": _reference_extractor("policy"),
+    "case_number": _reference_extractor("case"),
+}
+
+TYPE_ALIASES = {
+    "date": "date",
+    "datetime": "date",
+    "amount": "amount",
+    "currency": "amount",
+    "money": "amount",
+    "email": "email",
+    "phone": "phone",
+    "tel": "phone",
+}
+
+
+def infer_kind(variable) -> Optional[str]:
+    """Pick a built-in extractor from the variable's type, falling back to its key."""
+    kind = TYPE_ALIASES.get((variable.type or "").lower())
+    if kind:
+        return kind
+
+    key = (variable.key or "").lower()
+    if "email" in key:
+        return "email"
+    if "phone" in key or "mobile" in key:
+        return "phone"
+    if "policy" in key and ("number" in key or "no" in key.split("_")):
+        return "policy_number"
+    if "case" in key and ("number" in key or "no" in key.split("_")):
+        return "case_number"
+    if key.endswith("_date") or key.startswith("date_") or key == "date":
+        return "date"
+    if "amount" in key or key.endswith(("_fee", "_price", "_rent", "_salary")):
+        return "amount"
+    return None
+
+
+# -----------------------------------------------------------
+# PER-TEMPLATE RULES
+# -----------------------------------------------------------
+class VariableRule:
+    """How one template variable can be extracted without the LLM."""
+
+    __slots__ = ("key", "pattern", "enum_patterns", "kind")
+
+    def __init__(self, key: str, pattern=None, enum_patterns=None, kind: Optional[str] = None):
+        self.key = key
+        self.pattern = pattern
+        self.enum_patterns = enum_patterns or []
+        self.kind = kind
+
+
+# Compiled rule sets keyed by (template id, updatedAt), like the body cache.
+_compiled_rules = LRUCache(maxsize=256)
+
+# Template regexes are user supplied and Python's re has no timeout, so
+# they are bounded instead: short patterns, no nested quantifiers (the
+# classic catastrophic-backtracking shape), and only the head of the query.
+MAX_RULE_REGEX_CHARS = 200
+MAX_RULE_INPUT_CHARS = 2000
+NESTED_QUANTIFIER_PATTERN = re.compile(r"\((?:[^()\\]|\\.)*[+*}](?:[^()\\]|\\.)*\)\s*(?:[+*]|\{\d*,)")
+
+
+def compile_user_regex(key: str, source: str):
+    """Compile a template variable's regex, or None when it is invalid or unsafe to run."""
+    if len(source) > MAX_RULE_REGEX_CHARS:
+        logger.warning(f"Ignoring regex for variable {key}: longer than {MAX_RULE_REGEX_CHARS} characters")
+        return None
+    if NESTED_QUANTIFIER_PATTERN.search(source):
+        logger.warning(f"Ignoring regex for variable {key}: nested quantifiers can backtrack catastrophically")
+        return None
+    try:
+        return re.compile(source, re.IGNORECASE)
+    except re.error as e:
+        logger.warning(f"Ignoring invalid regex for variable {key}: {e}")
+        return None
+
+
+def compile_rules(variables) -> List[VariableRule]:
+    rules = []
+    for var in variables:
+        pattern = compile_user_regex(var.key, var.regex) if var.regex else None
+
+        enum_patterns = [
+            (value, re.compile(rf"(?<!\w){re.escape(value)}(?!\w)", re.IGNORECASE))
+            for value in (var.enum or [])
+            if value
+        ]
+        rules.append(VariableRule(var.key, pattern, enum_patterns, infer_kind(var)))
+    return rules
+
+
+def get_template_rules(template) -> List[VariableRule]:
+    cache_key = (template.id, template.updatedAt)
+    rules = _compiled_rules.get(cache_key)
+    if rules is None:
+        rules = compile_rules(template.variables or [])
+        _compiled_rules[cache_key] = rules
+    return rules
+
+
+# -----------------------------------------------------------
+# EXTRACTION
+# -----------------------------------------------------------
+def _match_regex(pattern, query: str) -> Optional[str]:
+    match = pattern.search(query[:MAX_RULE_INPUT_CHARS])
+    if not match:
+        return None
+    value = match.group(1) if pattern.groups else match.group(0)
+    return value.strip() if value else None
+
+
+def _match_enum(enum_patterns, query: str) -> Optional[str]:
+    matched = {value for value, pattern in enum_patterns if pattern.search(query)}
+    return matched.pop() if len(matched) == 1 else None
+
+
+def rule_prefill(template, query: str) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Fill whatever variables can be extracted deterministically from the
+    query. Returns (filled values, unresolved keys). Type-based extractors
+    only fill a variable when the query holds exactly one candidate and no
+    other variable competes for the same kind, so ambiguous values are left
+    for the LLM.
+    """
+    rules = get_template_rules(template)
+    filled: Dict[str, str] = {}
+
+    kind_counts: Dict[str, int] = {}
+    for rule in rules:
+        if rule.kind and not rule.pattern and not rule.enum_patterns:
+            kind_counts[rule.kind] = kind_counts.get(rule.kind, 0) + 1
+
+    candidates_by_kind: Dict[str, List[str]] = {}
+    for rule in rules:
+        value = None
+        if rule.pattern is not None:
+            value = _match_regex(rule.pattern, query)
+        elif rule.enum_patterns:
+            value = _match_enum(rule.enum_patterns, query)
+        elif rule.kind and kind_counts[rule.kind] == 1:
+            if rule.kind not in candidates_by_kind:
+                candidates_by_kind[rule.kind] = list(dict.fromkeys(EXTRACTORS[rule.kind](query)))
+            candidates = candidates_by_kind[rule.kind]
+            if len(candidates) == 1:
+                value = candidates[0]
+
+        if value:
+            filled[rule.key] = value
+
+    unresolved = [rule.key for rule in rules if rule.key not in filled]
+    return filled, unresolved
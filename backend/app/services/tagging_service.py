@@ -0,0 +1,143 @@
+import json
+import hashlib
+import logging
+from functools import cached_property
+from typing import Dict, List, Optional
+
+from cachetools import TTLCache
+
+from backend.db.database import db
+from backend.app.utils.aho_corasick import AhoCorasick
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Keywords that drove the original hard-coded insight tags
+DEFAULT_TAG_DICTIONARY: Dict[str, List[str]] = {
+    "finance": ["invoice", "invoices", "amount", "amounts"],
+    "legal": ["agreement", "agreements", "terms"],
+    "hr": ["resume", "curriculum vitae"],
+    "report": ["report", "reports"],
+}
+
+MAX_POSITIONS_PER_TAG = 20
+
+
+class KeywordTagger:
+    """Tags text from a {tag: [phrases]} dictionary in one Aho-Corasick pass."""
+
+    def __init__(self, dictionary: Dict[str, List[str]]):
+        self.dictionary = dictionary
+        self._automaton = AhoCorasick()
+        for tag, phrases in dictionary.items():
+            for phrase in phrases:
+                self._automaton.add(phrase, (tag, phrase.strip().lower()))
+        self._automaton.build()
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Stable hash of the dictionary; changes whenever tagging results could."""
+        canonical = json.dumps(
+            {tag: sorted(p.strip().lower() for p in phrases) for tag, phrases in self.dictionary.items()},
+            sort_keys=True,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def phrase_count(self) -> int:
+        return self._automaton.size
+
+    def tag(self, text: str) -> Dict:
+        """
+        Returns {"tags": [...], "matches": {tag: {count, phrases, positions}}};
+        positions are [start, end) character offsets, capped per tag.
+        """
+        matches: Dict[str, Dict] = {}
+        for start, end, (tag, phrase) in self._automaton.iter_matches(text or ""):
+            entry = matches.setdefault(tag, {"count": 0, "phrases": {}, "positions": []})
+            entry["count"] += 1
+            entry["phrases"][phrase] = entry["phrases"].get(phrase, 0) + 1
+            if len(entry["positions"]) < MAX_POSITIONS_PER_TAG:
+                entry["positions"].append([start, end])
+        return {"tags": sorted(matches), "matches": matches}
+
+
+def load_base_dictionary() -> Dict[str, List[str]]:
+    """The file dictionary from TAG_DICTIONARY_PATH, or the built-in defaults."""
+    path = settings.TAG_DICTIONARY_PATH
+    if not path:
+        return DEFAULT_TAG_DICTIONARY
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {str(tag): [str(p) for p in phrases] for tag, phrases in data.items()}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.error(f"Failed to load tag dictionary {path}: {e}; using defaults")
+        return DEFAULT_TAG_DICTIONARY
+
+
+class TaggerRegistry:
+    """
+    Compiled taggers per org: the base dictionary merged with the org's
+    own phrases from the tag_keywords table. Compiled automatons are
+    cached for TAG_CACHE_TTL_SECONDS and dropped when an org edits its
+    dictionary.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self._cache = TTLCache(maxsize=256, ttl=ttl_seconds)
+        self._default: Optional[KeywordTagger] = None
+
+    def default(self) -> KeywordTagger:
+        if self._default is None:
+            self._default = KeywordTagger(load_base_dictionary())
+        return self._default
+
+    async def get(self, org_id: Optional[str]) -> KeywordTagger:
+        if not org_id:
+            return self.default()
+        tagger = self._cache.get(org_id)
+        if tagger is not None:
+            return tagger
+
+        dictionary = {tag: list(phrases) for tag, phrases in load_base_dictionary().items()}
+        for row in await db.tagkeyword.find_many(where={"orgId": org_id}):
+            dictionary.setdefault(row.tag, []).append(row.phrase)
+        tagger = KeywordTagger(dictionary)
+        self._cache[org_id] = tagger
+        return tagger
+
+    def invalidate(self, org_id: str):
+        self._cache.pop(org_id, None)
+
+
+tagger_registry = TaggerRegistry(ttl_seconds=settings.TAG_CACHE_TTL_SECONDS)
+
+
+# ---------------------------
+# ORG DICTIONARY
+# ---------------------------
+async def get_org_dictionary(org_id: str) -> Dict[str, List[str]]:
+    rows = await db.tagkeyword.find_many(where={"orgId": org_id}, order={"tag": "asc"})
+    dictionary: Dict[str, List[str]] = {}
+    for row in rows:
+        dictionary.setdefault(row.tag, []).append(row.phrase)
+    return dictionary
+
+
+async def replace_org_dictionary(org_id: str, dictionary: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Replace an org's phrases; the base dictionary always still applies."""
+    rows = {
+        (tag.strip().lower(), phrase.strip().lower())
+        for tag, phrases in dictionary.items()
+        for phrase in phrases
+        if tag.strip() and phrase.strip()
+    }
+    async with db.tx() as tx:
+        await tx.tagkeyword.delete_many(where={"orgId": org_id})
+        if rows:
+            await tx.tagkeyword.create_many(data=[
+                {"orgId": org_id, "tag": tag, "phrase": phrase} for tag, phrase in sorted(rows)
+            ])
+    tagger_registry.invalidate(org_id)
+    return await get_org_dictionary(org_id)
@@ -0,0 +1,137 @@
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiofiles
+
+from backend.core.config import settings
+from backend.app.services.export_service import export_filled_document, iter_filled_documents_zip
+from backend.app.services.docx_skeleton_cache import docx_skeleton_cache
+from backend.app.services.export_cache import export_output_cache
+from backend.app.services.export_artifacts import export_artifacts
+from backend.app.services.markdown_pdf import render_markdown_pdf
+from backend.app.services.template_service import get_compiled_template, render_and_persist_drafts
+from backend.app.utils.placeholders import missing_variables
+
+MEDIA_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+    "zip": "application/zip",
+}
+
+
+def export_filename(template, extension: str, suffix: str = "") -> str:
+    return f"{template.title.replace(' ', '_').replace('/', '_')}{suffix}.{extension}"
+
+
+def uses_native_pdf(export_type: str) -> bool:
+    return export_type == "pdf" and settings.PDF_EXPORT_ENGINE == "native"
+
+
+def export_cache_key(template, variables: Dict, export_type: str) -> str:
+    return export_output_cache.make_key(
+        template.id, template.updatedAt, variables, export_type,
+        variant="native" if uses_native_pdf(export_type) else ""
+    )
+
+
+def render_native_pdf(template, variables: Dict, unfilled: set) -> str:
+    """Render a markdown template straight to PDF with ReportLab."""
+    segments = get_compiled_template(template)
+    unfilled.update(missing_variables(segments, variables))
+    pdf_bytes = render_markdown_pdf(template.bodyMd, template.title, variables=variables)
+    pdf_path = export_artifacts.new_path(".pdf")
+    with open(pdf_path, "wb") as f:
+        f.write(pdf_bytes)
+    return pdf_path
+
+
+async def render_template_export(template, variables: Dict, export_type: str) -> Tuple[str, List[str], bool, List[str]]:
+    """
+    Produce the filled artifact for a stored template, serving it from the
+    export cache when this template version + variables were rendered before.
+    Degraded (fallback) output is served once and never cached.
+
+    Returns:
+        (artifact path, unfilled placeholder keys, whether the path is in the cache,
+         degradations such as "pdf-fallback")
+    """
+    cache_key = export_cache_key(template, variables, export_type)
+    cached = await asyncio.to_thread(export_output_cache.get, cache_key, export_type)
+    if cached:
+        cached_path, meta = cached
+        return cached_path, meta.get("unfilled", []), True, []
+
+    unfilled = set()
+    degraded = set()
+    if uses_native_pdf(export_type):
+        output_path = await asyncio.to_thread(render_native_pdf, template, variables, unfilled)
+    else:
+        template_source = await asyncio.to_thread(docx_skeleton_cache.get, template)
+        output_path = await export_filled_document(
+            template_source, variables, export_type, unfilled=unfilled, degraded=degraded
+        )
+
+    if degraded:
+        # Fallback output is never cached, so the next request retries LibreOffice
+        return output_path, sorted(unfilled), False, sorted(degraded)
+
+    # put() moves the file and scans the cache directory for eviction
+    cached_path = await asyncio.to_thread(
+        export_output_cache.put, cache_key, export_type, output_path, {"unfilled": sorted(unfilled)}
+    )
+    if cached_path == output_path:
+        return output_path, sorted(unfilled), False, []
+
+    export_artifacts.detach(output_path)
+    return cached_path, sorted(unfilled), True, []
+
+
+async def write_batch_zip(
+    template,
+    variable_sets: List[Dict[str, str]],
+    export_type: str,
+    dest_path: str,
+    progress: Optional[Callable[[int], None]] = None,
+):
+    """Render a mail-merge ZIP for a template into dest_path."""
+    template_source = await asyncio.to_thread(docx_skeleton_cache.get, template)
+    name_prefix = template.title.replace(' ', '_').replace('/', '_')
+    async with aiofiles.open(dest_path, "wb") as f:
+        async for chunk in iter_filled_documents_zip(
+            template_source, variable_sets, export_type, name_prefix, progress=progress
+        ):
+            if chunk:
+                await f.write(chunk)
+
+
+# -----------------------------------------------------------
+# ASYNC EXPORT JOB RUNNERS
+# -----------------------------------------------------------
+async def run_single_export_job(job, template, variables: Dict, export_type: str):
+    output_path, unfilled, cached, degraded = await render_template_export(template, variables, export_type)
+    if cached:
+        # The cache may evict its entry inside the job's retention window
+        output_path = await asyncio.to_thread(export_artifacts.adopt_copy, output_path, f".{export_type}")
+    job.artifact_path = output_path
+    job.artifact_is_scratch = True
+    job.unfilled = unfilled
+    job.degraded = degraded
+    job.filename = export_filename(template, export_type)
+    job.media_type = MEDIA_TYPES[export_type]
+    job.set_progress(1)
+
+
+async def run_batch_export_job(job, template, variable_sets: List[Dict[str, str]], export_type: str, org_id: str, user_query: str = ""):
+    await render_and_persist_drafts(template, variable_sets, org_id, user_query)
+
+    zip_path = export_artifacts.new_path(".zip")
+    job.artifact_path = zip_path
+    job.artifact_is_scratch = True
+    try:
+        await write_batch_zip(template, variable_sets, export_type, zip_path, progress=job.set_progress)
+    except Exception:
+        export_artifacts.release(zip_path)
+        job.artifact_path = None
+        raise
+    job.filename = export_filename(template, "zip", suffix="_batch")
+    job.media_type = MEDIA_TYPES["zip"]
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List
+
+from backend.db.database import db
+from backend.app.agent.question_generator import question_generator_agent
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_PAGE_SIZE = 200
+
+
+def question_fingerprint(label: str, description: str) -> str:
+    """Hash of the inputs a question is generated from; a mismatch marks it stale."""
+    material = f"{label or ''}\x1f{description or ''}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def needs_question(variable) -> bool:
+    return not variable.question or variable.questionSource != question_fingerprint(variable.label, variable.description)
+
+
+async def generate_questions_for(variables: List[Dict]) -> Dict[str, str]:
+    """
+    Generate questions for [{key, label, description}], batching through
+    JSON mode and falling back to per-variable calls for omitted keys.
+    """
+    if not variables:
+        return {}
+
+    generated = await question_generator_agent.process_batch(variables)
+
+    omitted = [var for var in variables if var["key"] not in generated]
+    if omitted:
+        logger.info(f"Batch omitted {len(omitted)} questions; generating individually.")
+        fallback_questions = await asyncio.gather(*[
+            question_generator_agent.process({
+                "label": var["label"],
+                "description": var["description"]
+            })
+            for var in omitted
+        ])
+        generated.update({var["key"]: q for var, q in zip(omitted, fallback_questions)})
+
+    return generated
+
+
+async def persist_questions(variables) -> Dict[str, str]:
+    """
+    Generate and store questions for TemplateVariable records. Returns
+    {variable id: question}.
+    """
+    if not variables:
+        return {}
+
+    generated = await generate_questions_for([
+        {"key": var.id, "label": var.label, "description": var.description}
+        for var in variables
+    ])
+
+    async with db.batch_() as batcher:
+        for var in variables:
+            question = generated.get(var.id)
+            if not question:
+                continue
+            batcher.templatevariable.update(
+                where={"id": var.id},
+                data={
+                    "question": question,
+                    "questionSource": question_fingerprint(var.label, var.description),
+                },
+            )
+    return generated
+
+
+async def generate_template_questions(template_id: str) -> int:
+    """Fill in missing or stale questions for one template's variables."""
+    try:
+        variables = await db.templatevariable.find_many(where={"templateId": template_id})
+        stale = [var for var in variables if needs_question(var)]
+        await persist_questions(stale)
+        return len(stale)
+    except Exception as e:
+        logger.error(f"Question generation failed for template {template_id}: {e}", exc_info=True)
+        return 0
+
+
+async def backfill_template_questions() -> int:
+    """
+    Walk every template variable in id order and regenerate questions that
+    are missing or whose label/description changed since generation.
+    """
+    updated = 0
+    cursor = None
+    while True:
+        page = await db.templatevariable.find_many(
+            take=BACKFILL_PAGE_SIZE,
+            skip=1 if cursor else 0,
+            cursor={"id": cursor} if cursor else None,
+            order={"id": "asc"},
+        )
+        if not page:
+            break
+        cursor = page[-1].id
+
+        stale = [var for var in page if needs_question(var)]
+        try:
+            await persist_questions(stale)
+            updated += len(stale)
+        except Exception as e:
+            logger.error(f"Question backfill failed for page ending at {cursor}: {e}", exc_info=True)
+
+    logger.info(f"Question backfill finished; {updated} variables updated.")
+    return updated
@@ -1,15 +1,78 @@
 import os
-from fastapi import UploadFile, File, HTTPException, Depends
+import csv
+import io
+import json
+from typing import Dict, List
+from cachetools import LRUCache
+from fastapi import UploadFile, File, HTTPException, Depends, BackgroundTasks
 from backend.app.agent.templatizer import templatizer_agent
-from backend.app.tasks.document_tasks import extract_text_from_file
+from backend.app.utils.document_text_extract import extract_text_from_file
 from backend.app.utils.uploads import UPLOAD_DIR
 import yaml
 import logging
 from backend.app.utils.schemas import TemplateIn, TemplateOut
 from backend.db.database import db
 from backend.app.agent.bootstrap_agent import bootstrap_agent
-from backend.app.models.models import FillTemplateRequest, DraftRequest
+from backend.app.services.template_question_service import generate_template_questions
+from backend.app.models.models import FillTemplateRequest, DraftRequest, BatchFillRequest
 from backend.app.utils.dependencies import get_org_id
+from backend.app.utils.placeholders import compile_template_body, missing_variables, render_draft
+
+
+# Parsed template bodies keyed by (template id, updatedAt) so an edited
+# template never serves a stale parse.
+_compiled_templates = LRUCache(maxsize=256)
+
+BATCH_FILL_MAX_ROWS = 5000
+INSTANCE_INSERT_CHUNK = 500
+
+
+# -----------------------------------------------------------
+# TEMPLATE BODY PARSING / RENDERING
+# -----------------------------------------------------------
+def get_compiled_template(template) -> List[str]:
+    cache_key = (template.id, template.updatedAt)
+    segments = _compiled_templates.get(cache_key)
+    if segments is None:
+        segments = compile_template_body(template.bodyMd)
+        _compiled_templates[cache_key] = segments
+    return segments
+
+
+def parse_variable_sets(filename: str, contents: bytes) -> List[Dict[str, str]]:
+    """
+    Parse an uploaded CSV (header row = variable keys) or JSONL (one object
+    per line) file into a list of variable sets.
+    """
+    ext = os.path.splitext(filename or "")[1].lower()
+    try:
+        text = contents.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Variable file must be UTF-8 encoded.")
+
+    variable_sets = []
+    if ext == ".csv":
+        for row in csv.DictReader(io.StringIO(text)):
+            variable_sets.append({
+                k.strip(): (v or "").strip()
+                for k, v in row.items()
+                if k and k.strip()
+            })
+    elif ext in [".jsonl", ".ndjson"]:
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_no}: {e}")
+            if not isinstance(row, dict):
+                raise HTTPException(status_code=400, detail=f"Line {line_no} is not a JSON object.")
+            variable_sets.append({str(k): str(v) for k, v in row.items()})
+    else:
+        raise HTTPException(status_code=400, detail="Variable file must be .csv or .jsonl")
+
+    return variable_sets
 
 
 # -----------------------------------------------------------
@@ -27,7 +90,7 @@ async def get_all_templates(org_id: str):
 # -----------------------------------------------------------
 # SEARCH / BOOTSTRAP TEMPLATES (ORG SCOPED)
 # -----------------------------------------------------------
-async def find_templates(request: DraftRequest, org_id: str):
+async def find_templates(request: DraftRequest, org_id: str, background_tasks: BackgroundTasks):
 
     query_words = set(request.query.lower().split())
 
@@ -119,6 +182,8 @@ async def find_templates(request: DraftRequest, org_id: str):
                             "example": v.get("example", ""),
                             "required": v.get("required", True),
                             "type": v.get("type", "string"),
+                            "regex": v.get("regex"),
+                            "enum": [str(e) for e in v.get("enum") or []],
                         }
                         for idx, v in enumerate(variables_data)
                         if isinstance(v, dict) and v.get("key")
@@ -127,6 +192,9 @@ async def find_templates(request: DraftRequest, org_id: str):
             }
         )
 
+        # Precompute the variable questions off the request path
+        background_tasks.add_task(generate_template_questions, new_template.id)
+
         return {
             "status": "bootstrapped",
             "source_url": new_template_data.get("source_url"),
@@ -171,7 +239,7 @@ async def create_template_from_upload(file: UploadFile, org_id: str):
 # -----------------------------------------------------------
 # SAVE TEMPLATE FROM MARKDOWN (ORG SCOPED)
 # -----------------------------------------------------------
-async def save_template(template_data: TemplateIn, org_id: str):
+async def save_template(template_data: TemplateIn, org_id: str, background_tasks: BackgroundTasks):
 
     try:
         parts = template_data.template_markdown.split("---")
@@ -196,6 +264,9 @@ async def save_template(template_data: TemplateIn, org_id: str):
                     "description": v.get("description", ""),
                     "example": v.get("example", ""),
                     "required": v.get("required", True),
+                    "type": v.get("type", "string"),
+                    "regex": v.get("regex"),
+                    "enum": [str(e) for e in v.get("enum") or []],
                 })
 
         # FIX: orgId NOW INCLUDED
@@ -212,6 +283,9 @@ async def save_template(template_data: TemplateIn, org_id: str):
             }
         )
 
+        if variables_to_create:
+            background_tasks.add_task(generate_template_questions, new_template.id)
+
         return {"message": "Template saved successfully!", "template_id": new_template.id}
 
     except Exception as e:
@@ -230,13 +304,62 @@ async def fill_template(request: FillTemplateRequest, org_id: str):
     if not template:
         raise HTTPException(status_code=404, detail="Template not found.")
 
-    draft = template.bodyMd
-    for key, value in request.variables.items():
-        draft = draft.replace(f"{{{{{key}}}}}", str(value))
+    draft = render_draft(get_compiled_template(template), request.variables)
 
     return {"draft_markdown": draft}
 
 
+# -----------------------------------------------------------
+# BATCH FILL (MAIL MERGE)
+# -----------------------------------------------------------
+async def render_and_persist_drafts(template, variable_sets: List[Dict[str, str]], org_id: str, user_query: str = "") -> List[str]:
+    """
+    Render one draft per variable set from a single parse of the template and
+    store them as Instance rows using bulk inserts.
+    """
+    if not variable_sets:
+        raise HTTPException(status_code=400, detail="At least one variable set is required.")
+    if len(variable_sets) > BATCH_FILL_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {BATCH_FILL_MAX_ROWS} variable sets.")
+
+    segments = get_compiled_template(template)
+    drafts = [render_draft(segments, variables) for variables in variable_sets]
+
+    rows = [
+        {
+            "orgId": org_id,
+            "templateId": template.id,
+            "userQuery": user_query,
+            "answersJson": json.dumps(variables, ensure_ascii=False),
+            "draftMd": draft,
+        }
+        for variables, draft in zip(variable_sets, drafts)
+    ]
+    for start in range(0, len(rows), INSTANCE_INSERT_CHUNK):
+        await db.instance.create_many(data=rows[start:start + INSTANCE_INSERT_CHUNK])
+
+    return drafts
+
+
+async def batch_fill_template(request: BatchFillRequest, org_id: str):
+
+    template = await db.template.find_unique(
+        where={"id": request.template_id, "orgId": org_id}
+    )
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found.")
+
+    drafts = await render_and_persist_drafts(
+        template, request.variable_sets, org_id, request.user_query
+    )
+
+    return {
+        "template_id": template.id,
+        "count": len(drafts),
+        "drafts": [{"index": idx, "draft_markdown": d} for idx, d in enumerate(drafts)],
+    }
+
+
 # -----------------------------------------------------------
 # GET TEMPLATE BY ID
 # -----------------------------------------------------------
@@ -0,0 +1,293 @@
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from backend.app.utils.metrics import metrics
+from backend.app.utils.uploads import ALLOWED_EXTENSIONS
+from backend.app.services.file_storage import file_sha256
+from backend.app.services.blob_reference_service import store_blob
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+SESSION_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+DATA_FILE = "data.part"
+META_FILE = "meta.json"
+# flock(2) targets, shared by every worker process. Chunk writers hold
+# DATA_LOCK shared while writing and recording; finalize/abort hold it
+# exclusively. META_LOCK serialises manifest read-modify-writes. Always
+# taken in that order.
+DATA_LOCK = "data.lock"
+META_LOCK = "meta.lock"
+# Contended locks are retried with LOCK_NB on this backoff instead of
+# parking a default-executor thread in a blocking flock call
+LOCK_POLL_MIN_SECONDS = 0.005
+LOCK_POLL_MAX_SECONDS = 0.1
+
+
+def merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    """Sort and coalesce [start, end) ranges, joining ranges that touch."""
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(received: List[List[int]], size: int) -> List[List[int]]:
+    gaps, cursor = [], 0
+    for start, end in received:
+        if start > cursor:
+            gaps.append([cursor, start])
+        cursor = max(cursor, end)
+    if cursor < size:
+        gaps.append([cursor, size])
+    return gaps
+
+
+class UploadSessionStore:
+    """
+    Resumable uploads kept on local disk. Each session is a directory with
+    a preallocated data file that chunks are written into at their offset
+    (pwrite, no reassembly pass) and a small JSON manifest of the byte
+    ranges received so far. Finalising verifies the SHA-256 of the whole
+    file and moves it into file storage. Several worker processes may
+    serve the same session, so coordination uses flock on lock files in
+    the session directory rather than in-process locks.
+    """
+
+    def __init__(self, root: str, ttl_seconds: int, chunk_bytes: int, max_bytes: int):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.chunk_bytes = chunk_bytes
+        self.max_bytes = max_bytes
+
+    # ---------------------------
+    # MANIFEST
+    # ---------------------------
+    def _dir(self, session_id: str) -> str:
+        if not SESSION_ID_RE.match(session_id):
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return os.path.join(self.root, session_id)
+
+    def _read_meta(self, session_id: str, org_id: str) -> Dict:
+        try:
+            with open(os.path.join(self._dir(session_id), META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        if meta["org_id"] != org_id:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        if meta["expires_at"] < time.time():
+            self._remove(session_id)
+            raise HTTPException(status_code=410, detail="Upload session has expired")
+        return meta
+
+    def _write_meta(self, session_id: str, meta: Dict):
+        path = os.path.join(self._dir(session_id), META_FILE)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    @asynccontextmanager
+    async def _flock(self, session_id: str, name: str, operation: int):
+        """Hold flock(operation) on a session lock file; the lock dies with the descriptor."""
+        try:
+            fd = os.open(os.path.join(self._dir(session_id), name), os.O_RDWR | os.O_CREAT, 0o600)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        try:
+            delay = LOCK_POLL_MIN_SECONDS
+            while True:
+                try:
+                    fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, LOCK_POLL_MAX_SECONDS)
+            yield
+        finally:
+            os.close(fd)
+
+    def _remove(self, session_id: str):
+        shutil.rmtree(os.path.join(self.root, session_id), ignore_errors=True)
+
+    def describe(self, session_id: str, meta: Dict) -> Dict:
+        received = meta["received"]
+        return {
+            "session_id": session_id,
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "chunk_size": meta["chunk_size"],
+            "chunks": -(-meta["size"] // meta["chunk_size"]),
+            "received": received,
+            "missing": missing_ranges(received, meta["size"]),
+            "received_bytes": sum(end - start for start, end in received),
+            "complete": received == [[0, meta["size"]]],
+            "expires_at": meta["expires_at"],
+        }
+
+    # ---------------------------
+    # PROTOCOL
+    # ---------------------------
+    async def create(self, org_id: str, filename: str, size: int, sha256: Optional[str]) -> Dict:
+        name = os.path.basename(filename or "")
+        if not name or os.path.splitext(name)[1].lower() not in ALLOWED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail="Unsupported file format")
+        if size <= 0 or size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload size must be between 1 and {self.max_bytes} bytes")
+        if sha256 is not None and not SHA256_RE.match(sha256.lower()):
+            raise HTTPException(status_code=400, detail="sha256 must be 64 hex characters")
+
+        await asyncio.to_thread(self.sweep)
+        session_id = uuid.uuid4().hex
+        directory = os.path.join(self.root, session_id)
+        os.makedirs(directory)
+        # Sparse preallocation: chunks can arrive in any order
+        with open(os.path.join(directory, DATA_FILE), "wb") as f:
+            f.truncate(size)
+
+        meta = {
+            "org_id": org_id,
+            "filename": name,
+            "size": size,
+            "sha256": sha256.lower() if sha256 else None,
+            "chunk_size": self.chunk_bytes,
+            "received": [],
+            "created_at": time.time(),
+            "expires_at": time.time() + self.ttl_seconds,
+        }
+        self._write_meta(session_id, meta)
+        metrics.increment("upload_sessions_created")
+        return self.describe(session_id, meta)
+
+    async def status(self, session_id: str, org_id: str) -> Dict:
+        return self.describe(session_id, self._read_meta(session_id, org_id))
+
+    async def write_chunk(self, session_id: str, org_id: str, index: int, body: AsyncIterator[bytes]) -> Dict:
+        """
+        Write chunk `index` (at offset index * chunk_size) straight from the
+        request stream. Whatever arrived before a disconnect is still
+        recorded, so the client only resends the missing tail.
+        """
+        meta = self._read_meta(session_id, org_id)
+        offset = index * meta["chunk_size"]
+        expected = min(meta["chunk_size"], meta["size"] - offset)
+        if index < 0 or expected <= 0:
+            raise HTTPException(status_code=416, detail="Chunk index out of range")
+
+        written = 0
+        async with self._flock(session_id, DATA_LOCK, fcntl.LOCK_SH):
+            # Finalize or abort may have removed the session while we waited
+            self._read_meta(session_id, org_id)
+            fd = os.open(os.path.join(self._dir(session_id), DATA_FILE), os.O_WRONLY)
+            try:
+                async for data in body:
+                    if written + len(data) > expected:
+                        raise HTTPException(status_code=413, detail=f"Chunk {index} must be {expected} bytes")
+                    await asyncio.to_thread(_pwrite_all, fd, data, offset + written)
+                    written += len(data)
+            finally:
+                os.close(fd)
+                if written:
+                    async with self._flock(session_id, META_LOCK, fcntl.LOCK_EX):
+                        meta = self._read_meta(session_id, org_id)
+                        meta["received"] = merge_ranges(meta["received"] + [[offset, offset + written]])
+                        self._write_meta(session_id, meta)
+                    metrics.increment("upload_session_bytes", written)
+
+        if written != expected:
+            raise HTTPException(status_code=400, detail=f"Chunk {index} was {written} bytes, expected {expected}")
+        return self.describe(session_id, meta)
+
+    async def finalize(
+        self, session_id: str, org_id: str, sha256: Optional[str], register: Callable[[Dict], Awaitable[Any]]
+    ) -> Any:
+        """
+        Verify the assembled file and hand it to file storage, then await
+        register({content_hash, uri, filename}) under the blob lock so the
+        rows it creates are committed before the blob can be released.
+        Returns whatever register returns.
+        """
+        # Exclusive: waits for in-flight chunk writes and blocks new ones
+        async with self._flock(session_id, DATA_LOCK, fcntl.LOCK_EX):
+            meta = self._read_meta(session_id, org_id)
+            described = self.describe(session_id, meta)
+            if not described["complete"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": "Upload is incomplete", "missing": described["missing"]},
+                )
+
+            expected = (sha256 or meta["sha256"] or "").lower()
+            if not SHA256_RE.match(expected):
+                raise HTTPException(status_code=400, detail="sha256 of the whole file is required to finalize")
+
+            data_path = os.path.join(self._dir(session_id), DATA_FILE)
+            actual = await asyncio.to_thread(file_sha256, data_path)
+            if actual != expected:
+                metrics.increment("upload_sessions_hash_mismatch")
+                raise HTTPException(
+                    status_code=422,
+                    detail={"message": "SHA-256 mismatch; re-send the upload", "expected": expected, "actual": actual},
+                )
+
+            async with store_blob(data_path, actual) as stored:
+                result = await register(
+                    {"content_hash": stored.content_hash, "uri": stored.uri, "filename": meta["filename"]}
+                )
+            self._remove(session_id)
+
+        metrics.increment("upload_sessions_completed")
+        return result
+
+    async def abort(self, session_id: str, org_id: str):
+        async with self._flock(session_id, DATA_LOCK, fcntl.LOCK_EX):
+            self._read_meta(session_id, org_id)
+            self._remove(session_id)
+
+    def sweep(self):
+        """Drop expired sessions; runs whenever a new session is created."""
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root, exist_ok=True)
+            return
+        now = time.time()
+        for session_id in os.listdir(self.root):
+            try:
+                with open(os.path.join(self.root, session_id, META_FILE), "r", encoding="utf-8") as f:
+                    expired = json.load(f)["expires_at"] < now
+            except (OSError, ValueError, KeyError):
+                # Manifest not written yet or corrupt; fall back to directory age
+                path = os.path.join(self.root, session_id)
+                expired = os.path.isdir(path) and os.path.getmtime(path) < now - self.ttl_seconds
+            if expired:
+                self._remove(session_id)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int):
+    view = memoryview(data)
+    while view:
+        n = os.pwrite(fd, view, offset)
+        view, offset = view[n:], offset + n
+
+
+upload_sessions = UploadSessionStore(
+    root=settings.UPLOAD_SESSION_DIR,
+    ttl_seconds=settings.UPLOAD_SESSION_TTL_SECONDS,
+    chunk_bytes=settings.UPLOAD_CHUNK_BYTES,
+    max_bytes=settings.UPLOAD_MAX_BYTES,
+)
@@ -0,0 +1,86 @@
+from collections import deque
+from typing import Dict, Hashable, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: every pattern is found in one left-to-right
+    pass over the text, regardless of how many patterns there are.
+    Patterns are matched case-insensitively and, by default, only on word
+    boundaries ("rent" does not match inside "parent").
+    """
+
+    def __init__(self, word_boundaries: bool = True):
+        self.word_boundaries = word_boundaries
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (pattern length, payload) for every pattern ending at a node
+        self._out: List[List[Tuple[int, Hashable]]] = [[]]
+        self._built = False
+        self.size = 0
+
+    def add(self, pattern: str, payload: Hashable):
+        pattern = pattern.strip().lower()
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), payload))
+        self._built = False
+        self.size += 1
+
+    def build(self) -> "AhoCorasick":
+        """Compute failure links breadth-first and fold suffix outputs in."""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Hashable]]:
+        """Yield (start, end, payload) for every match in text."""
+        if not self._built:
+            self.build()
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lowercased; keep offsets aligned
+            lowered = "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+        goto, fail, out = self._goto, self._fail, self._out
+        boundaries = self.word_boundaries
+        length = len(lowered)
+        node = 0
+        for idx, ch in enumerate(lowered):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = idx + 1
+            if boundaries and end < length and (lowered[end].isalnum() or lowered[end] == "_"):
+                continue
+            for pattern_length, payload in out[node]:
+                start = end - pattern_length
+                if boundaries and start > 0 and (lowered[start - 1].isalnum() or lowered[start - 1] == "_"):
+                    continue
+                yield start, end, payload
@@ -0,0 +1,62 @@
+import zlib
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+CODECS = ("zstd", "zlib")
+
+
+def available_codec(preferred: Optional[str] = None) -> str:
+    """The preferred codec when usable; zstd needs the optional zstandard package."""
+    preferred = (preferred or "zstd").lower()
+    if preferred == "zstd" and zstandard is None:
+        return "zlib"
+    if preferred not in CODECS:
+        raise ValueError(f"Unknown compression codec: {preferred}")
+    return preferred
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("Payload is zstd compressed; install zstandard to read it")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        _require_zstd()
+        # Frames written by compress() carry their content size
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def decompress_prefix(data: bytes, codec: str, max_bytes: int) -> bytes:
+    """The first `max_bytes` of the decompressed data, without inflating the rest."""
+    if codec == "zstd":
+        _require_zstd()
+        out = bytearray()
+        with zstandard.ZstdDecompressor().stream_reader(data) as reader:
+            while len(out) < max_bytes:
+                chunk = reader.read(max_bytes - len(out))
+                if not chunk:
+                    break
+                out += chunk
+        return bytes(out)
+    if codec == "zlib":
+        return zlib.decompressobj().decompress(data, max_bytes)
+    raise ValueError(f"Unknown compression codec: {codec}")
@@ -20,9 +20,10 @@ def extract_text_with_pdfminer(file_path: str) -> str:
 
 import docx
 
-async def extract_text_from_file(file_path: str) -> str:
+async def extract_text_from_file(file_path: str, extension: str = None) -> str:
+    """`extension` overrides the path's own, for content-addressed blobs stored without one."""
     try:
-        extension = os.path.splitext(file_path)[-1].lower()
+        extension = (extension or os.path.splitext(file_path)[-1]).lower()
 
         if extension == ".pdf":
             text = extract_text_with_pdfminer(file_path)
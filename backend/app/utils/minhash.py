@@ -0,0 +1,78 @@
+import re
+import hashlib
+from typing import List, Optional
+
+WORD_PATTERN = re.compile(r"\w+")
+EMPTY_SLOT = -1
+_HASH_BITS = 64
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def shingles(text: str, size: int = 5) -> List[bytes]:
+    """Overlapping word n-grams of lowercased text (the whole text if shorter)."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words).encode()] if words else []
+    return [" ".join(words[i:i + size]).encode() for i in range(len(words) - size + 1)]
+
+
+def minhash_signature(text: str, num_slots: int = 128, shingle_size: int = 5) -> List[int]:
+    """
+    One-permutation MinHash: every shingle is hashed once, the hash picks a
+    slot and the minimum per slot is kept. Empty slots are filled from the
+    next non-empty slot (rotation densification), so two signatures agree
+    on a slot with probability equal to the Jaccard similarity of their
+    shingle sets - the same estimator as k-permutation MinHash at 1/k the cost.
+    """
+    slot_bits = _HASH_BITS - (num_slots - 1).bit_length()
+    slots = [None] * num_slots
+    for shingle in set(shingles(text, shingle_size)):
+        h = _hash64(shingle)
+        slot = h % num_slots
+        value = h >> (_HASH_BITS - slot_bits)
+        current = slots[slot]
+        if current is None or value < current:
+            slots[slot] = value
+
+    if all(value is None for value in slots):
+        return [EMPTY_SLOT] * num_slots
+
+    signature = list(slots)
+    for idx in range(num_slots):
+        if signature[idx] is not None:
+            continue
+        offset = 1
+        while slots[(idx + offset) % num_slots] is None:
+            offset += 1
+        # Tag borrowed values with the distance so they only match the same borrow
+        signature[idx] = slots[(idx + offset) % num_slots] + offset * (1 << slot_bits)
+    return signature
+
+
+def estimate_similarity(a: List[int], b: List[int]) -> float:
+    if not a or len(a) != len(b) or a[0] == EMPTY_SLOT or b[0] == EMPTY_SLOT:
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def lsh_buckets(signature: List[int], bands: int) -> List[str]:
+    """Hash each band of rows to a bucket id; similar signatures share buckets."""
+    rows = len(signature) // bands
+    buckets = []
+    for band in range(bands):
+        chunk = signature[band * rows:(band + 1) * rows]
+        buckets.append(hashlib.blake2b(",".join(map(str, chunk)).encode(), digest_size=8).hexdigest())
+    return buckets
+
+
+def encode_signature(signature: List[int]) -> str:
+    return ",".join(f"{value:x}" if value >= 0 else "-" for value in signature)
+
+
+def decode_signature(encoded: Optional[str]) -> List[int]:
+    if not encoded:
+        return []
+    return [int(value, 16) if value != "-" else EMPTY_SLOT for value in encoded.split(",")]
@@ -0,0 +1,44 @@
+import re
+from typing import Dict, Iterable, List
+from urllib.parse import quote
+
+# {{ key }} placeholders in template bodies and DOCX files
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}]+)\}\}")
+
+
+def placeholder_key(raw: str) -> str:
+    """Variable key of a placeholder body: `{{ name }}` and `{{name}}` both fill `name`."""
+    return raw.strip()
+
+
+def compile_template_body(body_md: str) -> List[str]:
+    """
+    Split a markdown body into alternating literal / placeholder-key segments.
+    Even indices are literal text, odd indices are (normalized) variable keys.
+    """
+    segments = PLACEHOLDER_PATTERN.split(body_md)
+    segments[1::2] = [placeholder_key(key) for key in segments[1::2]]
+    return segments
+
+
+def render_draft(segments: List[str], variables: Dict[str, str]) -> str:
+    """Render a compiled template, leaving unknown placeholders untouched."""
+    parts = []
+    for idx, segment in enumerate(segments):
+        if idx % 2 == 0:
+            parts.append(segment)
+        elif segment in variables:
+            parts.append(str(variables[segment]))
+        else:
+            parts.append("{{" + segment + "}}")
+    return "".join(parts)
+
+
+def missing_variables(segments: List[str], variables: Dict[str, str]) -> List[str]:
+    """Placeholder keys in a compiled template that have no value."""
+    return sorted({key for key in segments[1::2] if key not in variables})
+
+
+def unfilled_header(keys: Iterable[str]) -> str:
+    """X-Unfilled-Placeholders value; percent-encoded so non latin-1 keys survive."""
+    return quote(",".join(keys), safe=",")
@@ -0,0 +1,30 @@
+import asyncio
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Spaces calls out to at most `per_minute` (no limit when None/0). Waiters
+    are served in arrival order, so a burst is smoothed rather than dropped.
+    """
+
+    def __init__(self, per_minute: Optional[float]):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def wait(self) -> float:
+        """Block until the caller may proceed; returns the seconds waited."""
+        if not self.interval:
+            return 0.0
+        if self._lock is None:
+            # Created lazily so the limiter can be built at import time
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = max(0.0, self._next - now)
+            if delay:
+                await asyncio.sleep(delay)
+            self._next = max(now, self._next) + self.interval
+            return delay
@@ -18,6 +18,7 @@ class TemplateVariableOut(BaseModel):
     example: Optional[str] = None
     required: bool
     type: Optional[str] = "string" # Add type for validation (e.g., "string", "date", "number")
+    question: Optional[str] = None
 
     class Config:
         from_attributes = True   # ✅ Pydantic v2
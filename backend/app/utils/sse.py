@@ -0,0 +1,33 @@
+import json
+import logging
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx-style proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _guard(events: AsyncIterator[str]) -> AsyncIterator[str]:
+    # Headers are already sent once streaming starts, so failures are
+    # reported as a final error event instead of an HTTP status.
+    try:
+        async for event in events:
+            yield event
+    except Exception as e:
+        logger.error(f"SSE stream failed: {e}", exc_info=True)
+        yield sse_event("error", {"detail": str(e)})
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(_guard(events), media_type="text/event-stream", headers=SSE_HEADERS)
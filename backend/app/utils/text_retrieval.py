@@ -0,0 +1,128 @@
+import re
+import math
+import heapq
+from collections import Counter
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['.][a-z0-9]+)*")
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.;:!?])\s+")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can did do does for from had has have he her his how i if in into is it its
+me my no not of on or our she so such than that the their them then there these they this those to was we were
+what when where which who whom why will with would you your shall
+""".split())
+
+
+class TextChunk(NamedTuple):
+    position: int
+    start: int
+    end: int
+    text: str
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _split_spans(text: str, pattern, start: int, end: int) -> List[Tuple[int, int]]:
+    spans = []
+    cursor = start
+    for match in pattern.finditer(text, start, end):
+        if match.start() > cursor:
+            spans.append((cursor, match.start()))
+        cursor = match.end()
+    if cursor < end:
+        spans.append((cursor, end))
+    return spans
+
+
+def chunk_text(text: str, max_chars: int = 1500, overlap_chars: int = 200) -> List[TextChunk]:
+    """
+    Split text into chunks of roughly max_chars along paragraph, then
+    sentence, boundaries. Offsets index into the original text so answers
+    can cite exact spans. Consecutive chunks share up to overlap_chars of
+    trailing context so a clause cut at a boundary is still retrievable.
+    """
+    # Atomic pieces: paragraphs, with oversized ones broken into sentences
+    # and oversized sentences hard-split.
+    pieces: List[Tuple[int, int]] = []
+    for p_start, p_end in _split_spans(text, PARAGRAPH_BREAK, 0, len(text)):
+        if p_end - p_start <= max_chars:
+            pieces.append((p_start, p_end))
+            continue
+        for s_start, s_end in _split_spans(text, SENTENCE_END, p_start, p_end):
+            while s_end - s_start > max_chars:
+                pieces.append((s_start, s_start + max_chars))
+                s_start += max_chars
+            pieces.append((s_start, s_end))
+
+    chunks: List[TextChunk] = []
+    idx = 0
+    while idx < len(pieces):
+        first = idx
+        start, end = pieces[idx]
+        idx += 1
+        while idx < len(pieces) and pieces[idx][1] - start <= max_chars:
+            end = pieces[idx][1]
+            idx += 1
+
+        raw = text[start:end]
+        chunk = raw.strip()
+        if chunk:
+            chunk_start = start + len(raw) - len(raw.lstrip())
+            chunks.append(TextChunk(len(chunks), chunk_start, chunk_start + len(chunk), chunk))
+
+        # Re-include trailing pieces that fit in the overlap window, as long
+        # as the next chunk still has room for at least one new piece.
+        if overlap_chars and idx < len(pieces):
+            back = idx
+            while (
+                back - 1 > first
+                and end - pieces[back - 1][0] <= overlap_chars
+                and pieces[idx][1] - pieces[back - 1][0] <= max_chars
+            ):
+                back -= 1
+            idx = back
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunk texts."""
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs: List[Counter] = [Counter(tokenize(doc)) for doc in documents]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        doc_freq: Counter = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(self.term_freqs)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()
+        }
+
+    def score(self, query: str) -> List[float]:
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        scores = [0.0] * len(self.term_freqs)
+        if not terms or not self.avg_length:
+            return scores
+        for idx, tf in enumerate(self.term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[idx] / self.avg_length)
+            total = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    total += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores[idx] = total
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Indices and scores of the k best matching documents (score > 0)."""
+        scores = self.score(query)
+        best = heapq.nlargest(k, range(len(scores)), key=scores.__getitem__)
+        return [(idx, scores[idx]) for idx in best if scores[idx] > 0]
@@ -2,3 +2,7 @@ import os
 # Directory to store uploaded documents temporarily
 UPLOAD_DIR = "uploaded_documents"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Formats the text extractor understands
+ALLOWED_EXTENSIONS = {".pdf", ".docx", ".txt", ".png", ".jpg", ".jpeg"}
+
@@ -22,6 +22,124 @@ class Settings:
         # Database or other configs (optional)
         self.DATABASE_URL = os.getenv("DATABASE_URL")
 
+        # Export caches
+        self.DOCX_SKELETON_CACHE_DIR = os.getenv("DOCX_SKELETON_CACHE_DIR", "cache/docx_skeletons")
+        self.DOCX_SKELETON_CACHE_SIZE = int(os.getenv("DOCX_SKELETON_CACHE_SIZE", "64"))
+        self.EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", "cache/exports")
+        self.EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+        self.EXPORT_SCRATCH_DIR = os.getenv("EXPORT_SCRATCH_DIR", "cache/export_scratch")
+        self.EXPORT_SCRATCH_QUOTA_BYTES = int(os.getenv("EXPORT_SCRATCH_QUOTA_BYTES", str(1024 * 1024 * 1024)))
+        self.EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+        # Workers kept free of batch jobs so single exports never queue behind mail-merges
+        self.EXPORT_JOB_INTERACTIVE_WORKERS = int(os.getenv("EXPORT_JOB_INTERACTIVE_WORKERS", "1"))
+        self.EXPORT_JOB_RETENTION_SECONDS = int(os.getenv("EXPORT_JOB_RETENTION_SECONDS", "3600"))
+        # Job status and finished artifacts; must be shared by every worker process
+        self.EXPORT_JOB_DIR = os.getenv("EXPORT_JOB_DIR", "cache/export_jobs")
+
+        # Regenerate missing/stale template variable questions in the background at
+        # startup. Off by default: every worker would run it on every boot; prefer
+        # `python -m backend.app.cli backfill-questions` once after deploying.
+        self.QUESTION_BACKFILL_ON_STARTUP = os.getenv("QUESTION_BACKFILL_ON_STARTUP", "false").lower() == "true"
+
+        # LibreOffice PDF conversion pool
+        self.LIBREOFFICE_BINARY = os.getenv("LIBREOFFICE_BINARY")
+        self.LIBREOFFICE_POOL_SIZE = int(os.getenv("LIBREOFFICE_POOL_SIZE", "2"))
+        self.LIBREOFFICE_MAX_CONVERSIONS = int(os.getenv("LIBREOFFICE_MAX_CONVERSIONS", "200"))
+        self.LIBREOFFICE_JOB_TIMEOUT = float(os.getenv("LIBREOFFICE_JOB_TIMEOUT", "60"))
+        self.LIBREOFFICE_QUEUE_TIMEOUT = float(os.getenv("LIBREOFFICE_QUEUE_TIMEOUT", "120"))
+        self.LIBREOFFICE_PROFILE_DIR = os.getenv("LIBREOFFICE_PROFILE_DIR", "cache/libreoffice")
+
+        # PDF export: "native" renders markdown templates directly with ReportLab,
+        # "libreoffice" goes through DOCX and the conversion pool. The built-in
+        # Helvetica has no glyphs beyond Latin-1 (₹, Devanagari, CJK), so native
+        # is only the default once PDF_FONT_PATH points at a Unicode TTF.
+        self.PDF_FONT_PATH = os.getenv("PDF_FONT_PATH")
+        self.PDF_EXPORT_ENGINE = os.getenv("PDF_EXPORT_ENGINE", "native" if self.PDF_FONT_PATH else "libreoffice")
+        self.PDF_PAGE_SIZE = os.getenv("PDF_PAGE_SIZE", "a4")
+        self.PDF_FONT = os.getenv("PDF_FONT", "Helvetica")
+        self.PDF_FONT_BOLD_PATH = os.getenv("PDF_FONT_BOLD_PATH")
+        self.PDF_FONT_SIZE = float(os.getenv("PDF_FONT_SIZE", "11"))
+        self.PDF_MARGIN_MM = float(os.getenv("PDF_MARGIN_MM", "20"))
+
+        # Near-duplicate reuse of prior document analyses
+        self.DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+        self.DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.85"))
+        self.MINHASH_SLOTS = int(os.getenv("MINHASH_SLOTS", "128"))
+        self.MINHASH_BANDS = int(os.getenv("MINHASH_BANDS", "32"))
+        self.MINHASH_SHINGLE_SIZE = int(os.getenv("MINHASH_SHINGLE_SIZE", "5"))
+
+        # Default region for phone numbers without a +country code in rule-based prefill
+        # (only used when the optional phonenumbers package is installed)
+        self.PREFILL_PHONE_REGION = os.getenv("PREFILL_PHONE_REGION")
+
+        # Local document-type classifier (trained with `python -m backend.app.cli train-classifier`)
+        self.DOC_CLASSIFIER_PATH = os.getenv("DOC_CLASSIFIER_PATH", "artifacts/document_classifier.json.gz")
+        self.DOC_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("DOC_CLASSIFIER_MIN_CONFIDENCE", "0.9"))
+        # Local type label -> routing domain (Banking/Legal/Other), e.g. "bank_statement:Banking,nda:Legal"
+        self.DOC_CLASSIFIER_DOMAINS = dict(
+            (label.strip().lower(), domain.strip())
+            for label, _, domain in (
+                pair.partition(":") for pair in os.getenv("DOC_CLASSIFIER_DOMAINS", "").split(",") if ":" in pair
+            )
+        )
+
+        # Insight tagging: optional JSON {tag: [phrases]} replacing the built-in dictionary
+        self.TAG_DICTIONARY_PATH = os.getenv("TAG_DICTIONARY_PATH")
+        self.TAG_CACHE_TTL_SECONDS = int(os.getenv("TAG_CACHE_TTL_SECONDS", "300"))
+
+        # Document Q&A retrieval
+        self.QA_CHUNK_CHARS = int(os.getenv("QA_CHUNK_CHARS", "1500"))
+        self.QA_CHUNK_OVERLAP = int(os.getenv("QA_CHUNK_OVERLAP", "200"))
+        self.QA_TOP_K = int(os.getenv("QA_TOP_K", "4"))
+
+        # Batch uploads (multipart or ZIP)
+        self.UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "500"))
+        self.UPLOAD_BATCH_MAX_BYTES = int(os.getenv("UPLOAD_BATCH_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+        self.UPLOAD_PROCESS_CONCURRENCY = int(os.getenv("UPLOAD_PROCESS_CONCURRENCY", "4"))
+
+        # Uploaded file storage: "local" (content-addressed directory) or "s3"
+        self.STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+        self.STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "storage/blobs")
+        self.S3_BUCKET = os.getenv("S3_BUCKET")
+        self.S3_PREFIX = os.getenv("S3_PREFIX", "documents")
+        self.S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+        self.S3_REGION = os.getenv("S3_REGION")
+        # Longest a blob lock (store + insert, or release) may hold its transaction
+        self.BLOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("BLOB_LOCK_TIMEOUT_SECONDS", "300"))
+
+        # Internal nginx location mapped to STORAGE_LOCAL_ROOT; when set, file
+        # downloads are handed to nginx via X-Accel-Redirect (sendfile)
+        self.FILE_ACCEL_REDIRECT_PREFIX = os.getenv("FILE_ACCEL_REDIRECT_PREFIX")
+
+        # Page thumbnails: rendered in a process pool, cached on disk by content hash
+        self.PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", "cache/previews")
+        self.PREVIEW_SIZES = [int(w) for w in os.getenv("PREVIEW_SIZES", "160,320,640").split(",") if w.strip()]
+        self.PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "2"))
+        self.PREVIEW_ON_PROCESS = os.getenv("PREVIEW_ON_PROCESS", "true").lower() == "true"
+
+        # Large fullText / insights values are stored compressed in document_payloads
+        # (zstd when the zstandard package is installed, zlib otherwise)
+        self.PAYLOAD_COMPRESSION_ENABLED = os.getenv("PAYLOAD_COMPRESSION_ENABLED", "true").lower() == "true"
+        self.PAYLOAD_COMPRESSION_CODEC = os.getenv("PAYLOAD_COMPRESSION_CODEC", "zstd").lower()
+        self.PAYLOAD_COMPRESSION_MIN_BYTES = int(os.getenv("PAYLOAD_COMPRESSION_MIN_BYTES", "4096"))
+
+        # Resumable chunked uploads
+        self.UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", "cache/upload_sessions")
+        self.UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600)))
+        self.UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+        self.UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+        # Process-wide cap on Gemini requests per minute (0 = unlimited)
+        self.LLM_MAX_REQUESTS_PER_MINUTE = float(os.getenv("LLM_MAX_REQUESTS_PER_MINUTE", "0")) or None
+
+        # Bulk reprocessing: documents in flight and optional starts-per-minute cap.
+        # Requests may lower these but never exceed REPROCESS_MAX_CONCURRENCY /
+        # REPROCESS_MAX_PER_MINUTE.
+        self.REPROCESS_CONCURRENCY = int(os.getenv("REPROCESS_CONCURRENCY", "4"))
+        self.REPROCESS_MAX_CONCURRENCY = int(os.getenv("REPROCESS_MAX_CONCURRENCY", "16"))
+        self.REPROCESS_MAX_PER_MINUTE = float(os.getenv("REPROCESS_MAX_PER_MINUTE", "0")) or None
+        self.REPROCESS_JOB_RETENTION_SECONDS = int(os.getenv("REPROCESS_JOB_RETENTION_SECONDS", "3600"))
+
 
 
 # Create a single, importable instance of the settings
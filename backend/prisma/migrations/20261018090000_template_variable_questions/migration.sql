@@ -0,0 +1,3 @@
+-- AlterTable
+ALTER TABLE "template_variables" ADD COLUMN     "question" TEXT,
+ADD COLUMN     "question_source" TEXT;
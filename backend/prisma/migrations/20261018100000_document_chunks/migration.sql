@@ -0,0 +1,18 @@
+-- CreateTable
+CREATE TABLE "document_chunks" (
+    "id" TEXT NOT NULL,
+    "document_id" TEXT NOT NULL,
+    "position" INTEGER NOT NULL,
+    "start_offset" INTEGER NOT NULL,
+    "end_offset" INTEGER NOT NULL,
+    "text" TEXT NOT NULL,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "document_chunks_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "document_chunks_document_id_position_idx" ON "document_chunks"("document_id", "position");
+
+-- AddForeignKey
+ALTER TABLE "document_chunks" ADD CONSTRAINT "document_chunks_document_id_fkey" FOREIGN KEY ("document_id") REFERENCES "documents"("id") ON DELETE CASCADE ON UPDATE CASCADE;
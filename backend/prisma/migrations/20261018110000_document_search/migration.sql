@@ -0,0 +1,20 @@
+-- AlterTable
+ALTER TABLE "documents" ADD COLUMN     "search_vector" tsvector;
+
+-- CreateIndex
+CREATE INDEX "documents_search_vector_idx" ON "documents" USING GIN ("search_vector");
+
+-- CreateIndex
+CREATE INDEX "documents_orgId_created_at_idx" ON "documents"("orgId", "created_at");
+
+-- Backfill documents that finished processing before search existed
+UPDATE "documents" d
+SET "search_vector" =
+    setweight(to_tsvector('english', coalesce(d."metadata", '') || ' ' || coalesce(d."document_type", '')), 'A')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(v."name" || ' ' || coalesce(v."value", ''), ' ')
+        FROM "document_variables" v
+        WHERE v."document_id" = d."id"
+    ), '')), 'B')
+    || setweight(to_tsvector('english', left(coalesce(d."fullText", ''), 500000)), 'C')
+WHERE d."status" = 'completed';
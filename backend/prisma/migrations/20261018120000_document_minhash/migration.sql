@@ -0,0 +1,20 @@
+-- AlterTable
+ALTER TABLE "documents" ADD COLUMN     "minhash" TEXT,
+ADD COLUMN     "duplicate_of_id" TEXT;
+
+-- CreateTable
+CREATE TABLE "document_lsh_bands" (
+    "id" TEXT NOT NULL,
+    "orgId" TEXT NOT NULL,
+    "document_id" TEXT NOT NULL,
+    "band" INTEGER NOT NULL,
+    "bucket" TEXT NOT NULL,
+
+    CONSTRAINT "document_lsh_bands_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "document_lsh_bands_orgId_band_bucket_idx" ON "document_lsh_bands"("orgId", "band", "bucket");
+
+-- AddForeignKey
+ALTER TABLE "document_lsh_bands" ADD CONSTRAINT "document_lsh_bands_document_id_fkey" FOREIGN KEY ("document_id") REFERENCES "documents"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,13 @@
+-- CreateTable
+CREATE TABLE "tag_keywords" (
+    "id" TEXT NOT NULL,
+    "orgId" TEXT NOT NULL,
+    "tag" TEXT NOT NULL,
+    "phrase" TEXT NOT NULL,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "tag_keywords_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "tag_keywords_orgId_tag_phrase_key" ON "tag_keywords"("orgId", "tag", "phrase");
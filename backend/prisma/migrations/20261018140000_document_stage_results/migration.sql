@@ -0,0 +1,23 @@
+-- CreateTable
+CREATE TABLE "document_stage_results" (
+    "id" TEXT NOT NULL,
+    "document_id" TEXT NOT NULL,
+    "stage" TEXT NOT NULL,
+    "input_hash" TEXT NOT NULL,
+    "version" TEXT NOT NULL,
+    "model" TEXT NOT NULL DEFAULT '',
+    "output" TEXT,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "document_stage_results_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "document_stage_results_document_id_stage_key" ON "document_stage_results"("document_id", "stage");
+
+-- CreateIndex
+CREATE INDEX "document_stage_results_stage_version_idx" ON "document_stage_results"("stage", "version");
+
+-- AddForeignKey
+ALTER TABLE "document_stage_results" ADD CONSTRAINT "document_stage_results_document_id_fkey" FOREIGN KEY ("document_id") REFERENCES "documents"("id") ON DELETE CASCADE ON UPDATE CASCADE;
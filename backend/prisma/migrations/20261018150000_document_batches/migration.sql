@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "documents" ADD COLUMN "batch_id" TEXT;
+
+-- CreateIndex
+CREATE INDEX "documents_batch_id_status_idx" ON "documents"("batch_id", "status");
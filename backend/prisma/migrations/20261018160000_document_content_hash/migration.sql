@@ -0,0 +1,6 @@
+-- AlterTable
+ALTER TABLE "documents" ADD COLUMN "file_name" TEXT,
+ADD COLUMN "content_hash" TEXT;
+
+-- CreateIndex
+CREATE INDEX "documents_content_hash_idx" ON "documents"("content_hash");
@@ -0,0 +1,23 @@
+-- CreateTable
+CREATE TABLE "document_payloads" (
+    "id" TEXT NOT NULL,
+    "document_id" TEXT NOT NULL,
+    "field" TEXT NOT NULL,
+    "codec" TEXT NOT NULL,
+    "data" BYTEA NOT NULL,
+    "raw_size" INTEGER NOT NULL,
+    "stored_size" INTEGER NOT NULL,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "document_payloads_pkey" PRIMARY KEY ("id")
+);
+
+-- Payloads are already compressed; skip TOAST's pglz pass and store them out of line as-is
+ALTER TABLE "document_payloads" ALTER COLUMN "data" SET STORAGE EXTERNAL;
+
+-- CreateIndex
+CREATE UNIQUE INDEX "document_payloads_document_id_field_key" ON "document_payloads"("document_id", "field");
+
+-- AddForeignKey
+ALTER TABLE "document_payloads" ADD CONSTRAINT "document_payloads_document_id_fkey" FOREIGN KEY ("document_id") REFERENCES "documents"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the app as `backend.*`, like the API does when run from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("GEMINI_API_KEY", "test")
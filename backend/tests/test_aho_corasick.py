@@ -0,0 +1,51 @@
+from backend.app.utils.aho_corasick import AhoCorasick
+
+
+def _matcher(*patterns, word_boundaries=True):
+    matcher = AhoCorasick(word_boundaries=word_boundaries)
+    for pattern in patterns:
+        matcher.add(pattern, pattern)
+    return matcher
+
+
+def _found(matcher, text):
+    return [(text[start:end], payload) for start, end, payload in matcher.iter_matches(text)]
+
+
+def test_matches_respect_word_boundaries():
+    matcher = _matcher("rent", "lease")
+    text = "The parent's rent_due field; Rent, LEASE and leases."
+    assert _found(matcher, text) == [("Rent", "rent"), ("LEASE", "lease")]
+
+
+def test_substring_matches_without_boundaries():
+    matcher = _matcher("rent", word_boundaries=False)
+    assert _found(matcher, "parent rent") == [("rent", "rent"), ("rent", "rent")]
+
+
+def test_overlapping_and_nested_patterns():
+    matcher = _matcher("he", "she", "his", "hers", word_boundaries=False)
+    assert _found(matcher, "ushers") == [("she", "she"), ("he", "he"), ("hers", "hers")]
+
+    phrases = _matcher("notice", "notice period", "period")
+    assert sorted(_found(phrases, "a notice period applies")) == [
+        ("notice", "notice"), ("notice period", "notice period"), ("period", "period"),
+    ]
+
+
+def test_failure_links_recover_mid_pattern():
+    matcher = _matcher("abcd", "bce", word_boundaries=False)
+    assert _found(matcher, "abce") == [("bce", "bce")]
+
+
+def test_offsets_survive_length_changing_lowercase():
+    # "İ" lowercases to two code points; offsets must still index the original text
+    matcher = _matcher("fee")
+    text = "İİ fee"
+    assert [(start, end) for start, end, _ in matcher.iter_matches(text)] == [(3, 6)]
+
+
+def test_patterns_are_normalised_and_empty_ones_ignored():
+    matcher = _matcher("  Late Fee ", "   ")
+    assert matcher.size == 1
+    assert _found(matcher, "a late fee applies") == [("late fee", "  Late Fee ")]
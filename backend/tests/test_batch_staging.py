@@ -0,0 +1,90 @@
+import hashlib
+import io
+import os
+import uuid
+import zipfile
+
+import pytest
+
+try:
+    from backend.app.services import document_batch_service
+    from backend.app.services.document_batch_service import BatchLimitError, _Stager
+except RuntimeError:  # raised by `from prisma import Prisma` until `prisma generate` has run
+    pytest.skip("Prisma client not generated", allow_module_level=True)
+
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        document_batch_service.file_storage, "scratch_path",
+        lambda: str(tmp_path / f"{uuid.uuid4().hex}.part"),
+    )
+    monkeypatch.setattr(document_batch_service, "COPY_BUFFER_BYTES", 4)
+    return tmp_path
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_files_are_copied_and_hashed():
+    stager = _Stager(max_files=5, max_bytes=1000)
+    stager.add(io.BytesIO(b"lease text"), "dir/Lease.TXT")
+    stager.add(io.BytesIO(b"x"), "notes.exe")
+
+    [staged] = stager.staged
+    assert staged.filename == "Lease.TXT"
+    assert staged.sha256 == hashlib.sha256(b"lease text").hexdigest()
+    with open(staged.path, "rb") as f:
+        assert f.read() == b"lease text"
+    assert stager.skipped == [{"filename": "notes.exe", "reason": "Unsupported file format"}]
+
+
+def test_zip_members_are_filtered():
+    archive = _zip({
+        "a.pdf": b"%PDF",
+        "folder/b.txt": b"text",
+        "folder/": b"",
+        ".hidden.txt": b"h",
+        "__MACOSX/._a.pdf": b"meta",
+        "inner.zip": b"PK",
+        "c.exe": b"bin",
+    })
+    stager = _Stager(max_files=5, max_bytes=1000)
+    stager.add(archive, "upload.zip")
+
+    assert [s.filename for s in stager.staged] == ["a.pdf", "b.txt"]
+    assert stager.skipped == [
+        {"filename": "inner.zip", "reason": "Nested archives are not unpacked"},
+        {"filename": "c.exe", "reason": "Unsupported file format"},
+    ]
+
+
+def test_invalid_zip_is_skipped():
+    stager = _Stager(max_files=5, max_bytes=1000)
+    stager.add(io.BytesIO(b"not a zip"), "broken.zip")
+    assert stager.staged == []
+    assert stager.skipped == [{"filename": "broken.zip", "reason": "Not a valid ZIP archive"}]
+
+
+def test_file_count_limit_counts_zip_members():
+    stager = _Stager(max_files=2, max_bytes=1000)
+    with pytest.raises(BatchLimitError):
+        stager.add(_zip({"a.txt": b"a", "b.txt": b"b", "c.txt": b"c"}), "three.zip")
+    assert len(stager.staged) == 2
+
+
+def test_byte_limit_stops_mid_file_and_discard_cleans_up(scratch):
+    stager = _Stager(max_files=5, max_bytes=10)
+    stager.add(io.BytesIO(b"123456"), "a.txt")
+    with pytest.raises(BatchLimitError):
+        stager.add(io.BytesIO(b"abcdefgh"), "b.txt")
+    # The partially written file is registered so it is removed with the rest
+    assert len(stager.staged) == 2
+    stager.discard()
+    assert os.listdir(scratch) == []
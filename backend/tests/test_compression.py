@@ -0,0 +1,43 @@
+import zlib
+
+import pytest
+
+from backend.app.utils import compression
+from backend.app.utils.compression import available_codec, compress, decompress, decompress_prefix
+
+TEXT = ("Clause 4.2: the tenant shall pay rent monthly — ₹25,000 / €300. " * 400).encode("utf-8")
+CODECS = ["zlib"] + (["zstd"] if compression.zstandard is not None else [])
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(codec):
+    data = compress(TEXT, codec)
+    assert len(data) < len(TEXT) // 10
+    assert decompress(data, codec) == TEXT
+    assert decompress(compress(b"", codec), codec) == b""
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_prefix_matches_full_output(codec):
+    data = compress(TEXT, codec)
+    assert decompress_prefix(data, codec, 1000) == TEXT[:1000]
+    assert decompress_prefix(data, codec, len(TEXT) * 2) == TEXT
+
+
+def test_codec_selection(monkeypatch):
+    assert available_codec("zlib") == "zlib"
+    monkeypatch.setattr(compression, "zstandard", None)
+    assert available_codec("zstd") == "zlib"
+    assert available_codec(None) == "zlib"
+    with pytest.raises(ValueError):
+        available_codec("brotli")
+
+
+def test_unknown_or_unavailable_codecs_fail_loudly(monkeypatch):
+    with pytest.raises(ValueError):
+        compress(TEXT, "lz4")
+    with pytest.raises(ValueError):
+        decompress(zlib.compress(TEXT), "lz4")
+    monkeypatch.setattr(compression, "zstandard", None)
+    with pytest.raises(RuntimeError):
+        decompress(b"\x28\xb5\x2f\xfd", "zstd")
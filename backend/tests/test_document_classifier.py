@@ -0,0 +1,66 @@
+import gzip
+import json
+import random
+
+import pytest
+
+from backend.app.services.document_classifier import LocalTextClassifier
+
+rng = random.Random(3)
+VOCABULARY = {
+    "invoice": "invoice amount due payment total tax billing remit net30 subtotal",
+    "lease": "lease tenant landlord premises rent deposit term eviction occupancy",
+    "nda": "confidential disclosure recipient discloser secrets obligations nondisclosure proprietary",
+}
+FILLER = "the party shall within days hereof agreed said date signed".split()
+
+
+def _document(label: str) -> str:
+    words = VOCABULARY[label].split()
+    return " ".join(rng.choice(words if rng.random() < 0.5 else FILLER) for _ in range(80))
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    labels = [label for label in VOCABULARY for _ in range(30)]
+    return [_document(label) for label in labels], labels
+
+
+@pytest.fixture(scope="module")
+def model(corpus):
+    texts, labels = corpus
+    return LocalTextClassifier.train(texts, labels, n_features=1 << 12, epochs=4)
+
+
+def test_trained_model_separates_classes(model):
+    held_out = [(label, _document(label)) for label in VOCABULARY for _ in range(10)]
+    report = model.evaluate([t for _, t in held_out], [l for l, _ in held_out], min_confidence=0.5)
+    assert model.labels == sorted(VOCABULARY)
+    assert report["accuracy"] >= 0.9
+    assert report["coverage"] > 0
+
+
+def test_save_load_round_trip(model, tmp_path):
+    path = str(tmp_path / "classifier.json.gz")
+    model.report = {"accuracy": 1.0}
+    model.save(path)
+    loaded = LocalTextClassifier.load(path)
+
+    assert loaded.labels == model.labels
+    assert loaded.n_features == model.n_features
+    assert loaded.report == {"accuracy": 1.0}
+    for label in VOCABULARY:
+        text = _document(label)
+        expected, confidence = model.predict(text)
+        predicted, loaded_confidence = loaded.predict(text)
+        assert predicted == expected
+        # Weights are rounded to 5 decimals when saved
+        assert loaded_confidence == pytest.approx(confidence, abs=1e-3)
+
+
+def test_load_rejects_other_artifacts(tmp_path):
+    path = str(tmp_path / "other.json.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"format": "something-else", "version": 1}, f)
+    with pytest.raises(ValueError):
+        LocalTextClassifier.load(path)
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    from backend.app.services import document_payload_service
+    from backend.app.services.document_payload_service import _should_compress, decode_payload, encode_payload
+except RuntimeError:  # raised by `from prisma import Prisma` until `prisma generate` has run
+    pytest.skip("Prisma client not generated", allow_module_level=True)
+
+
+@pytest.fixture(autouse=True)
+def payload_settings(monkeypatch):
+    monkeypatch.setattr(document_payload_service.settings, "PAYLOAD_COMPRESSION_ENABLED", True)
+    monkeypatch.setattr(document_payload_service.settings, "PAYLOAD_COMPRESSION_MIN_BYTES", 100)
+    monkeypatch.setattr(document_payload_service.settings, "PAYLOAD_COMPRESSION_CODEC", "zlib")
+
+
+def test_threshold_is_in_utf8_bytes():
+    assert not _should_compress(None)
+    assert not _should_compress("a" * 99)
+    assert _should_compress("a" * 100)
+    # 40 characters, 120 bytes
+    assert _should_compress("₹" * 40)
+    assert not _should_compress("₹" * 33)
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(document_payload_service.settings, "PAYLOAD_COMPRESSION_ENABLED", False)
+    assert not _should_compress("a" * 1000)
+
+
+def test_encode_decode_round_trip():
+    value = "Clause ₹ 4.2 " * 200
+    payload = encode_payload(value)
+    assert payload["codec"] == "zlib"
+    assert payload["rawSize"] == len(value.encode("utf-8"))
+    assert payload["storedSize"] < payload["rawSize"]
+    assert decode_payload(SimpleNamespace(data=payload["data"], codec=payload["codec"])) == value
@@ -0,0 +1,72 @@
+import io
+
+from docx import Document
+
+from backend.app.services.export_service import (
+    _substitute_paragraph,
+    iter_document_paragraphs,
+    substitute_placeholders,
+)
+
+
+def _paragraph(*runs, bold_run=None):
+    doc = Document()
+    paragraph = doc.add_paragraph()
+    for idx, text in enumerate(runs):
+        run = paragraph.add_run(text)
+        run.bold = idx == bold_run
+    return paragraph
+
+
+def test_placeholder_in_one_run():
+    paragraph = _paragraph("Dear {{name}},")
+    unfilled = set()
+    assert _substitute_paragraph(paragraph, {"name": "Asha"}, unfilled) == 1
+    assert paragraph.text == "Dear Asha,"
+    assert unfilled == set()
+
+
+def test_placeholder_split_across_runs_keeps_first_run_formatting():
+    paragraph = _paragraph("Dear ", "{{na", "me}}", ", welcome", bold_run=1)
+    assert _substitute_paragraph(paragraph, {"name": "Asha"}, set()) == 1
+    assert paragraph.text == "Dear Asha, welcome"
+    assert [run.text for run in paragraph.runs] == ["Dear ", "Asha", "", ", welcome"]
+    assert paragraph.runs[1].bold
+
+
+def test_placeholder_spanning_three_runs_with_spaces():
+    paragraph = _paragraph("{", "{ amount ", "}}", " due")
+    assert _substitute_paragraph(paragraph, {"amount": 500}, set()) == 1
+    assert paragraph.text == "500 due"
+
+
+def test_several_placeholders_and_unknown_keys():
+    paragraph = _paragraph("{{a}} and {{", "b}} and {{c}}")
+    unfilled = set()
+    assert _substitute_paragraph(paragraph, {"a": "1", "b": "2"}, unfilled) == 2
+    assert paragraph.text == "1 and 2 and {{c}}"
+    assert unfilled == {"c"}
+
+
+def test_paragraph_without_placeholders_is_untouched():
+    paragraph = _paragraph("plain ", "text")
+    assert _substitute_paragraph(paragraph, {"x": "y"}, set()) == 0
+    assert [run.text for run in paragraph.runs] == ["plain ", "text"]
+
+
+def test_substitute_placeholders_reaches_tables_and_headers():
+    doc = Document()
+    doc.add_paragraph("Body {{name}}")
+    cell = doc.add_table(rows=1, cols=2).rows[0].cells[1]
+    cell.paragraphs[0].add_run("Cell {{ amount }}")
+    doc.sections[0].header.paragraphs[0].add_run("Header {{ref}}")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+
+    doc = Document(io.BytesIO(buffer.getvalue()))
+    unfilled = substitute_placeholders(doc, {"name": "Asha", "amount": "10"})
+    texts = [p.text for p in iter_document_paragraphs(doc)]
+    assert "Body Asha" in texts
+    assert "Cell 10" in texts
+    assert "Header {{ref}}" in texts
+    assert unfilled == {"ref"}
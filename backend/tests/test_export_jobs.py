@@ -0,0 +1,67 @@
+import asyncio
+import os
+
+from backend.app.services import export_jobs
+from backend.app.services.export_artifacts import ExportArtifactManager
+from backend.app.services.export_jobs import ExportJob, ExportJobQueue, ExportJobStore, PRIORITY_BATCH
+
+
+def test_job_state_is_shared_through_the_store(tmp_path, monkeypatch):
+    scratch = ExportArtifactManager(str(tmp_path / "scratch"), quota_bytes=1 << 20)
+    monkeypatch.setattr(export_jobs, "export_artifacts", scratch)
+    monkeypatch.setattr(export_jobs, "PROGRESS_SAVE_INTERVAL_SECONDS", 0.01)
+    job_dir = str(tmp_path / "jobs")
+
+    async def runner(job):
+        path = scratch.new_path(".zip")
+        with open(path, "wb") as f:
+            f.write(b"zip")
+        job.artifact_path = path
+        job.artifact_is_scratch = True
+        job.set_progress(1)
+
+    async def scenario():
+        # Two queues over one directory stand in for two worker processes
+        running = ExportJobQueue(workers=2, retention_seconds=3600, store=ExportJobStore(job_dir))
+        other = ExportJobQueue(workers=2, retention_seconds=3600, store=ExportJobStore(job_dir))
+        try:
+            job = await running.submit(ExportJob("org", "batch", PRIORITY_BATCH, total=1), runner)
+            assert (await other.get(job.id, "org")).status == "queued"
+            for _ in range(100):
+                seen = await other.get(job.id, "org")
+                if seen.status == "completed":
+                    break
+                await asyncio.sleep(0.01)
+            assert await other.get(job.id, "another-org") is None
+            return seen
+        finally:
+            await running.stop()
+
+    seen = asyncio.run(scenario())
+    assert seen.status == "completed"
+    assert seen.completed == 1
+    assert os.path.dirname(seen.artifact_path) == os.path.abspath(job_dir)
+    with open(seen.artifact_path, "rb") as f:
+        assert f.read() == b"zip"
+    assert os.listdir(scratch.scratch_dir) == []
+
+
+def test_store_expires_records_and_artifacts(tmp_path):
+    store = ExportJobStore(str(tmp_path))
+    job = ExportJob("org", "single", 0, total=1)
+    artifact = tmp_path / "source.pdf"
+    artifact.write_bytes(b"pdf")
+    job.artifact_path = store.keep_artifact(job.id, str(artifact))
+    job.finished_at = 100.0
+    store.save(job.to_record())
+
+    store.expire(cutoff=50.0)
+    assert store.load(job.id)["artifact_path"] == job.artifact_path
+
+    store.expire(cutoff=200.0)
+    assert store.load(job.id) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_store_rejects_non_job_ids(tmp_path):
+    assert ExportJobStore(str(tmp_path)).load("../secrets") is None
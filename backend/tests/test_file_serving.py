@@ -0,0 +1,69 @@
+import email
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.utils.file_serving import ContentFileResponse
+
+DATA = bytes(range(48))
+ETAG = '"abc123"'
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "blob.pdf"
+    path.write_bytes(DATA)
+    app = FastAPI()
+
+    @app.api_route("/file", methods=["GET", "HEAD"])
+    def download():
+        return ContentFileResponse(str(path), etag=ETAG, media_type="application/pdf")
+
+    return TestClient(app)
+
+
+def _parts(response):
+    message = email.message_from_bytes(
+        f"Content-Type: {response.headers['content-type']}\r\n\r\n".encode() + response.content
+    )
+    assert message.is_multipart()
+    return message.get_payload()
+
+
+def test_single_range(client):
+    response = client.get("/file", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 0-9/48"
+    assert response.content == DATA[:10]
+
+
+def test_multiple_ranges_are_multipart_byteranges(client):
+    response = client.get("/file", headers={"Range": "bytes=0-9,20-29"})
+    assert response.status_code == 206
+    assert re.fullmatch(r"multipart/byteranges; boundary=[0-9a-f]+", response.headers["content-type"])
+    assert "content-range" not in response.headers
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    boundary = response.headers["content-type"].split("boundary=")[1]
+    assert response.content.startswith(f"--{boundary}\r\n".encode())
+    assert response.content.endswith(f"\r\n--{boundary}--\r\n".encode())
+
+    parts = _parts(response)
+    assert [part["Content-Range"] for part in parts] == ["bytes 0-9/48", "bytes 20-29/48"]
+    assert [part["Content-Type"] for part in parts] == ["application/pdf", "application/pdf"]
+    assert [part.get_payload(decode=True) for part in parts] == [DATA[0:10], DATA[20:30]]
+
+
+def test_multiple_ranges_head(client):
+    response = client.head("/file", headers={"Range": "bytes=0-9,20-29"})
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert response.content == b""
+
+
+def test_if_range_mismatch_sends_whole_file(client):
+    response = client.get("/file", headers={"Range": "bytes=0-9,20-29", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == DATA
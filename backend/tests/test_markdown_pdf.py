@@ -0,0 +1,83 @@
+import pytest
+
+from backend.app.services import markdown_pdf
+from backend.app.services.markdown_pdf import _inline_markup, render_markdown_pdf
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("**bold** and *italic*", "<b>bold</b> and <i>italic</i>"),
+        ("***bold italic***", "<b><i>bold italic</i></b>"),
+        ("**a *b** c*", "<b>a <i>b</i></b><i> c</i>"),
+        ("*a **b* c**", "<i>a <b>b</b></i><b> c</b>"),
+        ("__x__ _y_", "<b>x</b> <i>y</i>"),
+        ("a **unclosed", "a **unclosed"),
+        ("5 * 3 = 15", "5 * 3 = 15"),
+        ("snake_case_name", "snake_case_name"),
+        ("a < b & **c**", "a &lt; b &amp; <b>c</b>"),
+    ],
+)
+def test_inline_markup_is_balanced(text, expected):
+    assert _inline_markup(text) == expected
+
+
+@pytest.mark.parametrize(
+    "markdown",
+    [
+        "***bold italic***",
+        "**a *b** c*",
+        "# Heading **a *b** c*\n\n- item ***x***\n\n| A | B |\n|---|---|\n| **a *b** | c* |",
+    ],
+)
+def test_render_markdown_pdf_accepts_overlapping_emphasis(markdown):
+    assert render_markdown_pdf(markdown).startswith(b"%PDF")
+
+
+def test_unparseable_paragraph_falls_back_to_plain_text(monkeypatch):
+    monkeypatch.setattr(markdown_pdf, "_inline_markup", lambda text: f"<b>{text}</i>")
+    assert render_markdown_pdf("**value**").startswith(b"%PDF")
+
+
+def _texts(markdown, variables):
+    content, values = markdown_pdf._mark_values(markdown, variables)
+    style = markdown_pdf.PdfStyle()
+    flowables = markdown_pdf.markdown_to_flowables(content, "Title", style, values)
+    return [(f.style.name, f.text) for f in flowables if hasattr(f, "text")][1:]
+
+
+def test_values_are_substituted_after_parsing():
+    paragraphs = _texts(
+        "Dear {{ name }},\n\n{{heading}}\n\n- {{item}}",
+        {"name": "**Asha**", "heading": "# Not a heading", "item": "a < b | c"},
+    )
+    assert paragraphs == [
+        ("Body", "Dear **Asha**,"),
+        ("Body", "# Not a heading"),
+        ("ListItem", "a &lt; b | c"),
+    ]
+
+
+def test_values_keep_template_emphasis_and_unknown_placeholders():
+    paragraphs = _texts("**{{name}}** owes {{amount}}", {"name": "_x_"})
+    assert paragraphs == [("Body", "<b>_x_</b> owes {{amount}}")]
+
+
+def test_value_with_pipe_stays_in_its_table_cell():
+    content, values = markdown_pdf._mark_values("| A | B |\n|---|---|\n| {{v}} | z |", {"v": "x | y"})
+    table = markdown_pdf.markdown_to_flowables(content, "T", markdown_pdf.PdfStyle(), values)[2]
+    assert [cell.text for cell in table._cellvalues[1]] == ["x | y", "z"]
+
+
+def test_render_markdown_pdf_with_variables():
+    assert render_markdown_pdf("# {{title}}", variables={"title": "**x**"}).startswith(b"%PDF")
+
+
+def test_native_engine_is_default_only_with_a_unicode_font(monkeypatch):
+    from backend.core.config import Settings
+
+    monkeypatch.delenv("PDF_EXPORT_ENGINE", raising=False)
+    monkeypatch.delenv("PDF_FONT_PATH", raising=False)
+    assert Settings().PDF_EXPORT_ENGINE == "libreoffice"
+    monkeypatch.setenv("PDF_FONT_PATH", "/fonts/NotoSans-Regular.ttf")
+    assert Settings().PDF_EXPORT_ENGINE == "native"
@@ -0,0 +1,69 @@
+import random
+
+from backend.app.utils.minhash import (
+    EMPTY_SLOT,
+    decode_signature,
+    encode_signature,
+    estimate_similarity,
+    lsh_buckets,
+    minhash_signature,
+    shingles,
+)
+
+rng = random.Random(7)
+VOCABULARY = [f"word{n}" for n in range(500)]
+BASE = " ".join(rng.choice(VOCABULARY) for _ in range(400))
+
+
+def _jaccard(a: str, b: str) -> float:
+    x, y = set(shingles(a)), set(shingles(b))
+    return len(x & y) / len(x | y)
+
+
+def _edit(text: str, changed_words: int) -> str:
+    words = text.split()
+    for idx in rng.sample(range(len(words)), changed_words):
+        words[idx] = "changed"
+    return " ".join(words)
+
+
+def test_shingles_lowercase_and_short_texts():
+    assert shingles("The Quick brown fox jumps over", size=5) == [b"the quick brown fox jumps", b"quick brown fox jumps over"]
+    assert shingles("Two words", size=5) == [b"two words"]
+    assert shingles("", size=5) == []
+
+
+def test_identical_and_unrelated_texts():
+    other = " ".join(rng.choice(VOCABULARY) for _ in range(400))
+    assert estimate_similarity(minhash_signature(BASE), minhash_signature(BASE)) == 1.0
+    assert estimate_similarity(minhash_signature(BASE), minhash_signature(other)) < 0.1
+
+
+def test_estimate_tracks_jaccard_similarity():
+    for changed in (5, 20, 60):
+        edited = _edit(BASE, changed)
+        estimate = estimate_similarity(minhash_signature(BASE, 256), minhash_signature(edited, 256))
+        assert abs(estimate - _jaccard(BASE, edited)) < 0.1
+
+
+def test_empty_text_matches_nothing():
+    empty = minhash_signature("")
+    assert empty == [EMPTY_SLOT] * 128
+    assert estimate_similarity(empty, empty) == 0.0
+    assert estimate_similarity(minhash_signature(BASE, 64), minhash_signature(BASE, 128)) == 0.0
+
+
+def test_near_duplicates_share_lsh_buckets():
+    near = minhash_signature(_edit(BASE, 2))
+    far = minhash_signature(" ".join(rng.choice(VOCABULARY) for _ in range(400)))
+    base_buckets = lsh_buckets(minhash_signature(BASE), bands=32)
+    assert len(base_buckets) == 32
+    assert set(base_buckets) & set(lsh_buckets(near, bands=32))
+    assert not set(base_buckets) & set(lsh_buckets(far, bands=32))
+
+
+def test_signature_encoding_round_trip():
+    signature = minhash_signature(BASE)
+    assert decode_signature(encode_signature(signature)) == signature
+    assert decode_signature(encode_signature([EMPTY_SLOT] * 4)) == [EMPTY_SLOT] * 4
+    assert decode_signature(None) == []
@@ -0,0 +1,34 @@
+from backend.app.utils.placeholders import (
+    compile_template_body,
+    missing_variables,
+    render_draft,
+    unfilled_header,
+)
+
+
+def test_compile_alternates_literals_and_normalized_keys():
+    segments = compile_template_body("Dear {{ name }}, pay {{amount}} by {{ date}}.")
+    assert segments == ["Dear ", "name", ", pay ", "amount", " by ", "date", "."]
+
+
+def test_compile_without_placeholders():
+    assert compile_template_body("No fields here") == ["No fields here"]
+
+
+def test_render_draft_fills_known_and_keeps_unknown():
+    segments = compile_template_body("{{name}} owes {{ amount }} to {{creditor}}")
+    assert render_draft(segments, {"name": "Asha", "amount": 1200}) == "Asha owes 1200 to {{creditor}}"
+
+
+def test_render_draft_repeated_placeholder():
+    segments = compile_template_body("{{x}}-{{ x }}")
+    assert render_draft(segments, {"x": "a"}) == "a-a"
+
+
+def test_missing_variables_sorted_and_unique():
+    segments = compile_template_body("{{b}} {{a}} {{b}} {{c}}")
+    assert missing_variables(segments, {"c": ""}) == ["a", "b"]
+
+
+def test_unfilled_header_percent_encodes_non_latin1():
+    assert unfilled_header(["name", "राशि"]) == "name,%E0%A4%B0%E0%A4%BE%E0%A4%B6%E0%A4%BF"
@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+from PIL import Image
+
+from backend.app.services.preview_service import MAX_PAGE_ASPECT, PreviewUnavailable, render_preview
+
+
+def _pdf(tmp_path, width, height):
+    path = str(tmp_path / "doc.pdf")
+    with fitz.open() as pdf:
+        pdf.new_page(width=width, height=height)
+        pdf.save(path)
+    return path
+
+
+def _size(jpeg: bytes):
+    with Image.open(io.BytesIO(jpeg)) as image:
+        return image.size
+
+
+def test_page_is_scaled_to_width(tmp_path):
+    width, height = _size(render_preview(_pdf(tmp_path, 612, 792), ".pdf", 0, 320))
+    assert width == 320
+    assert abs(height - 792 * 320 / 612) <= 1
+
+
+def test_tall_page_is_cropped_from_the_top(tmp_path):
+    width, height = _size(render_preview(_pdf(tmp_path, 1, 14400), ".pdf", 0, 160))
+    assert width == 160
+    assert height == 160 * MAX_PAGE_ASPECT
+
+
+def test_degenerate_pages_are_refused(tmp_path):
+    with pytest.raises(PreviewUnavailable):
+        render_preview(_pdf(tmp_path, 14400, 1), ".pdf", 0, 160)
+    with pytest.raises(PreviewUnavailable):
+        render_preview(_pdf(tmp_path, 612, 792), ".pdf", 1, 160)
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+try:
+    from backend.app.cli import ReprocessCheckpoint
+except RuntimeError:  # raised by `from prisma import Prisma` until `prisma generate` has run
+    pytest.skip("Prisma client not generated", allow_module_level=True)
+
+SELECTION = {"org": "org-1", "type": None, "force": ["analyze"]}
+
+
+def test_resume_skips_completed_and_retries_failed(tmp_path):
+    path = str(tmp_path / "run" / "checkpoint.jsonl")
+    checkpoint = ReprocessCheckpoint(path, SELECTION, restart=False)
+    assert checkpoint.done == set()
+    checkpoint.record("doc-1", {"analyze": "ran"})
+    checkpoint.record("doc-2", None)
+    checkpoint.close()
+
+    resumed = ReprocessCheckpoint(path, SELECTION, restart=False)
+    assert resumed.done == {"doc-1"}
+    resumed.record("doc-2", {"analyze": "ran"})
+    resumed.close()
+
+    assert ReprocessCheckpoint(path, SELECTION, restart=False).done == {"doc-1", "doc-2"}
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text(
+        json.dumps({"selection": SELECTION}) + "\n"
+        + json.dumps({"id": "doc-1", "ok": True, "stages": {}}) + "\n"
+        + '{"id": "doc-2", "o'
+    )
+    assert ReprocessCheckpoint(str(path), SELECTION, restart=False).done == {"doc-1"}
+
+
+def test_other_selection_needs_restart(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = ReprocessCheckpoint(path, SELECTION, restart=False)
+    checkpoint.record("doc-1", {})
+    checkpoint.close()
+
+    other = dict(SELECTION, org="org-2")
+    with pytest.raises(SystemExit):
+        ReprocessCheckpoint(path, other, restart=False)
+
+    restarted = ReprocessCheckpoint(path, other, restart=True)
+    assert restarted.done == set()
+    restarted.close()
+    with open(path, encoding="utf-8") as f:
+        assert json.loads(f.readline()) == {"selection": other}
+        assert f.read() == ""
@@ -0,0 +1,64 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from backend.app.services.rule_prefill import (
+    compile_user_regex,
+    extract_amounts,
+    extract_dates,
+    extract_phones,
+    rule_prefill,
+)
+
+
+def _var(key, type="string", regex=None, enum=None):
+    return SimpleNamespace(key=key, type=type, regex=regex, enum=enum)
+
+
+def _template(*variables):
+    return SimpleNamespace(id=f"tpl-{id(variables)}", updatedAt=datetime(2026, 1, 1), variables=list(variables))
+
+
+def test_extract_dates_normalises_formats():
+    text = "Signed 2024-03-05, due 07/04/2024, renewed 1st of June, 2025 and March 9 2026; not 2024-02-30."
+    assert extract_dates(text) == ["2024-03-05", "2024-04-07", "2025-06-01", "2026-03-09"]
+
+
+def test_extract_amounts_and_phones():
+    assert extract_amounts("Pay $1,200.50 now and 300 USD later") == ["$1,200.50", "300 USD"]
+    assert extract_phones("Call +91 98765 43210 before 2024-01-01") == ["+91 98765 43210"]
+
+
+def test_unique_candidates_fill_typed_variables():
+    template = _template(_var("start_date", type="date"), _var("client_email"), _var("notes"))
+    filled, unresolved = rule_prefill(template, "Start on 2024-05-01, mail ana@example.com")
+    assert filled == {"start_date": "2024-05-01", "client_email": "ana@example.com"}
+    assert unresolved == ["notes"]
+
+
+def test_ambiguous_values_are_left_for_the_llm():
+    # Two candidate dates for one variable, and two variables competing for one amount
+    template = _template(_var("start_date", type="date"), _var("rent_amount"), _var("deposit_amount"))
+    filled, unresolved = rule_prefill(template, "From 2024-05-01 to 2024-06-01, rent $900")
+    assert filled == {}
+    assert unresolved == ["start_date", "rent_amount", "deposit_amount"]
+
+
+def test_regex_and_enum_rules():
+    template = _template(
+        _var("ref", regex=r"ref\s*(\w+)"),
+        _var("plan", enum=["Gold", "Silver"]),
+        _var("tier", enum=["Gold", "Silver"]),
+    )
+    filled, unresolved = rule_prefill(template, "Ref AB12 on the gold plan, or silver")
+    assert filled == {"ref": "AB12"}
+    assert unresolved == ["plan", "tier"]
+
+    filled, _ = rule_prefill(template, "gold plan only")
+    assert filled == {"plan": "Gold", "tier": "Gold"}
+
+
+def test_unsafe_user_regexes_are_ignored():
+    assert compile_user_regex("k", r"(a+)+$") is None
+    assert compile_user_regex("k", "x" * 201) is None
+    assert compile_user_regex("k", "(unclosed") is None
+    assert compile_user_regex("k", r"\d{4}") is not None
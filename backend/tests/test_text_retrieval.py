@@ -0,0 +1,53 @@
+from backend.app.utils.text_retrieval import BM25Index, chunk_text, tokenize
+
+
+def test_tokenize_drops_stopwords_and_keeps_dotted_terms():
+    assert tokenize("The tenant shall pay U.S. dollars, isn't it?") == ["tenant", "pay", "u.s", "dollars", "isn't"]
+
+
+def test_chunks_follow_paragraphs_and_cite_exact_offsets():
+    text = "  First paragraph here.\n\nSecond one.\n\n" + "Third paragraph. " * 5
+    chunks = chunk_text(text, max_chars=40, overlap_chars=0)
+    assert [c.position for c in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert text[chunk.start:chunk.end] == chunk.text
+        assert chunk.text == chunk.text.strip()
+        assert len(chunk.text) <= 40
+    assert chunks[0].text == "First paragraph here.\n\nSecond one."
+
+
+def test_oversized_sentences_are_hard_split():
+    text = "x" * 95
+    chunks = chunk_text(text, max_chars=40, overlap_chars=0)
+    assert [len(c.text) for c in chunks] == [40, 40, 15]
+    assert "".join(c.text for c in chunks) == text
+
+
+def test_overlap_repeats_trailing_context():
+    sentences = [f"Clause {n} applies." for n in range(8)]
+    text = " ".join(sentences)
+    chunks = chunk_text(text, max_chars=60, overlap_chars=20)
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.start < previous.end
+        assert current.end > previous.end
+    # Every sentence is still covered
+    assert all(any(s in c.text for c in chunks) for s in sentences)
+
+
+def test_bm25_ranks_rarer_and_denser_matches_first():
+    index = BM25Index([
+        "the rent is due monthly",
+        "termination requires notice; notice must be written notice",
+        "notice of rent increase",
+        "governing law",
+    ])
+    ranked = index.top_k("written notice", k=3)
+    assert [idx for idx, _ in ranked] == [1, 2]
+    assert ranked[0][1] > ranked[1][1] > 0
+    assert index.top_k("arbitration", k=3) == []
+    assert index.top_k("the", k=3) == []
+
+
+def test_bm25_on_empty_corpus():
+    assert BM25Index([]).top_k("anything", k=5) == []
@@ -0,0 +1,125 @@
+import asyncio
+import fcntl
+import os
+
+import pytest
+from fastapi import HTTPException
+
+try:
+    from backend.app.services.upload_session_service import (
+        DATA_FILE,
+        DATA_LOCK,
+        UploadSessionStore,
+        merge_ranges,
+        missing_ranges,
+    )
+except RuntimeError:  # raised by `from prisma import Prisma` until `prisma generate` has run
+    pytest.skip("Prisma client not generated", allow_module_level=True)
+
+DATA = bytes(range(256)) * 4 + b"tail"  # 1028 bytes, 5 chunks of 256 (last one 4)
+
+
+def test_merge_ranges_sorts_and_joins_touching_ranges():
+    assert merge_ranges([[20, 30], [0, 10], [10, 15], [25, 40], [50, 60]]) == [[0, 15], [20, 40], [50, 60]]
+    assert merge_ranges([[0, 10], [2, 5]]) == [[0, 10]]
+    assert merge_ranges([]) == []
+
+
+def test_missing_ranges():
+    assert missing_ranges([], 100) == [[0, 100]]
+    assert missing_ranges([[10, 20], [30, 100]], 100) == [[0, 10], [20, 30]]
+    assert missing_ranges([[0, 100]], 100) == []
+
+
+async def _body(data, parts=2):
+    step = -(-len(data) // parts)
+    for start in range(0, len(data), step):
+        yield data[start:start + step]
+
+
+async def _broken_body(data, keep):
+    yield data[:keep]
+    raise ConnectionError("client went away")
+
+
+def _store(tmp_path):
+    return UploadSessionStore(str(tmp_path), ttl_seconds=3600, chunk_bytes=256, max_bytes=1 << 20)
+
+
+def test_out_of_order_and_partial_chunks(tmp_path):
+    store = _store(tmp_path)
+
+    async def scenario():
+        session = await store.create("org", "file.pdf", len(DATA), None)
+        session_id = session["session_id"]
+        for index in (4, 1, 0):
+            await store.write_chunk(session_id, "org", index, _body(DATA[index * 256:(index + 1) * 256]))
+
+        # A dropped connection still records what arrived
+        with pytest.raises(ConnectionError):
+            await store.write_chunk(session_id, "org", 3, _broken_body(DATA[768:1024], keep=100))
+        status = await store.status(session_id, "org")
+        assert status["received"] == [[0, 512], [768, 868], [1024, 1028]]
+        assert status["missing"] == [[512, 768], [868, 1024]]
+        assert not status["complete"]
+
+        for index in (3, 2):
+            status = await store.write_chunk(session_id, "org", index, _body(DATA[index * 256:(index + 1) * 256]))
+        assert status["complete"]
+        assert status["received_bytes"] == len(DATA)
+
+        with pytest.raises(HTTPException) as error:
+            await store.write_chunk(session_id, "org", 5, _body(b"x"))
+        assert error.value.status_code == 416
+        return session_id
+
+    session_id = asyncio.run(scenario())
+    with open(os.path.join(tmp_path, session_id, DATA_FILE), "rb") as f:
+        assert f.read() == DATA
+
+
+def test_oversized_chunk_is_rejected(tmp_path):
+    store = _store(tmp_path)
+
+    async def scenario():
+        session = await store.create("org", "file.pdf", len(DATA), None)
+        with pytest.raises(HTTPException) as error:
+            await store.write_chunk(session["session_id"], "org", 4, _body(b"x" * 10))
+        return error.value.status_code
+
+    assert asyncio.run(scenario()) == 413
+
+
+def test_contended_lock_is_polled_on_the_loop(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+
+    def no_threads(*args, **kwargs):
+        raise AssertionError("lock waits must not occupy executor threads")
+
+    async def scenario():
+        session = await store.create("org", "file.pdf", len(DATA), None)
+        session_id = session["session_id"]
+        # Another process holding the lock: a separate open file description
+        holder = os.open(os.path.join(tmp_path, session_id, DATA_LOCK), os.O_RDWR | os.O_CREAT)
+        fcntl.flock(holder, fcntl.LOCK_EX)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        async def release_later():
+            await asyncio.sleep(0.1)
+            os.close(holder)
+
+        monkeypatch.setattr(asyncio, "to_thread", no_threads)
+        ticking = asyncio.create_task(ticker())
+        releasing = asyncio.create_task(release_later())
+        async with store._flock(session_id, DATA_LOCK, fcntl.LOCK_EX):
+            assert releasing.done()
+        ticking.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) > 5